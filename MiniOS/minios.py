@@ -1,34 +1,44 @@
+import time
+
+# Records how long each part of the startup takes, for 'python minios.py --startup-report'
+startup_clock = time.perf_counter()
+startup_phases = []
+
+def mark_startup_phase(name):
+    """Records the time spent since the previous startup phase under the given name."""
+    global startup_clock
+    now = time.perf_counter()
+    startup_phases.append((name, now - startup_clock))
+    startup_clock = now
+
+# Only the modules needed to reach the prompt are imported here.
+# Everything else is imported inside the command that uses it, so startup stays fast.
 import os
 import sys
-import datetime
-import platform
-import subprocess
-import shutil
-import re
-import time
-import socket
-import urllib.request
-from urllib.error import URLError
-import random
-
-# Import third-party libraries, gracefully handling if they are not installed.
-try:
-    import psutil
-    PSUTIL_INSTALLED = True
-except ImportError:
-    PSUTIL_INSTALLED = False
-
-try:
-    import GPUtil
-    GPUTIL_INSTALLED = True
-except ImportError:
-    GPUTIL_INSTALLED = False
-    
-try:
-    from PIL import Image
-    PILLOW_INSTALLED = True
-except ImportError:
-    PILLOW_INSTALLED = False
+
+mark_startup_phase("imports")
+
+# Optional third-party libraries ("drivers") are imported the first time a command needs them.
+# Maps the module name to the module, or None if it is not installed.
+drivers = {}
+
+# How long each driver took to import, in seconds
+driver_load_times = {}
+
+def load_driver(name):
+    """
+    Imports an optional library the first time it is needed.
+    Returns the module, or None if it is not installed.
+    """
+    if name not in drivers:
+        import importlib
+        start = time.perf_counter()
+        try:
+            drivers[name] = importlib.import_module(name)
+        except ImportError:
+            drivers[name] = None
+        driver_load_times[name] = time.perf_counter() - start
+    return drivers[name]
 
 # Global variable to store the start time of the program
 program_start_time = time.time()
@@ -36,13 +46,154 @@ program_start_time = time.time()
 # Global variable to store the current background image path
 current_background_path = None
 
-# Global variable to store the server process object for non-blocking execution
-server_process = None
+# The command line 'internet' runs as a background job
+SERVER_COMMAND = "run minios_web_server.py"
+
+# Global variable to store the rendered desktop background, see get_ascii_background()
+ascii_background_cache = None
+
+# Global cache of folder listings: absolute path -> (modification time, entries), see list_directory()
+listing_cache = {}
+LISTING_CACHE_SIZE = 64
+LISTING_SETTLE_NS = 2 * 10**9
+
+# Global variable to store the absolute path of the 'minios_data' folder, set by main()
+data_root = None
+
+# MiniOS keeps its own files (search index, caches, history) in this folder inside minios_data
+STATE_FOLDER = ".minios"
+
+# Deleted files and folders are moved into this folder inside minios_data
+TRASH_FOLDER = ".trash"
+
+# Folders that commands walking the whole tree (grep, search, ...) never go into
+WALK_SKIP_NAMES = {STATE_FOLDER, TRASH_FOLDER}
+
+# Files bigger than this are not added to the search index
+SEARCH_MAX_FILE_SIZE = 32 * 1024 * 1024
+
+# Trash limits: older or excess items are deleted for good by the trash worker
+TRASH_MAX_AGE = 30 * 24 * 3600
+TRASH_MAX_SIZE = 2 * 1024**3
+TRASH_CHECK_INTERVAL = 60
+
+# Global state of the trash worker thread, see start_trash_worker().
+# The low-level _thread lock avoids importing threading before it is needed.
+import _thread
+trash_lock = _thread.allocate_lock()
+trash_wakeup = None
+trash_worker_thread = None
+trash_counter = 0
+
+# Full path of this file, used to start warm interpreters after MiniOS has changed folders
+MINIOS_PATH = os.path.abspath(__file__)
+
+# Modules each warm interpreter imports once, so scripts started from it do not pay for them
+INTERPRETER_PRELOADS = {
+    "run": ["json", "math", "random", "re", "collections", "itertools", "functools", "datetime",
+            "pathlib", "string", "textwrap"],
+    "games": ["pygame", "random", "math", "json", "collections"],
+}
+
+# How many bytes of a script's stdout and stderr 'run' keeps after showing them
+RUN_OUTPUT_TAIL = 64 * 1024
+
+# Results of 'bench' are kept in minios_data/.minios under this name, up to BENCH_HISTORY_LIMIT per script
+BENCH_HISTORY_FILE = "bench_history.json"
+BENCH_HISTORY_LIMIT = 50
+
+# 'bench' reports a regression when the median time or peak memory grows by more than this fraction
+BENCH_REGRESSION_THRESHOLD = 0.10
+
+# How many bytes of output each background job keeps for 'fg'
+JOB_OUTPUT_TAIL = 256 * 1024
+
+# Background jobs by job number, and the job each job thread runs (by thread id), see start_job()
+job_table = {}
+job_threads = {}
+
+# Compiled calculator expressions, see compile_expression(), and the operators and functions it allows
+calc_cache = {}
+CALC_CACHE_SIZE = 1024
+calc_tables = {}
+
+# 'plot' samples this many x values (fewer without NumPy, where every point is evaluated on its own)
+PLOT_SAMPLES = 100000
+PLOT_FALLBACK_SAMPLES = 10000
+# The most samples '-n' may ask for
+PLOT_MAX_SAMPLES = 10 * PLOT_SAMPLES
+
+# Braille dot bits for the pixel at (column % 2, row % 4) of a character cell
+BRAILLE_DOTS = ((0x01, 0x02, 0x04, 0x40), (0x08, 0x10, 0x20, 0x80))
+
+# Factorials above this are refused instead of computing for ages
+CALC_MAX_FACTORIAL = 10000
+
+# Integer results of '**' and '*' bigger than this many bits are refused for the same reason
+CALC_MAX_BITS = 1000000
+
+# How many tasks 'todo' shows per page
+TODO_PAGE_SIZE = 20
+
+# Pipelines pass lines in batches of up to PIPE_BATCH_LINES, with at most PIPE_QUEUE_BATCHES waiting
+PIPE_BATCH_LINES = 256
+PIPE_QUEUE_BATCHES = 16
+
+# Warm interpreters that have been started, by profile name
+interpreter_pools = {}
+interpreter_pools_lock = _thread.allocate_lock()
+
+# Global variable that is True when commands come from a script instead of a person
+batch_mode = False
 
 def clear_screen():
     """Clears the console screen."""
+    if batch_mode:
+        # Nobody is looking at the screen, and spawning 'clear' is slow
+        return
+    if isinstance(sys.stdout, ThreadRouter) and sys.stdout.routed():
+        # Background jobs and pipeline stages don't own the screen; 'clear' would wipe the prompt
+        return
     os.system('cls' if os.name == 'nt' else 'clear')
 
+class UsageError(Exception):
+    """Raised when a command is given options it does not understand."""
+
+def command_parser(prog, description):
+    """
+    Creates an argparse parser for the options of a MiniOS command.
+    Instead of exiting the program on bad options it raises UsageError.
+    """
+    import argparse
+
+    class CommandParser(argparse.ArgumentParser):
+        def error(self, message):
+            raise UsageError(f"{self.prog}: {message}\n{self.format_usage().strip()}")
+
+        def exit(self, status=0, message=None):
+            # Reached after '-h' printed the help text
+            raise UsageError(message or "")
+
+    return CommandParser(prog=prog, description=description)
+
+def parse_command_args(parser, arg):
+    """Splits a command's argument string like a shell would and parses it with the given parser."""
+    import shlex
+    try:
+        words = shlex.split(arg or "", posix=(os.name != 'nt'))
+    except ValueError as e:
+        raise UsageError(f"{parser.prog}: {e}")
+    return parser.parse_args(words)
+
+def format_size(num_bytes):
+    """Formats a number of bytes as a short human readable string, e.g. '1.5 MB'."""
+    size = float(num_bytes)
+    for unit in ["B", "KB", "MB", "GB", "TB"]:
+        if abs(size) < 1024 or unit == "TB":
+            break
+        size /= 1024
+    return f"{int(size)} B" if unit == "B" else f"{size:.1f} {unit}"
+
 def show_drivers_help():
     """Displays a list of required packages (drivers)."""
     print("=== MiniOS Drivers Information ==S")
@@ -60,26 +211,171 @@ def show_drivers_help():
     
     print("\n")
 
-def get_file_list_lines():
-    """Returns a list of strings representing the files and folders."""
-    files = os.listdir(os.getcwd())
+def list_directory(path):
+    """
+    Returns the entries of a folder as a tuple of (name, is_dir) pairs.
+    Listings come from os.scandir, which gets the file type without a stat call per entry.
+    They are cached per folder and only read again when the folder's modification time changes,
+    so redrawing a big folder costs a single stat call.
+    """
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+    cached = listing_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                # Broken symlinks and the like are shown as files
+                is_dir = False
+            entries.append((entry.name, is_dir))
+    entries = tuple(entries)
+
+    # A folder changed within the filesystem's timestamp resolution may change again
+    # without its modification time moving, so only trust listings of settled folders.
+    if time.time_ns() - mtime > LISTING_SETTLE_NS:
+        if path not in listing_cache and len(listing_cache) >= LISTING_CACHE_SIZE:
+            # Forget the folder that was cached first
+            del listing_cache[next(iter(listing_cache))]
+        listing_cache[path] = (mtime, entries)
+    return entries
+
+def get_file_list_lines(limit=None):
+    """
+    Returns a list of strings representing the files and folders.
+    With a limit, only the first 'limit' entries are listed, followed by a line counting the rest.
+    """
+    entries = list_directory(os.getcwd())
     file_list_lines = []
-    if not files:
+    if not entries:
         file_list_lines.append("[No files or folders]")
     else:
-        for f in files:
-            full_path = os.path.join(os.getcwd(), f)
-            if os.path.isdir(full_path):
-                file_list_lines.append(f"[DIR] {f}")
+        for name, is_dir in entries[:limit]:
+            if is_dir:
+                file_list_lines.append(f"[DIR] {name}")
             else:
-                file_list_lines.append(f"[FILE] {f}")
+                file_list_lines.append(f"[FILE] {name}")
+        if limit is not None and len(entries) > limit:
+            file_list_lines.append(f"... and {len(entries) - limit} more (use 'list')")
     return file_list_lines
 
-def list_files_and_folders():
-    """Prints the list of files and folders to the console."""
-    lines = get_file_list_lines()
-    for line in lines:
-        print(line)
+def list_sort_key(sort, folder, name):
+    """
+    Returns the key 'list' sorts an entry by.
+    Keys end with the name, so no two entries of a folder share a key.
+    """
+    if sort == "name":
+        return (name.lower(), name)
+    try:
+        info = os.stat(os.path.join(folder, name))
+    except OSError:
+        return (0, name)
+    if sort == "size":
+        return (info.st_size, name)
+    return (info.st_mtime, name)
+
+def key_entries(entries, folder, sort):
+    """
+    Returns (key, name, is_dir) for every entry. Each entry is looked up once, so all pages
+    of one listing use the same keys even if files change while it is shown.
+    """
+    return [(list_sort_key(sort, folder, name), name, is_dir) for name, is_dir in entries]
+
+def iter_sorted_page(keyed_entries, page_size, after=None, reverse=False):
+    """
+    Returns the next page of key_entries() in sort order, as a list of (key, name, is_dir).
+    'after' is the key of the last entry already shown. The page is picked with a bounded heap,
+    so only page_size entries are ever held in order, however big the folder is.
+    """
+    import heapq
+    items = iter(keyed_entries)
+    if after is not None:
+        if reverse:
+            items = (item for item in items if item[0] < after)
+        else:
+            items = (item for item in items if item[0] > after)
+    select = heapq.nlargest if reverse else heapq.nsmallest
+    return select(page_size, items, key=lambda item: item[0])
+
+def format_list_line(name, is_dir, sort=None, key=None):
+    """Formats one 'list' line, adding the size or date when that is what the list is sorted by."""
+    line = f"[DIR] {name}" if is_dir else f"[FILE] {name}"
+    if sort == "size":
+        line = f"{line.ljust(40)} {format_size(key[0])}"
+    elif sort == "mtime":
+        line = f"{line.ljust(40)} {time.strftime('%Y-%m-%d %H:%M', time.localtime(key[0]))}"
+    return line
+
+def list_files_and_folders(arg=None):
+    """
+    Prints the files and folders in the current directory, a page at a time.
+    Supports a glob filter, sorting by name/size/mtime and a top-N mode.
+    """
+    import fnmatch
+    parser = command_parser("list", "List files and folders in the current directory.")
+    parser.add_argument("pattern", nargs="?", help="only show names matching this glob, e.g. '*.py'")
+    parser.add_argument("--sort", choices=["name", "size", "mtime"], help="sort the listing")
+    parser.add_argument("--reverse", action="store_true", help="largest, newest or last names first")
+    parser.add_argument("--top", type=int, metavar="N", help="only show the first N entries")
+    parser.add_argument("--page-size", type=int, metavar="N", help="entries per page (default: screen height)")
+    options = parse_command_args(parser, arg)
+    for name, value in [("--top", options.top), ("--page-size", options.page_size)]:
+        if value is not None and value < 1:
+            raise UsageError(f"list: {name} must be at least 1")
+
+    folder = os.getcwd()
+    entries = list_directory(folder)
+    if options.pattern:
+        entries = [(name, is_dir) for name, is_dir in entries if fnmatch.fnmatch(name, options.pattern)]
+    if not entries:
+        print("[No files or folders]" if not options.pattern else "[No matching files or folders]")
+        return
+
+    if options.top is not None:
+        # Top-N mode: one bounded heap pass, no paging
+        keyed = key_entries(entries, folder, options.sort or "name")
+        for key, name, is_dir in iter_sorted_page(keyed, options.top, reverse=options.reverse):
+            print(format_list_line(name, is_dir, options.sort, key))
+        return
+
+    import shutil
+    page_size = options.page_size or max(shutil.get_terminal_size().lines - 2, 5)
+    # Scripts and pipelines get the whole listing without paging prompts
+    interactive = not batch_mode and sys.stdin.isatty()
+    keyed = key_entries(entries, folder, options.sort) if options.sort else None
+    if not interactive:
+        # Everything gets shown, so one sort is cheaper than picking page after page
+        if keyed is not None:
+            keyed.sort(key=lambda item: item[0], reverse=options.reverse)
+            for key, name, is_dir in keyed:
+                print(format_list_line(name, is_dir, options.sort, key))
+        else:
+            for name, is_dir in entries:
+                print(format_list_line(name, is_dir))
+        return
+    shown = 0
+    last_key = None
+
+    while shown < len(entries):
+        if keyed is not None:
+            page = iter_sorted_page(keyed, page_size, last_key, options.reverse)
+            for key, name, is_dir in page:
+                print(format_list_line(name, is_dir, options.sort, key))
+            last_key = page[-1][0]
+        else:
+            page = entries[shown:shown + page_size]
+            for name, is_dir in page:
+                print(format_list_line(name, is_dir))
+        shown += len(page)
+
+        if interactive and shown < len(entries):
+            answer = input(f"-- {shown}/{len(entries)} shown. Enter for more, 'q' to stop -- ").strip().lower()
+            if answer == "q":
+                break
 
 def show_gui_desktop():
     """
@@ -92,9 +388,10 @@ def show_gui_desktop():
         print("          M i n i O S")
         print("================================\n")
         
-        # Get the file list and background ASCII art
-        file_list_lines = get_file_list_lines()
+        # Get the file list and background ASCII art.
+        # Only as many files as fit next to the background are shown, 'list' shows the rest.
         ascii_background_lines = get_ascii_background()
+        file_list_lines = get_file_list_lines(limit=len(ascii_background_lines) - 1)
         
         # Determine max line count for consistent display
         max_lines = max(len(file_list_lines), len(ascii_background_lines))
@@ -123,6 +420,16 @@ def show_gui_desktop():
         show_help() # Fallback to a simpler view
 
 def get_ascii_background():
+    """
+    Returns the desktop background as a list of strings.
+    The art is rendered once and then reused on every redraw.
+    """
+    global ascii_background_cache
+    if ascii_background_cache is None:
+        ascii_background_cache = render_ascii_background()
+    return ascii_background_cache
+
+def render_ascii_background():
     """
     Generates a solid yellow Christian cross as the ASCII art background.
     Returns the ASCII art as a list of strings.
@@ -174,11 +481,47 @@ def set_background(filepath):
         print(f"Background set to '{filepath}'.")
     else:
         print("Error: File not found.")
+        return 1
+
+def warm_file_list():
+    """Fills the listing cache for the current folder so the first 'desktop' or 'list' is instant."""
+    list_directory(os.getcwd())
 
-def show_boot_screen():
+def warm_background():
+    """Renders the desktop background so the first 'desktop' can reuse it."""
+    get_ascii_background()
+
+def warm_drivers():
+    """Imports the optional drivers so 'pcinfo' and 'image' start without a delay."""
+    for name in ["psutil", "GPUtil", "PIL.Image"]:
+        load_driver(name)
+
+# Work done in the background while the boot screen is shown.
+# The warm interpreter for 'run' is not among them: it is a whole process, started on the first 'run'.
+BOOT_WARMUP_TASKS = [warm_file_list, warm_background, warm_drivers]
+# Longest the boot screen waits for the warmup; slower tasks finish in the background
+BOOT_MAX_SECONDS = 3.0
+
+def run_warmup_task(task):
+    """Runs one warmup task. A failing task only means that later command starts cold."""
+    try:
+        task()
+    except Exception:
+        pass
+
+def show_boot_screen(min_seconds=1.0):
     """
-    Displays the boot screen for 4 seconds before moving to the main desktop.
+    Displays the boot screen while warmup tasks run in background threads.
+    The screen closes when the warmup is done or after min_seconds, whichever is later,
+    but never waits longer than BOOT_MAX_SECONDS for a slow task.
     """
+    import threading
+    boot_start = time.perf_counter()
+    workers = [threading.Thread(target=run_warmup_task, args=(task,), daemon=True)
+               for task in BOOT_WARMUP_TASKS]
+    for worker in workers:
+        worker.start()
+
     clear_screen()
     print("================================")
     print("          M i n i O S")
@@ -197,9 +540,15 @@ def show_boot_screen():
     print("##" + " " * 66 + "##")
     print("#" * 70)
     print("\n")
+    print("Starting up...")
     
-    # Wait for 4 seconds
-    time.sleep(4)
+    # Wait for the warmup, then keep the warning visible for the rest of min_seconds
+    deadline = boot_start + max(min_seconds, BOOT_MAX_SECONDS)
+    for worker in workers:
+        worker.join(max(deadline - time.perf_counter(), 0))
+    remaining = min_seconds - (time.perf_counter() - boot_start)
+    if remaining > 0:
+        time.sleep(remaining)
     clear_screen()
 
 def show_help():
@@ -208,17 +557,24 @@ def show_help():
 MiniOS Commands:
   help        - Show this message
   list        - List files/folders in current directory
+                [pattern] [--sort name|size|mtime] [--reverse] [--top N] [--page-size N]
   desktop     - Show fake desktop
-  calc        - Open calculator
+  calc        - Open calculator ('calc FILE' evaluates a file of expressions)
   create      - Create a new text file
-  read        - Read a text file's content
-  edit        - Edit an existing text file
-  run         - Execute a Python (.py) file
-  delete        - Delete a file
+  read        - Read a text file's content (pages through big files)
+  edit        - Edit an existing text file in the full-screen editor
+  run         - Execute a Python (.py) file, e.g. 'run game.py'
+  delete        - Delete a file (moves it to the trash)
   rename      - Rename a file or folder
-  delfolder   - Delete a folder and its contents
-  todo        - Manage a simple to-do list
-  pcinfo      - Display PC hardware (CPU/RAM/GPU) information
+  copy        - Copy files/folders, e.g. 'copy *.txt backup' (see 'copy -h')
+  move        - Move files/folders, e.g. 'move logs archive'
+  delfolder   - Delete a folder and its contents (moves it to the trash)
+  trash       - 'trash list', 'trash restore <id>' or 'trash empty'
+  todo        - Manage a to-do list with priorities, due dates and tags
+  pcinfo      - Display PC hardware (CPU/RAM/GPU) usage with history (--watch, --interval S, --stop)
+  top         - List processes by CPU, memory or IO use (-s cpu|rss|io, -n N, --interval S, --count N)
+  record      - Record pcinfo metrics to a binary file (record start [FILE] [--interval S], stop, status)
+  replay      - Summarise a recording (replay [FILE] [--from T] [--to T] [--last 2h] [--every 5m])
   time        - Display the current date and time
   uptime      - Display system uptime
   folder        - Manage a folder (view or create)
@@ -227,16 +583,33 @@ MiniOS Commands:
   kill_server - Stop the running internet server
   convert     - Convert the last fetched webpage to Markdown
   image       - Display an image as ASCII art
-  code        - Open a simple code editor
+  code        - Write a Python file in the editor
   paint       - Open a text-based drawing app
-  cd          - Change the current directory
+  cd          - Change the current directory (not while background jobs are running)
   background  - Set an image as the desktop background
   drivers     - Displays the required pips to install
   games       - Opens a folder for your games
   terry_davis - Displays information about Terry A. Davis
   special_thanks - Displays special thanks and credits
   ping        - Pings google.com to check internet connectivity
+  grep        - Search file contents, e.g. 'grep -i error logs' (see 'grep -h')
+  search      - Find files in minios_data containing all given words (uses an index)
+  du          - Show the folders that use the most space
+  tree        - Show the folder tree with the size of every folder
+  dedupe      - Find duplicate files ('dedupe --link' replaces them with hard links)
+  pack        - Pack a folder into an archive, e.g. 'pack games games.tar.xz --parallel'
+  unpack      - Unpack a .zip, .tar.gz, .tar.xz or .tar archive
+  bench       - Time a Python script over many runs, e.g. 'bench script.py -n 20 --warmup 2'
+  jobs        - Show the background jobs (end any command with '&' to run it in the background)
+  fg          - Bring a background job to the foreground, e.g. 'fg 1'
+  kill        - Stop a background job, e.g. 'kill 1'. Scripts stop at once; MiniOS commands
+                stop the next time they print, so one that never prints runs to the end
   exit        - Exit MiniOS
+
+Commands can be joined with '|', e.g. 'list | grep .py | sort | head 20'.
+Filters after '|': grep, sort, head, tail, uniq, wc.
+
+Run 'python minios.py --batch script.txt' to run commands from a file.
 """)
 
 def terry_davis_story():
@@ -269,22 +642,425 @@ def special_thanks_command():
     print("version 1.1")
     print("")
 
-def calculator():
-    """A simple calculator that can evaluate math expressions."""
+class CalcError(Exception):
+    """An expression the calculator cannot evaluate, with a message for the user."""
+
+def calc_power(base, exponent):
+    """'**' and pow() that refuse integer results too big to ever finish computing."""
+    if (isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1
+            and abs(base).bit_length() * exponent > CALC_MAX_BITS):
+        raise CalcError("the result would be too big")
+    return base ** exponent
+
+def calc_multiply(left, right):
+    """'*' with the same limit as calc_power, so repeated squaring can't grow a number forever."""
+    if (isinstance(left, int) and isinstance(right, int)
+            and left.bit_length() + right.bit_length() > CALC_MAX_BITS):
+        raise CalcError("the result would be too big")
+    return left * right
+
+def calc_factorial(n):
+    """factorial() with the same kind of limit as calc_power."""
+    import math
+    if isinstance(n, int) and n > CALC_MAX_FACTORIAL:
+        raise CalcError("the result would be too big")
+    return math.factorial(n)
+
+def get_calc_tables(numpy=None):
+    """
+    Returns the operators, functions and constants the calculator allows, building them the first time.
+    Given the numpy module, the functions are NumPy's, which work on whole arrays at once.
+    """
+    kind = "numpy" if numpy else "math"
+    if kind not in calc_tables:
+        import ast
+        import math
+        import operator
+        if numpy:
+            functions = {name: getattr(numpy, name) for name in [
+                "sqrt", "exp", "log10", "log2", "sin", "cos", "tan", "sinh", "cosh", "tanh",
+                "floor", "ceil", "trunc", "hypot", "degrees", "radians"]}
+
+            def array_log(x, base=None):
+                return numpy.log(x) if base is None else numpy.log(x) / numpy.log(base)
+
+            def array_min(*values):
+                result = values[0]
+                for value in values[1:]:
+                    result = numpy.minimum(result, value)
+                return result
+
+            def array_max(*values):
+                result = values[0]
+                for value in values[1:]:
+                    result = numpy.maximum(result, value)
+                return result
+            functions.update(log=array_log, asin=numpy.arcsin, acos=numpy.arccos, atan=numpy.arctan,
+                             atan2=numpy.arctan2, abs=numpy.abs, round=numpy.round,
+                             min=array_min, max=array_max, pow=calc_power)
+        else:
+            functions = {name: getattr(math, name) for name in [
+                "sqrt", "exp", "log", "log10", "log2", "sin", "cos", "tan", "asin", "acos", "atan", "atan2",
+                "sinh", "cosh", "tanh", "floor", "ceil", "trunc", "gcd", "hypot", "degrees", "radians"]}
+            functions.update(abs=abs, round=round, min=min, max=max, pow=calc_power, factorial=calc_factorial)
+        calc_tables[kind] = {
+            "binary": {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: calc_multiply,
+                       ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+                       ast.Pow: calc_power},
+            "unary": {ast.USub: operator.neg, ast.UAdd: operator.pos},
+            "functions": functions,
+            "constants": {"pi": math.pi, "e": math.e, "tau": math.tau, "inf": math.inf, "nan": math.nan},
+        }
+    return calc_tables[kind]
+
+def fold_calc_constant(function, constant):
+    """Works out a part of an expression that has no variables once, at compile time."""
+    if not constant:
+        return function, False
+    try:
+        value = function(None)
+    except Exception:
+        # Leave errors like 1/0 to be reported when the expression is evaluated
+        return function, False
+    return (lambda variables: value), True
+
+def compile_calc_tree(tree, numpy=None):
+    """
+    Turns a parsed expression into a closure that takes the variables dict.
+    Any kind of node that is not handled here is refused, so nothing else can run.
+    With numpy the closure works on arrays (see get_calc_tables).
+    """
+    import ast
+    tables = get_calc_tables(numpy)
+    binary = tables["binary"]
+    unary = tables["unary"]
+    functions = tables["functions"]
+    constants = tables["constants"]
+
+    def compile_node(node):
+        # Returns (closure, is_constant)
+        node_type = type(node)
+        if node_type is ast.Constant and type(node.value) in (int, float):
+            value = node.value
+            return (lambda variables: value), True
+
+        if node_type is ast.Name:
+            name = node.id
+            if name in constants:
+                value = constants[name]
+                return (lambda variables: value), True
+
+            def load(variables):
+                try:
+                    return variables[name]
+                except KeyError:
+                    raise CalcError(f"'{name}' is not defined") from None
+            return load, False
+
+        if node_type is ast.BinOp and type(node.op) in binary:
+            operation = binary[type(node.op)]
+            left, left_constant = compile_node(node.left)
+            right, right_constant = compile_node(node.right)
+            return fold_calc_constant(lambda variables: operation(left(variables), right(variables)),
+                                      left_constant and right_constant)
+
+        if node_type is ast.UnaryOp and type(node.op) in unary:
+            operation = unary[type(node.op)]
+            operand, constant = compile_node(node.operand)
+            return fold_calc_constant(lambda variables: operation(operand(variables)), constant)
+
+        if node_type is ast.Call and type(node.func) is ast.Name and not node.keywords:
+            function = functions.get(node.func.id)
+            if function is None:
+                raise CalcError(f"unknown function '{node.func.id}'")
+            if any(type(arg) is ast.Starred for arg in node.args):
+                raise CalcError("'*' arguments are not allowed")
+            compiled = [compile_node(arg) for arg in node.args]
+            args = [arg for arg, _ in compiled]
+            constant = all(is_constant for _, is_constant in compiled)
+            if len(args) == 1:
+                only = args[0]
+                return fold_calc_constant(lambda variables: function(only(variables)), constant)
+            return fold_calc_constant(lambda variables: function(*[arg(variables) for arg in args]), constant)
+
+        raise CalcError(f"'{ast.unparse(node)}' is not allowed. Use numbers, variables, + - * / // % ** and functions.")
+
+    return compile_node(tree.body)[0]
+
+def compile_expression(text, numpy=None):
+    """
+    Compiles a calculator expression into a closure that takes the variables dict.
+    The expression is parsed with ast and every node is checked against what the calculator allows,
+    so nothing else can run. Compiled expressions are cached, so repeating one costs a dict lookup.
+    """
+    key = (text, numpy is not None)
+    compiled = calc_cache.get(key)
+    if compiled is None:
+        import ast
+        try:
+            compiled = compile_calc_tree(ast.parse(text, mode="eval"), numpy)
+        except SyntaxError:
+            raise CalcError("invalid expression. Use numbers and +, -, *, /, **, %, parentheses.") from None
+        except (RecursionError, MemoryError, ValueError):
+            raise CalcError("the expression is too complicated") from None
+        if len(calc_cache) >= CALC_CACHE_SIZE:
+            # Forget the expression that was cached first
+            del calc_cache[next(iter(calc_cache))]
+        calc_cache[key] = compiled
+    return compiled
+
+def evaluate_expression(text, variables):
+    """Evaluates a calculator expression, turning math errors into CalcError."""
+    try:
+        return compile_expression(text.strip())(variables)
+    except ZeroDivisionError:
+        raise CalcError("division by zero") from None
+    except OverflowError:
+        raise CalcError("the result is too big") from None
+    except (ValueError, TypeError) as e:
+        raise CalcError(f"math error: {e}") from None
+
+def calc_line(line, variables):
+    """
+    Evaluates one calculator line: an expression, or 'name = expression' to set a variable.
+    The result is also stored as 'ans'. Returns the result.
+    """
+    name, equals, expression = line.partition("=")
+    name = name.strip()
+    if equals and name.isidentifier() and not expression.startswith("="):
+        tables = get_calc_tables()
+        if name in tables["constants"] or name in tables["functions"]:
+            raise CalcError(f"'{name}' cannot be changed")
+        value = evaluate_expression(expression, variables)
+        variables[name] = value
+    else:
+        value = evaluate_expression(line, variables)
+    variables["ans"] = value
+    return value
+
+def format_calc_value(value):
+    """Returns a calculator result as text; integers too long to print are described instead."""
+    try:
+        return str(value)
+    except ValueError:
+        return f"(an integer with about {int(value.bit_length() * 0.30103)} digits)"
+
+def sample_expression(expression, start, end, samples, variables):
+    """
+    Evaluates expression for evenly spaced x values from start to end.
+    With NumPy the compiled expression runs once on the whole x array; without it, point by point.
+    Points where it is undefined become NaN. Returns (ys, numpy module or None).
+    """
+    numpy = load_driver("numpy")
+    if numpy is not None:
+        xs = numpy.linspace(start, end, samples)
+        compiled = compile_expression(expression, numpy)
+        with numpy.errstate(all="ignore"):
+            try:
+                ys = compiled({**variables, "x": xs})
+            except ZeroDivisionError:
+                raise CalcError("division by zero") from None
+            except (ValueError, TypeError) as e:
+                raise CalcError(f"math error: {e}") from None
+            try:
+                ys = numpy.broadcast_to(numpy.asarray(ys, dtype=float), xs.shape)
+            except (TypeError, ValueError):
+                raise CalcError("the result cannot be plotted") from None
+        return numpy.where(numpy.isfinite(ys), ys, numpy.nan), numpy
+
+    compiled = compile_expression(expression)
+    scope = dict(variables)
+    step = (end - start) / (samples - 1)
+    ys = []
+    for i in range(samples):
+        scope["x"] = start + i * step
+        try:
+            y = float(compiled(scope))
+        except (ArithmeticError, ValueError, TypeError):
+            y = float("nan")
+        ys.append(y if y - y == 0 else float("nan"))
+    return ys, None
+
+def plot_envelope(ys, width, numpy=None):
+    """
+    Down-samples ys to width columns, keeping the lowest and highest value of every column so
+    spikes are not lost. Returns a list of (low, high) pairs, or None for columns with no values.
+    """
+    import math
+    count = len(ys)
+    starts = [(column * count) // width for column in range(width)]
+    if numpy is not None:
+        lows = numpy.fmin.reduceat(ys, starts).tolist()
+        highs = numpy.fmax.reduceat(ys, starts).tolist()
+    else:
+        lows = []
+        highs = []
+        for column, first in enumerate(starts):
+            last = starts[column + 1] if column + 1 < width else count
+            values = [y for y in ys[first:last] if not math.isnan(y)]
+            lows.append(min(values) if values else math.nan)
+            highs.append(max(values) if values else math.nan)
+    return [None if math.isnan(low) else (low, high) for low, high in zip(lows, highs)]
+
+def render_braille_chart(envelope, rows, low, high):
+    """Draws an envelope as rows of braille characters, each holding 2x4 pixels."""
+    pixel_rows = rows * 4
+    scale = (pixel_rows - 1) / (high - low)
+    grid = [[0] * ((len(envelope) + 1) // 2) for _ in range(rows)]
+    previous = None
+    for x, pair in enumerate(envelope):
+        if pair is None:
+            previous = None
+            continue
+        top = round((high - pair[1]) * scale)
+        bottom = round((high - pair[0]) * scale)
+        current = (top, bottom)
+        # Join up with the previous column so steep parts stay a connected line
+        if previous is not None:
+            top = min(top, previous[1])
+            bottom = max(bottom, previous[0])
+        previous = current
+        dots = BRAILLE_DOTS[x % 2]
+        for y in range(max(top, 0), min(bottom, pixel_rows - 1) + 1):
+            grid[y // 4][x // 2] |= dots[y % 4]
+    return ["".join(chr(0x2800 + cell) for cell in row) for row in grid]
+
+def plot_line(text, variables):
+    """
+    Plots 'EXPRESSION [from A to B] [-n SAMPLES]' (x is the variable) as a braille chart sized to the terminal.
+    """
+    import ast
+    import math
+    import re
+    import shutil
+    match = re.fullmatch(r"(?P<expression>.+?)(?:\s+from\s+(?P<start>.+?)\s+to\s+(?P<end>.+?))?"
+                         r"(?:\s+-n\s+(?P<samples>\d+))?\s*", text.strip())
+    if not match:
+        raise CalcError("usage: plot EXPRESSION [from A to B] [-n SAMPLES], e.g. 'plot sin(x) from -pi to pi'")
+    expression = match.group("expression")
+    start = calc_line(match.group("start"), dict(variables)) if match.group("start") else -10.0
+    end = calc_line(match.group("end"), dict(variables)) if match.group("end") else 10.0
+    try:
+        start = float(start)
+        end = float(end)
+    except (TypeError, OverflowError):
+        raise CalcError("the range must be real numbers that fit in a float") from None
+    if not (math.isfinite(start) and math.isfinite(end)):
+        raise CalcError("the range must be finite")
+    if not start < end:
+        raise CalcError("the start of the range must be below its end")
+
+    # Catch unknown names now rather than getting NaN for every point
+    try:
+        names = {node.id for node in ast.walk(ast.parse(expression, mode="eval")) if isinstance(node, ast.Name)}
+    except SyntaxError:
+        raise CalcError("invalid expression. Use numbers and +, -, *, /, **, %, parentheses.") from None
+    tables = get_calc_tables()
+    for name in sorted(names - {"x"} - set(variables) - set(tables["constants"]) - set(tables["functions"])):
+        raise CalcError(f"'{name}' is not defined")
+
+    size = shutil.get_terminal_size()
+    label_width = 10
+    width = max(10, size.columns - label_width - 2)
+    rows = max(5, min(size.lines - 6, 40))
+    if match.group("samples"):
+        samples = int(match.group("samples"))
+        if samples > PLOT_MAX_SAMPLES:
+            raise CalcError(f"at most {PLOT_MAX_SAMPLES} samples can be plotted")
+    else:
+        samples = PLOT_SAMPLES if load_driver("numpy") is not None else PLOT_FALLBACK_SAMPLES
+    # At least one sample per pixel column
+    samples = max(samples, width * 2)
+
+    begin = time.perf_counter()
+    ys, numpy = sample_expression(expression, start, end, samples, variables)
+    envelope = plot_envelope(ys, width * 2, numpy)
+    elapsed = time.perf_counter() - begin
+    values = [value for pair in envelope if pair is not None for value in pair]
+    if not values:
+        raise CalcError(f"{expression} is not defined anywhere from {start:g} to {end:g}")
+    low, high = min(values), max(values)
+    if low == high:
+        low, high = low - 1, high + 1
+
+    print(f"y = {expression}, x from {start:g} to {end:g}")
+    chart = render_braille_chart(envelope, rows, low, high)
+    for number, row in enumerate(chart):
+        if number == 0:
+            label = f"{high:.4g}"
+        elif number == rows - 1:
+            label = f"{low:.4g}"
+        elif number == rows // 2:
+            label = f"{(high + low) / 2:.4g}"
+        else:
+            label = ""
+        print(f"{label:>{label_width}} |{row}")
+    left = f"{start:.4g}"
+    print(" " * (label_width + 2) + left + f"{end:.4g}".rjust(width - len(left)))
+    engine = "NumPy" if numpy is not None else "pure Python"
+    print(f"({samples} samples, {elapsed * 1000:.1f} ms with {engine})")
+
+def calculate_file(path):
+    """Evaluates every line of a file of expressions and prints one result per line."""
+    variables = {}
+    count = 0
+    failed = 0
+    start = time.perf_counter()
+    results = []
+    with open(path, "r") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            count += 1
+            try:
+                if line.startswith("plot "):
+                    print("\n".join(results))
+                    results.clear()
+                    plot_line(line[5:], variables)
+                    continue
+                results.append(format_calc_value(calc_line(line, variables)))
+            except CalcError as e:
+                failed += 1
+                results.append(f"line {number}: {e}")
+            if len(results) >= 1000:
+                print("\n".join(results))
+                results.clear()
+    if results:
+        print("\n".join(results))
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else 0
+    # The summary goes to stderr so the results can be piped on their own
+    print(f"{count} expressions, {failed} errors, {elapsed:.3f}s ({rate:.0f} expressions/s)", file=sys.stderr)
+    return failed
+
+def calculator(arg=None):
+    """A calculator for math expressions with variables. 'calc FILE' evaluates a file of expressions."""
+    if arg:
+        if not os.path.isfile(arg):
+            print(f"calc: '{arg}' does not exist.")
+            return 1
+        return 1 if calculate_file(arg) else None
+
     print("=== MiniOS Calculator ===")
-    print("You can enter full math expressions, e.g., '2 + 3 * 4'.")
+    print("You can enter full math expressions, e.g., '2 + 3 * 4' or 'sqrt(2) * pi'.")
+    print("Set variables with 'x = 5'; 'ans' is the last result.")
+    print("Plot with 'plot sin(x) * x from -10 to 10'.")
     print("Type 'exit' to return to MiniOS.\n")
+    variables = {}
     while True:
         expr = input("Calc> ").strip()
         if expr.lower() == "exit":
             break
+        if not expr:
+            continue
         try:
-            # Safely evaluate a limited set of expressions
-            allowed_names = {"abs": abs, "round": round, "pow": pow}
-            result = eval(expr, {"__builtins__": None}, allowed_names)
-            print("Result:", result)
-        except:
-            print("Invalid expression. Use numbers and +, -, *, /, **, %, parentheses.")
+            if expr.lower().startswith("plot "):
+                plot_line(expr[5:], variables)
+                continue
+            print("Result:", format_calc_value(calc_line(expr, variables)))
+        except CalcError as e:
+            print(f"Error: {e}")
 
 def code_editor():
     """A simple text editor for writing and saving Python files."""
@@ -295,24 +1071,12 @@ def code_editor():
         print("Filename must end with '.py'.")
         return
 
-    print(f"Start writing your code for '{filename}'.")
-    print("Type 'save()' on a new line to save and exit.")
-    
-    lines = []
-    while True:
-        line = input(">>> ").strip()
-        if line == 'save()':
-            break
-        lines.append(line)
-        
-    code_content = "\n".join(lines)
-    
     try:
-        with open(filename, "w") as f:
-            f.write(code_content)
-        print(f"Code saved to '{filename}'.")
+        # New files open straight into typing mode; 'save()' on its own line saves and exits
+        text_editor(filename, start_typing=not os.path.exists(filename))
     except Exception as e:
         print(f"Error saving file: {e}")
+        return 1
 
 def text_paint():
     """A simple text-based drawing app."""
@@ -420,6 +1184,184 @@ def create_file():
     except Exception as e:
         print("Error creating file:", e)
 
+class FilePager:
+    """
+    Shows a file one page at a time, straight from a memory map.
+    Nothing is read until it is on screen, so opening a huge file is instant.
+    Jumping to a line uses a sparse index with the offset of every INDEX_STEP-th line,
+    which is only built as far as the reader has asked for.
+    """
+    INDEX_STEP = 4096
+    # Longer lines are cut into pieces of this size, so a file without newlines still pages
+    MAX_LINE_BYTES = 64 * 1024
+
+    def __init__(self, path):
+        import mmap
+        self.path = path
+        self.file = open(path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        # mmap refuses empty files
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.line_index = [0]
+        self.index_done = False
+        self.offset = 0
+        # Number of the line at self.offset, None after jumping to a byte offset
+        self.line = 0
+
+    def close(self):
+        if self.size:
+            self.data.close()
+        self.file.close()
+
+    def next_line_start(self, offset):
+        """Returns where the line after the one starting at offset begins."""
+        end = self.data.find(b"\n", offset, offset + self.MAX_LINE_BYTES)
+        return offset + self.MAX_LINE_BYTES if end == -1 else end + 1
+
+    def previous_line_start(self, offset):
+        """Returns where the line before the one starting at offset begins."""
+        if offset <= 0:
+            return 0
+        start = self.data.rfind(b"\n", max(offset - 1 - self.MAX_LINE_BYTES, 0), offset - 1)
+        return 0 if start == -1 else start + 1
+
+    def read_lines(self, offset, count):
+        """Returns up to count lines starting at offset, and the offset after the last one."""
+        lines = []
+        while len(lines) < count and offset < self.size:
+            end = self.next_line_start(offset)
+            lines.append(self.data[offset:end].rstrip(b"\r\n").decode("utf-8", errors="replace"))
+            offset = min(end, self.size)
+        return lines, offset
+
+    def extend_index(self):
+        """Adds the next entry to the sparse line index, or marks the index as complete."""
+        offset = self.line_index[-1]
+        for _ in range(self.INDEX_STEP):
+            end = self.data.find(b"\n", offset)
+            if end == -1:
+                self.index_done = True
+                return
+            offset = end + 1
+        self.line_index.append(offset)
+
+    def line_offset(self, line):
+        """Returns the offset where the given line starts, or None if the file is shorter."""
+        step = line // self.INDEX_STEP
+        while step >= len(self.line_index) and not self.index_done:
+            self.extend_index()
+        if step >= len(self.line_index):
+            return None
+
+        offset = self.line_index[step]
+        for _ in range(line - step * self.INDEX_STEP):
+            end = self.data.find(b"\n", offset)
+            if end == -1:
+                return None
+            offset = end + 1
+        return offset if offset < self.size else None
+
+    def go_to_offset(self, offset):
+        """Moves to the start of the line containing the given byte offset."""
+        offset = min(max(offset, 0), self.size)
+        self.offset = self.previous_line_start(offset + 1) if offset < self.size else self.previous_line_start(self.size)
+        self.line = 0 if self.offset == 0 else None
+
+    def page_up(self, count):
+        for _ in range(count):
+            if self.offset == 0:
+                break
+            self.offset = self.previous_line_start(self.offset)
+            if self.line is not None:
+                self.line -= 1
+        if self.offset == 0:
+            self.line = 0
+
+    def show_page(self, page_size):
+        """Prints the page starting at the current position and returns the offset after it."""
+        lines, end = self.read_lines(self.offset, page_size)
+        clear_screen()
+        percent = (end / self.size) * 100 if self.size else 100
+        where = f"line {self.line + 1}" if self.line is not None else f"byte {self.offset}"
+        print(f"--- {self.path} | {where} | {format_size(self.size)} | {percent:.0f}% ---")
+        for i, text in enumerate(lines):
+            if self.line is not None:
+                print(f"{str(self.line + i + 1).rjust(7)}  {text}")
+            else:
+                print(text)
+        return len(lines), end
+
+def print_file(path):
+    """Writes a whole file to the screen in fixed-size chunks, without loading it into memory."""
+    with open(path, "r", errors="replace") as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            sys.stdout.write(chunk)
+    print()
+
+def view_file(path):
+    """
+    Shows a file in the pager.
+    Scripts and piped input get the whole file printed instead.
+    """
+    if batch_mode or not sys.stdin.isatty():
+        print(f"\n--- Content of '{path}' ---")
+        print_file(path)
+        print(f"--- End of file ---")
+        return
+
+    import shutil
+    pager = FilePager(path)
+    if not pager.size:
+        pager.close()
+        print(f"'{path}' is empty.")
+        return
+    try:
+        while True:
+            page_size = max(shutil.get_terminal_size().lines - 3, 5)
+            shown, end = pager.show_page(page_size)
+            print("Enter/n: next page, b: back, g <line>, o <byte offset>, % <percent>, t: top, e: end, q: quit")
+            command = input("Read> ").strip().split()
+            cmd = command[0].lower() if command else "n"
+
+            try:
+                if cmd == "q" or cmd == "exit":
+                    break
+                elif cmd == "n":
+                    if end < pager.size:
+                        pager.offset = end
+                        if pager.line is not None:
+                            pager.line += shown
+                elif cmd == "b":
+                    pager.page_up(page_size)
+                elif cmd == "t":
+                    pager.offset, pager.line = 0, 0
+                elif cmd == "e":
+                    pager.go_to_offset(pager.size)
+                    pager.page_up(page_size - 1)
+                elif cmd == "g" and len(command) > 1:
+                    line = int(command[1]) - 1
+                    offset = pager.line_offset(max(line, 0))
+                    if offset is None:
+                        print("The file does not have that many lines.")
+                        input("Press Enter to continue.")
+                    else:
+                        pager.offset, pager.line = offset, max(line, 0)
+                elif cmd == "o" and len(command) > 1:
+                    pager.go_to_offset(int(command[1]))
+                elif cmd == "%" and len(command) > 1:
+                    pager.go_to_offset(int(pager.size * float(command[1]) / 100))
+                else:
+                    print("Unknown command.")
+                    input("Press Enter to continue.")
+            except ValueError:
+                print("Please use a number.")
+                input("Press Enter to continue.")
+    finally:
+        pager.close()
+
 def read_file():
     """Reads and displays the content of a text file from the current directory."""
     filename = input("Enter filename to read: ").strip()
@@ -429,18 +1371,398 @@ def read_file():
     
     if not os.path.exists(filename) or os.path.isdir(filename):
         print("File does not exist or is a directory.")
-        return
+        return 1
     
     try:
-        with open(filename, "r") as f:
-            print(f"\n--- Content of '{filename}' ---")
-            print(f.read())
-            print(f"--- End of file ---")
+        view_file(filename)
     except Exception as e:
         print("Error reading file:", e)
 
+class CountedBuffer:
+    """
+    A byte buffer that knows how many newlines come before every BLOCK-sized block,
+    so counting lines in any range, or finding the n-th newline, only scans one or two blocks.
+    """
+    BLOCK = 4096
+
+    def __init__(self, data):
+        from array import array
+        self.data = data
+        # newlines_before[i] is the number of newlines in data[:i * BLOCK]
+        self.newlines_before = array("q", [0])
+        self.count_blocks()
+
+    def count_blocks(self):
+        """Counts the newlines of every complete block that has not been counted yet."""
+        block = self.BLOCK
+        counts = self.newlines_before
+        while len(counts) * block <= len(self.data):
+            start = (len(counts) - 1) * block
+            counts.append(counts[-1] + self.data[start:start + block].count(b"\n"))
+
+    def append(self, data):
+        """Adds bytes to the end (only for bytearray buffers) and returns where they start."""
+        start = len(self.data)
+        self.data += data
+        self.count_blocks()
+        return start
+
+    def newlines_until(self, position):
+        """Returns the number of newlines in data[:position]."""
+        block = position // self.BLOCK
+        return self.newlines_before[block] + self.data[block * self.BLOCK:position].count(b"\n")
+
+    def find_newline(self, number):
+        """Returns the position of the number-th newline (counting from 1)."""
+        import bisect
+        block = bisect.bisect_left(self.newlines_before, number) - 1
+        position = block * self.BLOCK
+        for _ in range(number - self.newlines_before[block]):
+            position = self.data.find(b"\n", position) + 1
+        return position - 1
+
+class PieceTable:
+    """
+    Text storage for the editor. The file itself is never copied: the text is a list of pieces,
+    each pointing into either the memory-mapped original file or an append-only buffer of added text.
+    Pieces are found by binary search over their running offsets, an edit only splits a piece
+    and splices the list, and undo/redo just put the old pieces back.
+    """
+    ORIGINAL = 0
+    ADDED = 1
+
+    def __init__(self, path=None):
+        import mmap
+        self.file = None
+        original = b""
+        if path and os.path.exists(path) and os.path.getsize(path):
+            self.file = open(path, "rb")
+            original = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffers = [CountedBuffer(original), CountedBuffer(bytearray())]
+        # Each piece is (buffer, start, length, newlines)
+        self.pieces = []
+        if original:
+            self.pieces.append((self.ORIGINAL, 0, len(original), self.buffers[0].newlines_until(len(original))))
+        self.offsets = None
+        self.line_totals = None
+        self.undo_stack = []
+        self.redo_stack = []
+        self.modified = False
+
+    def close(self):
+        if self.file:
+            self.buffers[self.ORIGINAL].data.close()
+            self.file.close()
+            self.file = None
+
+    def make_piece(self, buffer, start, length):
+        counted = self.buffers[buffer]
+        return (buffer, start, length, counted.newlines_until(start + length) - counted.newlines_until(start))
+
+    def index(self):
+        """Returns the running byte offsets and newline totals of the pieces, rebuilding them after an edit."""
+        import itertools
+        if self.offsets is None:
+            self.offsets = list(itertools.accumulate((piece[2] for piece in self.pieces), initial=0))
+            self.line_totals = list(itertools.accumulate((piece[3] for piece in self.pieces), initial=0))
+        return self.offsets, self.line_totals
+
+    def __len__(self):
+        return self.index()[0][-1]
+
+    def split(self, position):
+        """Makes sure a piece starts at position and returns that piece's index."""
+        import bisect
+        offsets, _ = self.index()
+        i = bisect.bisect_right(offsets, position) - 1
+        if i >= len(self.pieces) or offsets[i] == position:
+            return i
+        buffer, start, length, _ = self.pieces[i]
+        cut = position - offsets[i]
+        self.pieces[i:i + 1] = [self.make_piece(buffer, start, cut),
+                                self.make_piece(buffer, start + cut, length - cut)]
+        self.offsets = None
+        return i + 1
+
+    def insert_pieces(self, position, pieces):
+        i = self.split(position)
+        self.pieces[i:i] = pieces
+        self.offsets = None
+
+    def remove_pieces(self, position, length):
+        """Cuts out length bytes at position and returns the removed pieces."""
+        i = self.split(position)
+        j = self.split(position + length)
+        removed = self.pieces[i:j]
+        del self.pieces[i:j]
+        self.offsets = None
+        return removed
+
+    def replace(self, position, length, text):
+        """
+        Replaces length bytes at a byte position with text, as one undoable step.
+        Only the new text is ever encoded; the rest of the file stays as it is.
+        """
+        length = max(min(length, len(self) - position), 0)
+        data = text.encode("utf-8")
+        if not length and not data:
+            return
+        removed = self.remove_pieces(position, length) if length else []
+        inserted = []
+        if data:
+            start = self.buffers[self.ADDED].append(data)
+            inserted = [self.make_piece(self.ADDED, start, len(data))]
+            self.insert_pieces(position, inserted)
+        # An edit is remembered as (position, pieces it removed, pieces it inserted)
+        self.undo_stack.append((position, removed, inserted))
+        self.redo_stack = []
+        self.modified = True
+
+    def insert(self, position, text):
+        self.replace(position, 0, text)
+
+    def delete(self, position, length):
+        self.replace(position, length, "")
+
+    def undo(self, stack_from, stack_to):
+        """Reverts the last edit on stack_from and remembers it on stack_to. Used for both undo and redo."""
+        if not stack_from:
+            return False
+        position, removed, inserted = stack_from.pop()
+        if inserted:
+            self.remove_pieces(position, sum(piece[2] for piece in inserted))
+        if removed:
+            self.insert_pieces(position, removed)
+        stack_to.append((position, inserted, removed))
+        self.modified = True
+        return True
+
+    def line_count(self):
+        _, line_totals = self.index()
+        total = len(self)
+        if total == 0:
+            return 0
+        ends_with_newline = self.read(total - 1, total) == b"\n"
+        return line_totals[-1] + (0 if ends_with_newline else 1)
+
+    def line_start(self, line):
+        """Returns the byte position where a line (counting from 0) starts."""
+        import bisect
+        if line <= 0:
+            return 0
+        offsets, line_totals = self.index()
+        # The piece holding the line-th newline
+        i = bisect.bisect_left(line_totals, line) - 1
+        if i >= len(self.pieces):
+            return len(self)
+        buffer, start, _, _ = self.pieces[i]
+        counted = self.buffers[buffer]
+        newline = counted.find_newline(counted.newlines_until(start) + line - line_totals[i])
+        return offsets[i] + (newline - start) + 1
+
+    def read(self, begin, end):
+        """Returns the bytes between two positions."""
+        import bisect
+        offsets, _ = self.index()
+        chunks = []
+        i = max(bisect.bisect_right(offsets, begin) - 1, 0)
+        while i < len(self.pieces) and offsets[i] < end:
+            buffer, start, length, _ = self.pieces[i]
+            low = max(begin - offsets[i], 0)
+            high = min(end - offsets[i], length)
+            chunks.append(self.buffers[buffer].data[start + low:start + high])
+            i += 1
+        return b"".join(chunks)
+
+    def get_line(self, line):
+        """Returns a line (counting from 0) without its newline."""
+        begin = self.line_start(line)
+        end = self.line_start(line + 1) if line + 1 < self.line_count() else len(self)
+        return self.read(begin, end).rstrip(b"\n").rstrip(b"\r").decode("utf-8", errors="replace")
+
+    def save(self, path):
+        """
+        Writes the text to a temporary file next to path and renames it over path, so a crash
+        never leaves half a file. Unchanged spans are copied straight from the original.
+        """
+        import shutil
+        import tempfile
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(prefix=".minios-save-", dir=folder)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for buffer, start, length, _ in self.pieces:
+                    data = self.buffers[buffer].data
+                    for chunk_start in range(start, start + length, 1024 * 1024):
+                        f.write(data[chunk_start:min(chunk_start + 1024 * 1024, start + length)])
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(path):
+                shutil.copymode(path, temp_path)
+            if os.name == 'nt' and self.file:
+                # Windows can't replace a file that is still mapped, so unmap it first
+                # and map it again if the rename fails, as the pieces still point into it
+                original_path = self.file.name
+                self.close()
+                try:
+                    os.replace(temp_path, path)
+                except OSError:
+                    self.map_original(original_path)
+                    raise
+            else:
+                os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        # Start over from the saved file; the undo history pointed into the old one
+        self.close()
+        self.__init__(path)
+
+    def map_original(self, path):
+        """Maps the original file again after close()."""
+        import mmap
+        self.file = open(path, "rb")
+        self.buffers[self.ORIGINAL] = CountedBuffer(mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ))
+
+def insert_lines(table, line, end_marker="."):
+    """
+    Reads lines typed by the user and inserts them before the given line.
+    A line with only end_marker stops. Returns the number of lines added and whether 'save()' was typed.
+    """
+    added = []
+    saved = False
+    while True:
+        text = input(f"{str(line + len(added) + 1).rjust(6)}+ ")
+        if text == end_marker:
+            break
+        if text.strip() == "save()":
+            saved = True
+            break
+        added.append(text)
+    if added:
+        position = table.line_start(line) if line < table.line_count() else len(table)
+        text = "\n".join(added) + "\n"
+        # Appending to a last line without a newline needs one first
+        if position == len(table) and position > 0 and table.read(position - 1, position) != b"\n":
+            text = "\n" + text
+        table.insert(position, text)
+    return len(added), saved
+
+def text_editor(path, start_typing=False):
+    """
+    A full-screen text editor backed by a piece table.
+    Commands work on line numbers; saving is an atomic write-and-rename.
+    With start_typing, the editor opens in typing mode (used by 'code' for new files).
+    """
+    import shutil
+    table = PieceTable(path)
+    top = 0
+    message = ""
+
+    def save():
+        """Saves the text; returns an error message instead of raising, so a failed save loses nothing."""
+        try:
+            table.save(path)
+        except OSError as e:
+            return f"Could not save '{path}': {e}. Your changes are kept, try 'w' again."
+        print(f"Saved '{path}'.")
+        return None
+
+    try:
+        if start_typing:
+            print(f"Typing into '{path}'. A line with only '.' stops typing, 'save()' saves and exits.")
+            _, saved = insert_lines(table, table.line_count())
+            if saved:
+                message = save()
+                if message is None:
+                    return
+        while True:
+            page_size = max(shutil.get_terminal_size().lines - 6, 5)
+            width = max(shutil.get_terminal_size().columns - 9, 20)
+            total_lines = table.line_count()
+            top = min(max(top, 0), max(total_lines - 1, 0))
+            clear_screen()
+            status = " (modified)" if table.modified else ""
+            print(f"=== MiniOS Editor: {path}{status} === lines {top + 1}-{min(top + page_size, total_lines)} of {total_lines}")
+            for line in range(top, min(top + page_size, total_lines)):
+                print(f"{str(line + 1).rjust(6)}| {table.get_line(line)[:width]}")
+            print("i <n>: type before line n | a: type at end | r <n> <text>: replace | d <n> [count]: delete")
+            print("n/p: page | g <n>: go to line | u: undo | y: redo | w: save | q: quit")
+            if message:
+                print(message)
+                message = ""
+
+            command = input("Edit> ").split(" ", 2)
+            cmd = command[0].strip().lower()
+            try:
+                if cmd in ("q", "exit"):
+                    if table.modified:
+                        answer = input("Save changes first? (yes/no): ").strip().lower()
+                        if answer == "yes":
+                            message = save()
+                            if message:
+                                continue
+                    break
+                elif cmd == "w":
+                    start = time.perf_counter()
+                    message = save() or f"Saved '{path}' in {(time.perf_counter() - start) * 1000:.0f} ms."
+                elif cmd == "n":
+                    top += page_size
+                elif cmd == "p":
+                    top -= page_size
+                elif cmd == "g" and len(command) > 1:
+                    top = int(command[1]) - 1
+                elif cmd == "i" and len(command) > 1:
+                    line = min(max(int(command[1]) - 1, 0), total_lines)
+                    count, saved = insert_lines(table, line)
+                    message = f"Added {count} line{'s' if count != 1 else ''}."
+                    if saved:
+                        message = save()
+                        if message is None:
+                            break
+                elif cmd == "a":
+                    count, saved = insert_lines(table, total_lines)
+                    top = max(total_lines + count - page_size, 0)
+                    message = f"Added {count} line{'s' if count != 1 else ''}."
+                    if saved:
+                        message = save()
+                        if message is None:
+                            break
+                elif cmd == "r" and len(command) > 1:
+                    line = int(command[1]) - 1
+                    if not 0 <= line < total_lines:
+                        message = "No such line."
+                        continue
+                    begin = table.line_start(line)
+                    end = table.line_start(line + 1) if line + 1 < total_lines else len(table)
+                    old = table.read(begin, end)
+                    # Keep the line break, replace only the text
+                    line_break = len(old) - len(old.rstrip(b"\r\n"))
+                    table.replace(begin, end - begin - line_break, command[2] if len(command) > 2 else "")
+                elif cmd == "d" and len(command) > 1:
+                    line = int(command[1]) - 1
+                    count = int(command[2]) if len(command) > 2 else 1
+                    if not 0 <= line < total_lines:
+                        message = "No such line."
+                        continue
+                    begin = table.line_start(line)
+                    end = table.line_start(line + count) if line + count < total_lines else len(table)
+                    table.delete(begin, end - begin)
+                    message = f"Deleted {min(count, total_lines - line)} line(s)."
+                elif cmd == "u":
+                    message = "Undone." if table.undo(table.undo_stack, table.redo_stack) else "Nothing to undo."
+                elif cmd == "y":
+                    message = "Redone." if table.undo(table.redo_stack, table.undo_stack) else "Nothing to redo."
+                else:
+                    message = "Unknown command."
+            except ValueError:
+                message = "Please use line numbers."
+    finally:
+        table.close()
+
 def edit_file():
-    """Overwrites an existing file with new content in the current directory."""
+    """Opens an existing file from the current directory in the text editor."""
     filename = input("Enter filename to edit: ").strip()
     if not filename:
         print("No filename entered.")
@@ -448,41 +1770,660 @@ def edit_file():
 
     if not os.path.exists(filename) or os.path.isdir(filename):
         print("File does not exist or is a directory.")
-        return
+        return 1
     
-    print(f"Editing '{filename}'. Press Enter to save and exit.")
-    new_content = input("Enter new content:\n")
     try:
-        with open(filename, "w") as f:
-            f.write(new_content)
-        print(f"File '{filename}' updated successfully.")
+        text_editor(filename)
     except Exception as e:
-        print("Error writing to file:", e)
+        print("Error editing file:", e)
+        return 1
+
+def zygote_main(profile):
+    """
+    Runs a warm interpreter (started with 'minios.py --zygote PROFILE').
+    It imports the modules of its profile once, then forks a child for every script MiniOS sends it,
+    so each script runs isolated in its own process without paying for interpreter startup.
+    Requests arrive on the socket passed in as stdin, together with the script's stdin, stdout and stderr.
+    When a child exits, its exit status and resource usage are sent back.
+    """
+    import json
+    import select
+    import signal
+    import socket
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    for module in INTERPRETER_PRELOADS.get(profile, []):
+        try:
+            __import__(module)
+        except Exception:
+            pass
+    import gc
+    import pkgutil  # runpy.run_path imports it on first use
+    import runpy
+    import traceback
+    # Keep the preloaded objects out of the garbage collector, so the children do not copy their memory
+    gc.freeze()
+
+    # Move the socket off fd 0 so the children can put the script's stdin there
+    conn = socket.socket(fileno=os.dup(0))
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+
+    # Ctrl+C is meant for the scripts (they share the terminal), not for the warm interpreter
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    signal.set_wakeup_fd(wake_w)
+    maxrss_unit = 1 if sys.platform == "darwin" else 1024
+
+    while True:
+        ready, _, _ = select.select([conn, wake_r], [], [])
+        if wake_r in ready:
+            try:
+                os.read(wake_r, 512)
+            except BlockingIOError:
+                pass
+            while True:
+                try:
+                    pid, status, usage = os.wait4(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+                conn.send(json.dumps({"exit": pid, "status": os.waitstatus_to_exitcode(status),
+                                      "user": usage.ru_utime, "sys": usage.ru_stime,
+                                      "maxrss": usage.ru_maxrss * maxrss_unit}).encode())
+        if conn not in ready:
+            continue
+
+        try:
+            data, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+        except OSError:
+            break
+        if not data:
+            # MiniOS has exited
+            break
+        request = json.loads(data)
+        try:
+            pid = os.fork()
+        except OSError as e:
+            for fd in fds:
+                os.close(fd)
+            conn.send(json.dumps({"error": str(e)}).encode())
+            continue
+
+        if pid == 0:
+            status = 1
+            try:
+                signal.set_wakeup_fd(-1)
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.default_int_handler)
+                conn.close()
+                os.close(wake_r)
+                os.close(wake_w)
+                if request.get("new_group"):
+                    os.setpgid(0, 0)
+                for target, fd in enumerate(fds):
+                    os.dup2(fd, target)
+                    os.close(fd)
+                # Print line by line as on a terminal, so output sent into a pipe can be shown live
+                sys.stdout.reconfigure(line_buffering=True)
+
+                path = request["path"]
+                os.chdir(request["cwd"])
+                sys.argv = [path] + request["args"]
+                sys.path[0] = os.path.dirname(path)
+                try:
+                    runpy.run_path(path, run_name="__main__")
+                    status = 0
+                except SystemExit as e:
+                    if e.code is None or isinstance(e.code, int):
+                        status = e.code or 0
+                    else:
+                        print(e.code, file=sys.stderr)
+                except BaseException as e:
+                    # Show the traceback from the script's own frames, like a normal interpreter
+                    tb = e.__traceback__
+                    while tb is not None and tb.tb_frame.f_code.co_filename != path:
+                        tb = tb.tb_next
+                    traceback.print_exception(type(e), e, tb)
+            finally:
+                try:
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                finally:
+                    os._exit(status)
+
+        for fd in fds:
+            os.close(fd)
+        conn.send(json.dumps({"pid": pid}).encode())
+
+class InterpreterPool:
+    """
+    MiniOS's side of a warm interpreter (see zygote_main).
+    A reader thread collects the replies, so several scripts can run from one warm interpreter at once.
+    """
+    def __init__(self, profile):
+        import collections
+        import socket
+        import subprocess
+        import threading
+        self.profile = profile
+        self.conn, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        with theirs:
+            self.process = subprocess.Popen([sys.executable, MINIOS_PATH, "--zygote", profile], stdin=theirs)
+        self.send_lock = threading.Lock()
+        self.changed = threading.Condition()
+        self.replies = collections.deque()
+        self.exits = {}
+        self.alive = True
+        threading.Thread(target=self.read_messages, daemon=True).start()
+
+    def read_messages(self):
+        """Sorts the messages from the warm interpreter into spawn replies and child exits."""
+        import json
+        while True:
+            try:
+                data = self.conn.recv(65536)
+            except OSError:
+                data = b""
+            with self.changed:
+                if not data:
+                    self.alive = False
+                    self.changed.notify_all()
+                    return
+                message = json.loads(data)
+                if "exit" in message:
+                    self.exits[message["exit"]] = message
+                else:
+                    self.replies.append(message)
+                self.changed.notify_all()
+
+    def spawn(self, path, args, cwd, fds, new_group=False):
+        """
+        Starts a script with the given stdin, stdout and stderr file descriptors. Returns its pid.
+        With new_group the script gets its own process group, like a background job in a shell.
+        """
+        import json
+        import socket
+        request = json.dumps({"path": path, "args": list(args), "cwd": cwd, "new_group": new_group}).encode()
+        with self.send_lock:
+            if not self.alive:
+                raise OSError("the warm interpreter has stopped")
+            socket.send_fds(self.conn, [request], list(fds))
+            with self.changed:
+                while not self.replies and self.alive:
+                    self.changed.wait()
+                if not self.replies:
+                    raise OSError("the warm interpreter has stopped")
+                reply = self.replies.popleft()
+        if "error" in reply:
+            raise OSError(reply["error"])
+        return reply["pid"]
+
+    def poll(self, pid):
+        """Returns the exit message of a script, or None if it is still running."""
+        with self.changed:
+            if pid in self.exits or self.alive:
+                return self.exits.get(pid)
+            return {"exit": pid, "status": None, "user": None, "sys": None, "maxrss": None}
+
+    def wait(self, pid):
+        """Waits for a script to exit and returns its exit message."""
+        with self.changed:
+            while pid not in self.exits and self.alive:
+                self.changed.wait()
+        return self.poll(pid)
+
+def get_interpreter_pool(profile):
+    """
+    Returns the warm interpreter for a profile, starting it the first time.
+    Returns None on systems without fork() and fd passing (like Windows).
+    """
+    import socket
+    if not (hasattr(os, "fork") and hasattr(socket, "send_fds") and hasattr(socket, "SOCK_SEQPACKET")):
+        return None
+    with interpreter_pools_lock:
+        pool = interpreter_pools.get(profile)
+        if pool is None or not pool.alive:
+            try:
+                pool = InterpreterPool(profile)
+            except OSError:
+                return None
+            interpreter_pools[profile] = pool
+        return pool
+
+class ScriptProcess:
+    """A Python script started by start_python_script, in a warm interpreter or a new one."""
+    def __init__(self, pid, pool=None, popen=None):
+        self.pid = pid
+        self.pool = pool
+        self.popen = popen
+        self.result = None
+
+    def make_result(self, status, usage=None):
+        """Stores the exit status and resource usage of a script that ended without a warm interpreter."""
+        maxrss_unit = 1 if sys.platform == "darwin" else 1024
+        self.result = {"exit": self.pid, "status": status,
+                       "user": usage.ru_utime if usage else None,
+                       "sys": usage.ru_stime if usage else None,
+                       "maxrss": usage.ru_maxrss * maxrss_unit if usage else None}
+        return self.result
+
+    def poll(self):
+        """Returns the result (exit status, 'user'/'sys' CPU seconds, peak 'maxrss' bytes) or None if still running."""
+        if self.result is None:
+            if self.pool is not None:
+                self.result = self.pool.poll(self.pid)
+            elif hasattr(os, "wait4"):
+                try:
+                    pid, status, usage = os.wait4(self.pid, os.WNOHANG)
+                except ChildProcessError:
+                    # Another thread is waiting for it and will store the result
+                    return None
+                if pid:
+                    self.popen.returncode = os.waitstatus_to_exitcode(status)
+                    self.make_result(self.popen.returncode, usage)
+            elif self.popen.poll() is not None:
+                self.make_result(self.popen.returncode)
+        return self.result
+
+    def wait(self):
+        """Waits for the script to exit and returns its result (see poll)."""
+        if self.result is None:
+            if self.pool is not None:
+                self.result = self.pool.wait(self.pid)
+            elif hasattr(os, "wait4"):
+                _, status, usage = os.wait4(self.pid, 0)
+                self.popen.returncode = os.waitstatus_to_exitcode(status)
+                self.make_result(self.popen.returncode, usage)
+            else:
+                self.make_result(self.popen.wait())
+        return self.result
+
+def start_python_script(path, args=(), profile="run", cwd=None, fds=(0, 1, 2)):
+    """
+    Starts a Python script with the given stdin, stdout and stderr file descriptors.
+    It runs in a fresh child of the warm interpreter for the profile (see INTERPRETER_PRELOADS),
+    or in a new interpreter where warm interpreters are not available.
+    """
+    import subprocess
+    path = os.path.abspath(path)
+    cwd = cwd or os.getcwd()
+    # Anything MiniOS printed so far must come out before the script's output
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    job = current_job()
+    devnull = None
+    if job is not None:
+        if job.state == "killed":
+            raise KeyboardInterrupt
+        # Background jobs get no terminal input and their own process group,
+        # so Ctrl+C at the prompt does not reach them and 'kill' stops everything they started
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        fds = (devnull, fds[1], fds[2])
+    try:
+        script = None
+        pool = get_interpreter_pool(profile)
+        if pool is not None:
+            try:
+                script = ScriptProcess(pool.spawn(path, args, cwd, fds, new_group=job is not None), pool=pool)
+            except OSError:
+                pass
+        if script is None:
+            popen = subprocess.Popen([sys.executable, path, *args], cwd=cwd,
+                                     stdin=fds[0], stdout=fds[1], stderr=fds[2],
+                                     env=dict(os.environ, PYTHONUNBUFFERED="1"),
+                                     start_new_session=job is not None)
+            script = ScriptProcess(popen.pid, popen=popen)
+    finally:
+        if devnull is not None:
+            os.close(devnull)
+    if job is not None:
+        job.scripts.append(script)
+        if job.state == "killed":
+            # 'kill' came while the script was starting
+            stop_job_scripts(job)
+    return script
+
+def run_python_script(path, args=(), profile="run", cwd=None, fds=(0, 1, 2)):
+    """Runs a Python script (see start_python_script), waits for it and returns its result."""
+    script = start_python_script(path, args, profile, cwd, fds)
+    while True:
+        try:
+            return script.wait()
+        except KeyboardInterrupt:
+            # The script got the Ctrl+C as well; let it finish handling it
+            continue
+
+class OutputTail:
+    """Keeps the last bytes written to it in a fixed-size ring buffer, however much is written."""
+    def __init__(self, capacity=RUN_OUTPUT_TAIL):
+        self.buffer = bytearray(capacity)
+        self.total = 0
+
+    def write(self, data):
+        """Adds data, overwriting the oldest bytes once the buffer is full."""
+        capacity = len(self.buffer)
+        size = len(data)
+        data = memoryview(data)[-capacity:]
+        position = (self.total + size - len(data)) % capacity
+        first = min(len(data), capacity - position)
+        self.buffer[position:position + first] = data[:first]
+        self.buffer[:len(data) - first] = data[first:]
+        self.total += size
+
+    def getvalue(self):
+        """Returns the kept bytes, oldest first."""
+        if self.total <= len(self.buffer):
+            return bytes(self.buffer[:self.total])
+        position = self.total % len(self.buffer)
+        return bytes(self.buffer[position:] + self.buffer[:position])
+
+    def last_line(self):
+        """Returns the last non-empty line of the kept output as text."""
+        lines = self.getvalue().decode(errors="replace").strip().splitlines()
+        return lines[-1] if lines else ""
+
+def stream_python_script(path, args=(), profile="run", cwd=None, echo=True):
+    """
+    Runs a Python script (see start_python_script) with its stdout and stderr connected to pipes.
+    The pipes are read without blocking and copied to MiniOS's own output as the data arrives,
+    so nothing waits for the script to finish and memory use does not grow with the output:
+    only the last RUN_OUTPUT_TAIL bytes of each stream are kept.
+    Returns the script's result with its 'wall' time added, and the stdout and stderr tails.
+    """
+    import codecs
+    import selectors
+    start = time.perf_counter()
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    try:
+        script = start_python_script(path, args, profile, cwd, (0, out_w, err_w))
+    except BaseException:
+        os.close(out_r)
+        os.close(err_r)
+        raise
+    finally:
+        os.close(out_w)
+        os.close(err_w)
 
-def run_file():
-    """Executes a Python (.py) file in the current directory."""
-    filename = input("Enter filename to run: ").strip()
+    tails = (OutputTail(), OutputTail())
+    streams = {out_r: (sys.stdout, tails[0]), err_r: (sys.stderr, tails[1])}
+    decoders = {fd: codecs.getincrementaldecoder("utf-8")(errors="replace") for fd in streams}
+    selector = selectors.DefaultSelector()
+    for fd in streams:
+        os.set_blocking(fd, False)
+        selector.register(fd, selectors.EVENT_READ)
+
+    try:
+        while selector.get_map():
+            try:
+                events = selector.select()
+            except KeyboardInterrupt:
+                # The script got the Ctrl+C as well; keep showing what it prints while it stops
+                continue
+            for key, _ in events:
+                try:
+                    chunk = os.read(key.fd, 65536)
+                except BlockingIOError:
+                    continue
+                output, tail = streams[key.fd]
+                if not chunk:
+                    selector.unregister(key.fd)
+                    os.close(key.fd)
+                    continue
+                tail.write(chunk)
+                if echo:
+                    output.write(decoders[key.fd].decode(chunk))
+                    output.flush()
+    finally:
+        for key in list(selector.get_map().values()):
+            os.close(key.fd)
+        selector.close()
+
+    while True:
+        try:
+            result = dict(script.wait())
+            break
+        except KeyboardInterrupt:
+            continue
+    result["wall"] = time.perf_counter() - start
+    return result, tails[0], tails[1]
+
+def format_resource_usage(result):
+    """Returns a one-line summary of the wall time, CPU time and peak memory of a finished script."""
+    parts = [f"wall {result['wall'] * 1000:.1f} ms"]
+    if result.get("user") is not None:
+        parts.append(f"user {result['user'] * 1000:.1f} ms")
+        parts.append(f"sys {result['sys'] * 1000:.1f} ms")
+    if result.get("maxrss") is not None:
+        parts.append(f"peak RSS {format_size(result['maxrss'])}")
+    return " | ".join(parts)
+
+def run_file(filename=None):
+    """Executes a Python (.py) file in the current directory, asking for its name if none is given."""
+    if filename is None:
+        filename = input("Enter filename to run: ")
+    filename = filename.strip()
     if not filename:
         print("No filename entered.")
-        return
+        return 1
     if not filename.endswith('.py'):
         print("Can only run Python (.py) files.")
-        return
+        return 1
+    if not os.path.isfile(filename):
+        print("File does not exist.")
+        return 1
 
     try:
         print(f"\n--- Running '{filename}' ---")
-        # Use subprocess to run the file with the same Python interpreter
-        result = subprocess.run([sys.executable, filename], capture_output=True, text=True, check=True)
-        print(result.stdout)
-        print(f"--- Finished running '{filename}' ---")
-    except subprocess.CalledProcessError as e:
-        print(f"\nError while running '{filename}':")
-        print(e.stderr)
+        result, _, errors = stream_python_script(filename)
+        if result["status"] == 0:
+            print(f"--- Finished running '{filename}' ---")
+        else:
+            print(f"\nError while running '{filename}' (exit status {result['status']}): {errors.last_line()}")
+        print(f"Resources: {format_resource_usage(result)}")
+        return result["status"] or None
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+        return 1
+
+def trash_path(*names):
+    """Returns a path inside the trash folder (minios_data/.trash), creating its 'files' and 'info' folders."""
+    root = os.path.join(get_data_root(), TRASH_FOLDER)
+    for sub in ["files", "info", "purge"]:
+        os.makedirs(os.path.join(root, sub), exist_ok=True)
+    return os.path.join(root, *names)
+
+def read_trash_info(item_id):
+    """Returns the saved information about a trashed item, or None if it is gone."""
+    import json
+    try:
+        with open(trash_path("info", item_id + ".json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_trash_info(item_id, info):
+    """Saves the information about a trashed item."""
+    import json
+    temp_path = trash_path("info", item_id + ".json.tmp")
+    with open(temp_path, "w") as f:
+        json.dump(info, f)
+    os.replace(temp_path, trash_path("info", item_id + ".json"))
+
+def list_trash():
+    """Returns (id, info) for every item in the trash, oldest first."""
+    items = []
+    for name, _ in list_directory(trash_path("info")):
+        if name.endswith(".json"):
+            info = read_trash_info(name[:-5])
+            if info:
+                items.append((name[:-5], info))
+    items.sort(key=lambda item: item[1]["deleted"])
+    return items
+
+def move_to_trash(path):
+    """
+    Moves a file or folder into the trash with a single rename, however big it is.
+    Returns the trash id, or None if the path is on another drive and can't be renamed into the trash.
+    """
+    global trash_counter
+    import errno
+    path = os.path.abspath(path)
+    with trash_lock:
+        trash_counter += 1
+        item_id = f"{time.time_ns() // 1000:x}{trash_counter}"
+        try:
+            os.rename(path, trash_path("files", item_id))
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                return None
+            raise
+        write_trash_info(item_id, {"original": path, "deleted": time.time(), "size": None})
+    start_trash_worker()
+    return item_id
+
+def restore_from_trash(item_id):
+    """Moves a trashed item back to where it came from. Returns the restored path."""
+    with trash_lock:
+        info = read_trash_info(item_id)
+        if not info or not os.path.lexists(trash_path("files", item_id)):
+            raise FileNotFoundError(f"No item '{item_id}' in the trash.")
+        original = info["original"]
+        if os.path.lexists(original):
+            raise FileExistsError(f"'{original}' already exists. Rename it first.")
+        os.makedirs(os.path.dirname(original), exist_ok=True)
+        os.rename(trash_path("files", item_id), original)
+        os.remove(trash_path("info", item_id + ".json"))
+    return original
+
+def send_to_purge(item_id):
+    """Takes an item out of the trash listing and hands it to the purge worker. Call with trash_lock held."""
+    if os.path.lexists(trash_path("files", item_id)):
+        os.rename(trash_path("files", item_id), trash_path("purge", item_id))
+    try:
+        os.remove(trash_path("info", item_id + ".json"))
+    except FileNotFoundError:
+        pass
+
+def path_size(path):
+    """Returns the total size of a file, or of all files in a folder."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        total = 0
+        for entry in walk_entries(path):
+            try:
+                total += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+        return total
+    return os.lstat(path).st_size
+
+def apply_trash_policy():
+    """Measures new trash items and sends those that are too old, or over the size limit, to be purged."""
+    now = time.time()
+    items = list_trash()
+    total = 0
+    for item_id, info in items:
+        if info["size"] is None:
+            try:
+                info["size"] = path_size(trash_path("files", item_id))
+            except OSError:
+                info["size"] = 0
+            with trash_lock:
+                if read_trash_info(item_id):
+                    write_trash_info(item_id, info)
+        total += info["size"]
+
+    with trash_lock:
+        # Oldest items go first
+        for item_id, info in items:
+            if now - info["deleted"] > TRASH_MAX_AGE or total > TRASH_MAX_SIZE:
+                send_to_purge(item_id)
+                total -= info["size"]
+
+def purge_trash():
+    """Permanently deletes everything that was sent to be purged."""
+    import shutil
+    for name, is_dir in list_directory(trash_path("purge")):
+        path = trash_path("purge", name)
+        try:
+            if is_dir and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError:
+            pass
+
+def trash_worker():
+    """Background thread that keeps the trash within its age and size limits and does the slow deleting."""
+    while True:
+        # Cleared before the round, so a wakeup that arrives while it runs starts another round
+        trash_wakeup.clear()
+        try:
+            apply_trash_policy()
+            purge_trash()
+        except Exception:
+            # The next round tries again
+            pass
+        trash_wakeup.wait(TRASH_CHECK_INTERVAL)
+
+def start_trash_worker():
+    """Starts the trash worker thread if it is not running yet."""
+    global trash_worker_thread, trash_wakeup
+    import threading
+    with trash_lock:
+        if trash_worker_thread is None:
+            trash_wakeup = threading.Event()
+            trash_worker_thread = threading.Thread(target=trash_worker, name="trash-worker", daemon=True)
+            trash_worker_thread.start()
+
+def resume_trash_worker():
+    """Starts the trash worker at startup if there is a trash, so unfinished purges are completed."""
+    if os.path.isdir(os.path.join(get_data_root(), TRASH_FOLDER)):
+        start_trash_worker()
+
+def trash_command(arg=None):
+    """Lists, restores or empties the trash."""
+    words = (arg or "list").split()
+    subcommand = words[0].lower()
+
+    if subcommand == "list":
+        items = list_trash()
+        if not items:
+            print("[Trash is empty]")
+            return
+        import datetime
+        for item_id, info in items:
+            deleted = datetime.datetime.fromtimestamp(info["deleted"]).strftime('%Y-%m-%d %H:%M')
+            size = format_size(info["size"]) if info["size"] is not None else "..."
+            print(f"{item_id}  {deleted}  {size.rjust(9)}  {info['original']}")
+        print(f"\n{len(items)} item{'s' if len(items) != 1 else ''}. Use 'trash restore <id>' to undo a delete.")
+    elif subcommand == "restore":
+        if len(words) < 2:
+            raise UsageError("Usage: trash restore <id>")
+        try:
+            print(f"Restored '{restore_from_trash(words[1])}'.")
+        except (FileNotFoundError, FileExistsError) as e:
+            print(f"Error: {e}")
+            return 1
+    elif subcommand == "empty":
+        with trash_lock:
+            items = list_trash()
+            for item_id, _ in items:
+                send_to_purge(item_id)
+        start_trash_worker()
+        trash_wakeup.set()
+        print(f"Emptied the trash ({len(items)} item{'s' if len(items) != 1 else ''}), deleting in the background.")
+    else:
+        raise UsageError("Usage: trash [list | restore <id> | empty]")
 
 def delete_file():
-    """Deletes a file from the current directory."""
+    """Moves a file from the current directory to the trash."""
     filename = input("Enter filename to delete: ").strip()
     if not filename:
         print("No filename entered.")
@@ -490,16 +2431,26 @@ def delete_file():
 
     if not os.path.exists(filename) or os.path.isdir(filename):
         print("File does not exist or is a directory.")
-        return
+        return 1
     
     try:
-        os.remove(filename)
-        print(f"File '{filename}' deleted.")
+        item_id = move_to_trash(filename)
+        if item_id:
+            print(f"File '{filename}' moved to the trash. Undo with 'trash restore {item_id}'.")
+            return
+        print(f"'{filename}' is on another drive than the trash and can't be undone.")
+        confirm = input("Delete it permanently? (yes/no): ").strip().lower()
+        if confirm == 'yes':
+            os.remove(filename)
+            print(f"File '{filename}' deleted.")
+        else:
+            print("Deletion cancelled.")
     except Exception as e:
         print("Error deleting file:", e)
 
 def delete_folder():
-    """Deletes a folder and all its contents with a confirmation."""
+    """Moves a folder and all its contents to the trash with a confirmation."""
+    import shutil
     foldername = input("Enter folder name to delete: ").strip()
     if not foldername:
         print("No folder name entered.")
@@ -507,16 +2458,28 @@ def delete_folder():
     
     if not os.path.exists(foldername) or not os.path.isdir(foldername):
         print("Folder does not exist.")
-        return
+        return 1
+    
+    # MiniOS's own folders, and any folder that contains them
+    root = os.path.realpath(get_data_root())
+    target = os.path.realpath(foldername)
+    protected = [root, os.path.join(root, TRASH_FOLDER), os.path.join(root, STATE_FOLDER)]
+    if any(path == target or path.startswith(target + os.sep) for path in protected):
+        print("This folder can't be deleted.")
+        return 1
     
-    print(f"WARNING: This will permanently delete the folder '{foldername}' and all its contents.")
+    print(f"WARNING: This will delete the folder '{foldername}' and all its contents.")
     confirm = input("Are you sure? (yes/no): ").strip().lower()
     
     if confirm == 'yes':
         try:
-            # shutil.rmtree is used for deleting non-empty directories
-            shutil.rmtree(foldername)
-            print(f"Folder '{foldername}' deleted.")
+            item_id = move_to_trash(foldername)
+            if item_id:
+                print(f"Folder '{foldername}' moved to the trash. Undo with 'trash restore {item_id}'.")
+            else:
+                # The trash is on another drive, so the folder has to be deleted for real
+                shutil.rmtree(foldername)
+                print(f"Folder '{foldername}' deleted.")
         except Exception as e:
             print(f"Error deleting folder: {e}")
     else:
@@ -531,7 +2494,7 @@ def rename_item():
 
     if not os.path.exists(old_name):
         print("File or folder does not exist.")
-        return
+        return 1
     
     new_name = input("Enter new name: ").strip()
     if not new_name:
@@ -543,224 +2506,1118 @@ def rename_item():
         print(f"'{old_name}' renamed to '{new_name}'.")
     except Exception as e:
         print("Error renaming:", e)
+        return 1
 
 def change_directory(path):
-    """Changes the current working directory."""
+    """
+    Changes the current working directory.
+    Background jobs share the folder with the prompt, so it can't change while any of them runs:
+    their relative paths would suddenly point somewhere else.
+    """
+    running = [job for job in job_table.values() if job.thread.is_alive()]
+    if current_job() or running:
+        print("cd: background jobs are running in this folder; wait for them ('fg') or stop them ('kill') first.")
+        return 1
     try:
         os.chdir(path)
         print(f"Changed directory to '{os.getcwd()}'.")
     except FileNotFoundError:
         print("Error: Directory not found.")
+        return 1
     except PermissionError:
         print("Error: Permission denied.")
+        return 1
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+        return 1
 
-def manage_todo():
-    """Manages a simple to-do list stored in a text file."""
-    todo_file = "todo.txt"
-    if not os.path.exists(todo_file):
-        with open(todo_file, "w") as f:
-            f.write("")
-
-    while True:
-        print("\n=== To-Do List ===")
-        try:
-            with open(todo_file, "r") as f:
-                tasks = [line.strip() for line in f if line.strip()]
-        except Exception as e:
-            print("Error reading to-do list:", e)
-            tasks = []
+def parse_due_date(text):
+    """Turns 'today', 'tomorrow', '+N' (days from now) or 'YYYY-MM-DD' into a 'YYYY-MM-DD' string."""
+    import datetime
+    today = datetime.date.today()
+    if text == "today":
+        return today.isoformat()
+    if text == "tomorrow":
+        return (today + datetime.timedelta(days=1)).isoformat()
+    if text.startswith("+") and text[1:].isdigit():
+        return (today + datetime.timedelta(days=int(text[1:]))).isoformat()
+    try:
+        return datetime.date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise ValueError(f"'{text}' is not a date. Use YYYY-MM-DD, today, tomorrow or +N.") from None
 
-        if not tasks:
-            print("[Empty to-do list]")
-        else:
-            for i, task in enumerate(tasks):
-                print(f"{i+1}. {task}")
-        
-        print("\nOptions: add <task>, remove <number>, exit")
-        command = input("Todo> ").strip().split(' ', 1)
-        cmd = command[0].lower()
-        
-        if cmd == "exit":
-            break
-        elif cmd == "add" and len(command) > 1:
-            with open(todo_file, "a") as f:
-                f.write(command[1] + "\n")
-            print("Task added.")
-        elif cmd == "remove" and len(command) > 1:
-            try:
-                task_num = int(command[1]) - 1
-                if 0 <= task_num < len(tasks):
-                    tasks.pop(task_num)
-                    with open(todo_file, "w") as f:
-                        for task in tasks:
-                            f.write(task + "\n")
-                    print("Task removed.")
-                else:
-                    print("Invalid task number.")
-            except ValueError:
-                print("Invalid number format.")
+def parse_task_text(text):
+    """
+    Splits a task into (text, priority, due date, tags).
+    '!N' sets the priority (0-9, higher first), 'due:DATE' the due date and '#word' adds a tag.
+    """
+    words = []
+    priority = 0
+    due = None
+    tags = []
+    for word in text.split():
+        if len(word) == 2 and word[0] == "!" and word[1].isdigit():
+            priority = int(word[1])
+        elif word.startswith("due:") and len(word) > 4:
+            due = parse_due_date(word[4:])
+        elif word.startswith("#") and len(word) > 1:
+            tags.append(word[1:].lower())
         else:
-            print("Unknown command.")
+            words.append(word)
+    return " ".join(words), priority, due, sorted(set(tags))
+
+def open_todo_store():
+    """
+    Opens (and if needed creates) the to-do database in minios_data/.minios.
+    Every operation on a single task is an index lookup, so it costs the same with 10 or 100,000 tasks.
+    """
+    import sqlite3
+    db = sqlite3.connect(state_path("todo.db"))
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("PRAGMA foreign_keys=ON")
+    db.execute("CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY, text TEXT NOT NULL, "
+               "priority INTEGER NOT NULL DEFAULT 0, due TEXT, done INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL)")
+    # The list is shown highest priority first, so every page is one range scan of this index
+    db.execute("CREATE INDEX IF NOT EXISTS tasks_by_priority ON tasks (done, priority DESC, id)")
+    db.execute("CREATE INDEX IF NOT EXISTS tasks_by_due ON tasks (done, due, id) WHERE due IS NOT NULL")
+    db.execute("CREATE TABLE IF NOT EXISTS task_tags (tag TEXT NOT NULL, "
+               "task_id INTEGER NOT NULL REFERENCES tasks (id) ON DELETE CASCADE, "
+               "PRIMARY KEY (tag, task_id)) WITHOUT ROWID")
+    db.execute("CREATE INDEX IF NOT EXISTS task_tags_by_task ON task_tags (task_id)")
+    db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    import_todo_txt(db)
+    return db
 
-def show_pc_info():
-    """Displays real-time system information (CPU, RAM, GPU, Storage) using psutil, gputil, and shutil."""
-    print("=== PC Information (Live Monitor) ===")
-    print("Press Ctrl+C to exit.\n")
+def import_todo_txt(db):
+    """Copies the tasks of the old todo.txt (one task per line) into the database, once."""
+    if db.execute("SELECT 1 FROM meta WHERE key = 'imported_todo_txt'").fetchone():
+        return
+    old_file = os.path.join(get_data_root(), "todo.txt")
+    count = 0
+    with db:
+        if os.path.exists(old_file):
+            with open(old_file, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        add_task(db, line.strip(), commit=False)
+                    except ValueError as e:
+                        # Old tasks were free text, so markers like 'due:friday' may not parse
+                        print(f"Imported '{line.strip()}' as plain text: {e}")
+                        db.execute("INSERT INTO tasks (text, created) VALUES (?, ?)", (line.strip(), time.time()))
+                    count += 1
+        db.execute("INSERT INTO meta VALUES ('imported_todo_txt', ?)", (old_file,))
+    if count:
+        print(f"Imported {count} task{'s' if count != 1 else ''} from todo.txt (the file is no longer used).")
+
+def add_task(db, text, commit=True):
+    """Adds a task (see parse_task_text for the markers it understands) and returns its id."""
+    text, priority, due, tags = parse_task_text(text)
+    if not text:
+        raise ValueError("The task has no text.")
+
+    def insert():
+        task_id = db.execute("INSERT INTO tasks (text, priority, due, created) VALUES (?, ?, ?, ?)",
+                             (text, priority, due, time.time())).lastrowid
+        db.executemany("INSERT INTO task_tags VALUES (?, ?)", [(tag, task_id) for tag in tags])
+        return task_id
+    if not commit:
+        return insert()
+    with db:
+        return insert()
+
+# Ways to list tasks: (condition, sort columns, keyset condition for the page after a given row)
+TODO_VIEWS = {
+    "open": ("t.done = 0", "t.priority DESC, t.id", "(t.priority < ? OR (t.priority = ? AND t.id > ?))"),
+    "done": ("t.done = 1", "t.priority DESC, t.id", "(t.priority < ? OR (t.priority = ? AND t.id > ?))"),
+    "all": ("1", "t.done, t.priority DESC, t.id",
+            "(t.done > ? OR (t.done = ? AND (t.priority < ? OR (t.priority = ? AND t.id > ?))))"),
+    "due": ("t.done = 0 AND t.due IS NOT NULL", "t.due, t.id", "(t.due > ? OR (t.due = ? AND t.id > ?))"),
+}
+
+def fetch_task_page(db, view, tag, after, page_size):
+    """
+    Returns one page of tasks as rows of (id, text, priority, due, done, tags).
+    Pages continue from the sort key of the last row shown (keyset paging), so later pages
+    are as fast as the first one instead of skipping over all earlier rows.
+    """
+    condition, order, after_condition = TODO_VIEWS[view]
+    sql = "SELECT t.id, t.text, t.priority, t.due, t.done FROM tasks t"
+    params = []
+    if tag:
+        sql += " JOIN task_tags g ON g.task_id = t.id AND g.tag = ?"
+        params.append(tag)
+    sql += f" WHERE {condition}"
+    if after is not None:
+        sql += f" AND {after_condition}"
+        params.extend(task_page_key(view, after))
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(page_size)
+    rows = db.execute(sql, params).fetchall()
+    result = []
+    for row in rows:
+        tags = [tag for (tag,) in db.execute("SELECT tag FROM task_tags WHERE task_id = ?", (row[0],))]
+        result.append(row + (tags,))
+    return result
+
+def task_page_key(view, row):
+    """Returns the parameters of the keyset condition of a view for the row a page ends with."""
+    task_id, _, priority, due, done = row[:5]
+    if view == "all":
+        return [done, done, priority, priority, task_id]
+    if view == "due":
+        return [due, due, task_id]
+    return [priority, priority, task_id]
+
+def format_task(row, today):
+    """Returns one task as a line of the to-do list."""
+    task_id, text, priority, due, done, tags = row
+    line = f"{task_id:>6}. {'[x]' if done else '[ ]'} "
+    if priority:
+        line += f"!{priority} "
+    line += text
+    if due:
+        line += f"  (due {due}{', OVERDUE' if not done and due < today else ''})"
+    if tags:
+        line += "  " + " ".join("#" + tag for tag in tags)
+    return line
+
+def manage_todo():
+    """Manages a to-do list with priorities, due dates and tags, stored in a database."""
+    import datetime
+    db = open_todo_store()
+    view = "open"
+    tag = None
+    # Rows each shown page started after, so 'p' can go back
+    page_starts = [None]
+    # Counted once here and then kept up to date, so no loop iteration scans the whole table
+    open_count, total = db.execute("SELECT COUNT(*) - COALESCE(SUM(done), 0), COUNT(*) FROM tasks").fetchone()
     try:
         while True:
-            clear_screen()
-            print("=== PC Information (Live Monitor) ===")
-            print("Press Ctrl+C to exit.\n")
-
-            # CPU and System RAM Info
-            if PSUTIL_INSTALLED:
-                print(f"CPU: {platform.processor()}")
-                print(f"  - Physical Cores: {psutil.cpu_count(logical=False)}")
-                print(f"  - Threads: {psutil.cpu_count(logical=True)}")
-                print(f"  - Usage: {psutil.cpu_percent()}%")
-                
-                mem = psutil.virtual_memory()
-                print("\nSystem RAM:")
-                print(f"  - Total: {mem.total / (1024**3):.2f} GB")
-                print(f"  - Used: {mem.used / (1024**3):.2f} GB")
-                print(f"  - Free: {mem.available / (1024**3):.2f} GB")
-                
-                process = psutil.Process(os.getpid())
-                process_mem = process.memory_info().rss
-                print("\nMiniOS Process RAM:")
-                print(f"  - Used: {process_mem / (1024**2):.2f} MB")
-            else:
-                print("System info (CPU/RAM) not available. Please install 'psutil'.")
+            today = datetime.date.today().isoformat()
+            title = f"{view} tasks" + (f" tagged #{tag}" if tag else "")
+            print(f"\n=== To-Do List: {title} ({open_count} open, {total} in total) ===")
+            rows = fetch_task_page(db, view, tag, page_starts[-1], TODO_PAGE_SIZE + 1)
+            more = len(rows) > TODO_PAGE_SIZE
+            rows = rows[:TODO_PAGE_SIZE]
+            if not rows:
+                print("[Empty to-do list]" if page_starts == [None] else "[No more tasks]")
+            for row in rows:
+                print(format_task(row, today))
+            if more or len(page_starts) > 1:
+                print(f"-- page {len(page_starts)}{' (n: next page)' if more else ''}"
+                      f"{' (p: previous page)' if len(page_starts) > 1 else ''} --")
 
-            # GPU Info
-            print("\n--- GPU Information ---")
-            if GPUTIL_INSTALLED:
-                try:
-                    gpus = GPUtil.getGPUs()
-                    if gpus:
-                        for i, gpu in enumerate(gpus):
-                            print(f"  GPU {i + 1}: {gpu.name}")
-                            print(f"    - Memory Total: {gpu.memoryTotal} MB")
-                            print(f"    - Memory Used: {gpu.memoryUsed} MB")
-                            print(f"    - GPU Load: {gpu.load * 100:.2f}%")
+            print("\nOptions: add <task> [!0-9] [due:DATE] [#tag], done <id>, undo <id>, remove <id>,")
+            print("         list [open|done|all|due] [#tag], n, p, exit")
+            command = input("Todo> ").strip().split(' ', 1)
+            cmd = command[0].lower()
+            arg = command[1].strip() if len(command) > 1 else ""
+
+            if cmd == "exit":
+                break
+            elif cmd == "n":
+                if more:
+                    page_starts.append(rows[-1])
+            elif cmd == "p":
+                if len(page_starts) > 1:
+                    page_starts.pop()
+            elif cmd == "list":
+                view = "open"
+                tag = None
+                for word in arg.split():
+                    if word.startswith("#"):
+                        tag = word[1:].lower()
+                    elif word in TODO_VIEWS:
+                        view = word
                     else:
-                        print("  No NVIDIA GPU detected.")
-                except Exception:
-                    print("  Could not retrieve GPU information. (Is nvidia-smi installed?)")
-            else:
-                print("  GPU information is only available for NVIDIA cards with the 'GPUtil' library.")
-            
-            # Disk Storage Info
-            print("\n--- Disk Storage ---")
-            if PSUTIL_INSTALLED:
+                        print(f"Unknown list '{word}'.")
+                page_starts = [None]
+            elif cmd == "add" and arg:
+                try:
+                    task_id = add_task(db, arg)
+                    open_count += 1
+                    total += 1
+                    print(f"Task {task_id} added.")
+                except ValueError as e:
+                    print(e)
+            elif cmd in ("done", "undo", "remove") and arg:
                 try:
-                    partitions = psutil.disk_partitions(all=False)
-                    for partition in partitions:
-                        mount_point = partition.mountpoint
-                        # Get disk usage for the partition
-                        total, used, free = shutil.disk_usage(mount_point)
-                        total_gb = total / (1024**3)
-                        used_gb = used / (1024**3)
-                        free_gb = free / (1024**3)
-                        
-                        print(f"\n  Device: {partition.device}")
-                        print(f"  Mount Point: {mount_point}")
-                        print(f"  - Free: {free_gb:.2f} GB")
-                        print(f"  - Used: {used_gb:.2f} GB")
-                        print(f"  - Total: {total_gb:.2f} GB")
-                        
-                        # Create a simple progress bar
-                        bar_length = 20
-                        used_percent = (used / total) * 100 if total > 0 else 0
-                        filled_len = int(bar_length * used // total) if total > 0 else 0
-                        bar = '█' * filled_len + '░' * (bar_length - filled_len)
-                        print(f"  [{bar}] {used_percent:.1f}% used")
-                        
-                except Exception as e:
-                    print(f"  Could not retrieve disk information: {e}")
+                    task_id = int(arg)
+                except ValueError:
+                    print("Invalid number format.")
+                    continue
+                row = db.execute("SELECT done FROM tasks WHERE id = ?", (task_id,)).fetchone()
+                if not row:
+                    print("Invalid task number.")
+                    continue
+                was_done = row[0]
+                with db:
+                    if cmd == "remove":
+                        db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+                        total -= 1
+                        open_count -= 1 - was_done
+                    else:
+                        done = 1 if cmd == "done" else 0
+                        db.execute("UPDATE tasks SET done = ? WHERE id = ?", (done, task_id))
+                        open_count += was_done - done
+                print({"done": "Task completed.", "undo": "Task reopened.", "remove": "Task removed."}[cmd])
             else:
-                print("  Disk information is not available. Please install 'psutil'.")
+                print("Unknown command.")
+    finally:
+        db.close()
 
-            print("\n=======================\n")
-            time.sleep(2) # Wait for 2 seconds before the next refresh
+# How often the 'pcinfo' sampler reads the dynamic metrics by default, in seconds
+METRICS_INTERVAL = 2.0
 
-    except KeyboardInterrupt:
-        print("\nLive monitor stopped.")
+# How many samples each metric keeps (at 2 seconds per sample, 10 minutes)
+METRICS_HISTORY = 300
 
-def show_time():
-    """Displays the current date and time."""
-    now = datetime.datetime.now()
-    print(f"\n{now.strftime('%A, %B %d, %Y')}")
-    print(f"{now.strftime('%H:%M:%S')}\n")
+# GPUtil runs nvidia-smi for every reading, so the GPU is only read every this many samples
+GPU_SAMPLE_EVERY = 5
 
-def show_uptime():
-    """Calculates and displays the system uptime."""
-    global program_start_time
-    # Calculate the elapsed time in seconds
-    elapsed_time_seconds = time.time() - program_start_time
-    
-    # Convert seconds to a readable format (days, hours, minutes)
-    days = int(elapsed_time_seconds // (24 * 3600))
-    hours = int((elapsed_time_seconds % (24 * 3600)) // 3600)
-    minutes = int((elapsed_time_seconds % 3600) // 60)
-    
-    # Construct the output string
-    uptime_string = ""
-    if days > 0:
-        uptime_string += f"{days} day{'s' if days > 1 else ''}, "
-    if hours > 0:
-        uptime_string += f"{hours} hour{'s' if hours > 1 else ''}, "
-    
-    uptime_string += f"{minutes} minute{'s' if minutes > 1 else ''}"
-    
-    print(f"\nUptime: {uptime_string}\n")
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
 
+class RingBuffer:
+    """A fixed number of floats in an array; once full, each new value replaces the oldest."""
+    def __init__(self, size):
+        import array
+        self.data = array.array('d', bytes(8 * size))
+        self.size = size
+        self.count = 0
+        self.next = 0
 
-def folder_command():
-    """Allows the user to view or create a folder and interact with it."""
-    folder_name = input("Enter folder name: ").strip()
-    if not folder_name:
-        print("No folder name entered.")
-        return
+    def append(self, value):
+        self.data[self.next] = value
+        self.next = (self.next + 1) % self.size
+        self.count = min(self.count + 1, self.size)
 
-    folder_path = os.path.join(os.getcwd(), folder_name)
-    
-    if not os.path.exists(folder_path):
-        os.makedirs(folder_path)
-        print(f"Folder '{folder_name}' created.")
-    
-    while True:
+    def values(self):
+        """Returns the stored values, oldest first."""
+        if self.count < self.size:
+            return self.data[:self.count]
+        return self.data[self.next:] + self.data[:self.next]
+
+    def last(self):
+        return self.data[self.next - 1] if self.count else None
+
+    def stats(self):
+        """Returns (min, average, max) of the stored values, or None when there are none."""
+        values = self.values()
+        if not values:
+            return None
+        return min(values), sum(values) / len(values), max(values)
+
+def sparkline(values, width, low=None, high=None):
+    """Draws the last 'width' values as a line of block characters scaled between low and high."""
+    values = values[-width:]
+    if not values:
+        return ""
+    low = min(values) if low is None else low
+    high = max(values) if high is None else high
+    span = (high - low) or 1
+    top = len(SPARK_CHARS) - 1
+    return "".join(SPARK_CHARS[max(0, min(top, round((value - low) / span * top)))] for value in values)
+
+def read_proc_cpu_times():
+    """Returns (busy, total) CPU time of the whole machine from /proc/stat, or None."""
+    try:
+        with open("/proc/stat", "rb") as f:
+            fields = [int(field) for field in f.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    # user nice system idle iowait irq softirq steal ...; idle and iowait count as idle
+    total = sum(fields[:8])
+    return total - fields[3] - fields[4], total
+
+def read_proc_memory():
+    """Returns (total, used) system memory in bytes from /proc/meminfo, or None."""
+    info = {}
+    try:
+        with open("/proc/meminfo", "rb") as f:
+            for line in f:
+                key, value = line.split(b":", 1)
+                info[key] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        return None
+    if b"MemTotal" not in info or b"MemAvailable" not in info:
+        return None
+    return info[b"MemTotal"], info[b"MemTotal"] - info[b"MemAvailable"]
+
+def find_partitions(psutil):
+    """Returns [(device, mount point)] of the disks to watch."""
+    partitions = []
+    if psutil:
         try:
-            files = os.listdir(folder_path)
-        except FileNotFoundError:
-            print(f"Error: Folder '{folder_name}' does not exist.")
-            break
-        
-        print(f"\nContents of '{folder_name}':")
-        if not files:
-            print("[Empty folder]")
+            partitions = [(p.device, p.mountpoint) for p in psutil.disk_partitions(all=False)]
+        except Exception:
+            partitions = []
+    elif os.path.exists("/proc/mounts"):
+        with open("/proc/mounts", "r") as f:
+            for line in f:
+                device, mount_point = line.split()[:2]
+                if device.startswith("/dev/"):
+                    partitions.append((device, mount_point.replace("\\040", " ")))
+    seen = set()
+    result = []
+    for device, mount_point in partitions:
+        if device not in seen:
+            seen.add(device)
+            result.append((device, mount_point))
+    return result or [("", get_data_root())]
+
+class MetricsSampler:
+    """
+    Reads CPU, memory, disk and GPU usage in a background thread and keeps the recent history
+    in ring buffers. Facts that do not change (processor, cores, disks) are read once.
+    """
+    def __init__(self, interval=METRICS_INTERVAL, history=METRICS_HISTORY):
+        import platform
+        self.interval = interval
+        self.history = history
+        self.lock = _thread.allocate_lock()
+        self.psutil = load_driver("psutil")
+        self.processor = platform.processor() or platform.machine() or "Unknown"
+        self.threads = os.cpu_count()
+        self.cores = self.psutil.cpu_count(logical=False) if self.psutil else None
+        self.partitions = find_partitions(self.psutil)
+        self.memory_total = None
+        self.gpus = []
+        self.series = {}
+        self.samples = 0
+        self.cpu_time = 0.0
+        self.started = time.time()
+        self.last_cpu_times = None
+        # Called with the values of every sample, e.g. by 'record'
+        self.listeners = []
+        self.thread = None
+        self.stopping = False
+        self.wake = None
+
+    def buffer(self, name):
+        if name not in self.series:
+            self.series[name] = RingBuffer(self.history)
+        return self.series[name]
+
+    def start(self):
+        import threading
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="metrics-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping = True
+        self.wake.set()
+        self.thread.join()
+
+    def set_interval(self, interval):
+        """Changes the sampling rate, starting with the next sample instead of after the current wait."""
+        self.interval = interval
+        self.wake.set()
+
+    def pause(self, seconds):
+        self.wake.wait(seconds)
+        self.wake.clear()
+
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def run(self):
+        # The first CPU reading only sets the starting point, so the first sample comes quickly
+        self.read_cpu()
+        self.pause(min(self.interval, 0.25))
+        while not self.stopping:
+            start = time.thread_time()
+            try:
+                self.sample()
+            except Exception:
+                # A metric that cannot be read must not stop the other ones
+                pass
+            self.cpu_time += time.thread_time() - start
+            self.pause(self.interval)
+
+    def read_cpu(self):
+        """Returns the CPU usage in percent since the previous call, or None the first time."""
+        if self.psutil:
+            percent = self.psutil.cpu_percent()
+            first = self.last_cpu_times is None
+            self.last_cpu_times = True
+            return None if first else percent
+        times = read_proc_cpu_times()
+        if times is None:
+            return None
+        previous, self.last_cpu_times = self.last_cpu_times, times
+        if previous is None or times[1] == previous[1]:
+            return None
+        return 100.0 * (times[0] - previous[0]) / (times[1] - previous[1])
+
+    def read_gpus(self):
+        GPUtil = load_driver("GPUtil")
+        if not GPUtil:
+            return []
+        try:
+            return GPUtil.getGPUs()
+        except Exception:
+            return []
+
+    def sample(self):
+        """Reads the dynamic metrics once and adds them to the history."""
+        import shutil
+        values = {"time": time.time()}
+        cpu = self.read_cpu()
+        if cpu is not None:
+            values["cpu"] = cpu
+        if self.psutil:
+            mem = self.psutil.virtual_memory()
+            memory = (mem.total, mem.used)
         else:
-            for f in files:
-                print(f"[FILE] {f}")
-        print("Options: read <filename>, exit")
-        command = input(f"{folder_name}> ").strip().split()
-        if not command:
-            continue
-        cmd = command[0].lower()
-        if cmd == "exit":
-            break
-        elif cmd == "read":
-            if len(command) > 1:
-                file_path = os.path.join(folder_path, command[1])
-                if os.path.exists(file_path):
-                    with open(file_path, "r") as f:
-                        print("\n" + f.read() + "\n")
-                else:
-                    print("File does not exist.")
-            else:
-                print("Specify a filename to read.")
+            memory = read_proc_memory()
+        if memory:
+            self.memory_total = memory[0]
+            values["ram"] = memory[1]
+        if self.psutil:
+            values["rss"] = self.psutil.Process().memory_info().rss
+        else:
+            usage = read_proc_usage("/proc/self")
+            if usage:
+                values["rss"] = usage[1]
+        for device, mount_point in self.partitions:
+            try:
+                total, used, free = shutil.disk_usage(mount_point)
+            except OSError:
+                continue
+            values[f"disk:{mount_point}"] = 100.0 * used / total if total else 0.0
+        if self.samples % GPU_SAMPLE_EVERY == 0:
+            gpus = self.read_gpus()
+            self.gpus = [(gpu.name, gpu.memoryTotal) for gpu in gpus]
+            for i, gpu in enumerate(gpus):
+                values[f"gpu{i}:load"] = gpu.load * 100
+                values[f"gpu{i}:memory"] = gpu.memoryUsed
+        with self.lock:
+            for name, value in values.items():
+                self.buffer(name).append(value)
+            self.samples += 1
+            # Under the lock, so a listener removed with the lock held is never called again
+            for listener in self.listeners:
+                listener(values)
+
+    def snapshot(self):
+        """Returns {metric: (values oldest first)} of everything sampled so far."""
+        with self.lock:
+            return {name: buffer.values() for name, buffer in self.series.items()}
+
+# The running pcinfo sampler, started the first time 'pcinfo' is used
+metrics_sampler = None
+
+def get_metrics_sampler(interval=None):
+    """Returns the background metrics sampler, starting it if needed."""
+    global metrics_sampler
+    if metrics_sampler is None or not metrics_sampler.running():
+        metrics_sampler = MetricsSampler(interval or METRICS_INTERVAL)
+        metrics_sampler.start()
+    elif interval:
+        metrics_sampler.set_interval(interval)
+    return metrics_sampler
+
+def format_metric_line(label, values, formatter, width, low=None, high=None):
+    """Returns '  label  now  (min/avg/max)  sparkline' for one metric."""
+    if not values:
+        return f"  {label:<12} collecting..."
+    average = sum(values) / len(values)
+    return (f"  {label:<12} {formatter(values[-1]):>9}   min {formatter(min(values))}  avg {formatter(average)}"
+            f"  max {formatter(max(values))}   {sparkline(values, width, low, high)}")
+
+def render_pc_info(sampler):
+    """Returns the 'pcinfo' screen built from the sampler's history, without reading any metric."""
+    import shutil
+    series = sampler.snapshot()
+    width = max(shutil.get_terminal_size().columns - 70, 10)
+    percent = lambda value: f"{value:.1f}%"
+    lines = ["=== PC Information ===", ""]
+    cores = f"{sampler.cores} cores, " if sampler.cores else ""
+    lines.append(f"CPU: {sampler.processor} ({cores}{sampler.threads} threads)")
+    lines.append(format_metric_line("Usage", series.get("cpu"), percent, width, 0, 100))
+    if sampler.memory_total:
+        lines.append(f"\nSystem RAM: {format_size(sampler.memory_total)} total")
+        lines.append(format_metric_line("Used", series.get("ram"), format_size, width, 0, sampler.memory_total))
+    else:
+        lines.append("\nSystem RAM: not available (install 'psutil').")
+    lines.append("\nMiniOS Process RAM:")
+    lines.append(format_metric_line("Used", series.get("rss"), format_size, width))
+
+    lines.append("\n--- GPU Information ---")
+    if sampler.gpus:
+        for i, (name, memory_total) in enumerate(sampler.gpus):
+            lines.append(f"  GPU {i + 1}: {name} ({memory_total} MB)")
+            lines.append(format_metric_line("Load", series.get(f"gpu{i}:load"), percent, width, 0, 100))
+            lines.append(format_metric_line("Memory", series.get(f"gpu{i}:memory"),
+                                            lambda value: f"{value:.0f} MB", width, 0, memory_total))
+    elif drivers.get("GPUtil"):
+        lines.append("  No NVIDIA GPU detected.")
+    else:
+        lines.append("  GPU information is only available for NVIDIA cards with the 'GPUtil' library.")
+
+    lines.append("\n--- Disk Storage ---")
+    for device, mount_point in sampler.partitions:
+        values = series.get(f"disk:{mount_point}")
+        if not values:
+            continue
+        bar_length = 20
+        filled_len = int(bar_length * values[-1] / 100)
+        bar = '█' * filled_len + '░' * (bar_length - filled_len)
+        lines.append(f"  {device or mount_point} on {mount_point}  [{bar}] {values[-1]:.1f}% used")
+
+    times = series.get("time")
+    history = times[-1] - times[0] if times else 0
+    overhead = 100 * sampler.cpu_time / max(time.time() - sampler.started, 1e-9)
+    lines.append(f"\nSampling every {sampler.interval:g}s: {min(sampler.samples, sampler.history)} samples "
+                 f"({history / 60:.1f} min of history), sampler CPU use {overhead:.2f}%")
+    return "\n".join(lines)
+
+def show_pc_info(arg=None):
+    """
+    Displays system information (CPU, RAM, GPU, Storage). The metrics are read by a background
+    sampler, so the command returns at once unless --watch is given.
+    """
+    parser = command_parser("pcinfo", "Show CPU, memory, GPU and disk usage with their recent history.")
+    parser.add_argument("--watch", action="store_true", help="keep refreshing the screen until Ctrl+C")
+    parser.add_argument("--interval", type=float, metavar="SECONDS",
+                        help=f"how often the sampler reads the metrics (default {METRICS_INTERVAL:g})")
+    parser.add_argument("--count", type=int, metavar="N", help="with --watch, stop after N refreshes")
+    parser.add_argument("--stop", action="store_true", help="stop the background sampler")
+    options = parse_command_args(parser, arg)
+    if options.interval is not None and options.interval <= 0:
+        raise UsageError("pcinfo: the interval must be more than 0 seconds")
+    if options.stop:
+        if metrics_sampler and metrics_sampler.running():
+            metrics_sampler.stop()
+            print("Metrics sampler stopped.")
+        else:
+            print("The metrics sampler is not running.")
+        return
+
+    sampler = get_metrics_sampler(options.interval)
+    # A sampler that just started needs a moment for its first sample
+    deadline = time.time() + 1
+    while not sampler.samples and time.time() < deadline:
+        time.sleep(0.02)
+    if not options.watch:
+        print(render_pc_info(sampler))
+        return
+    refreshes = 0
+    try:
+        while options.count is None or refreshes < options.count:
+            clear_screen()
+            print(render_pc_info(sampler))
+            print("Press Ctrl+C to exit.")
+            refreshes += 1
+            if options.count is None or refreshes < options.count:
+                time.sleep(sampler.interval)
+    except KeyboardInterrupt:
+        print("\nLive monitor stopped.")
+
+# How often 'top' refreshes by default, in seconds
+TOP_INTERVAL = 1.0
+
+TOP_SORT_KEYS = ["cpu", "rss", "io"]
+
+def read_proc_file(path):
+    """Reads a small /proc file with one system call, or returns None if the process is gone."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, 4096)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+def read_process_table(with_io=False):
+    """
+    Returns {pid: (name, state, CPU ticks, resident bytes, IO bytes or None)} of all processes,
+    read from /proc/[pid]/stat (and /proc/[pid]/io with with_io), or from psutil where there is no /proc.
+    Returns None when neither is available.
+    """
+    if not os.path.isdir("/proc/self"):
+        return read_psutil_process_table(with_io)
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    table = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        stat = read_proc_file(f"/proc/{entry}/stat")
+        if not stat:
+            continue
+        # The name is in parentheses and may itself contain spaces or ')'
+        name_start = stat.find(b"(")
+        name_end = stat.rfind(b")")
+        fields = stat[name_end + 2:].split(None, 22)
+        # Fields after the name: state is 0, utime is 11, stime is 12 and rss (in pages) is 21
+        io = None
+        if with_io:
+            data = read_proc_file(f"/proc/{entry}/io")
+            if data:
+                counters = dict(line.split(b": ") for line in data.splitlines() if b": " in line)
+                io = int(counters.get(b"read_bytes", 0)) + int(counters.get(b"write_bytes", 0))
+        table[int(entry)] = (stat[name_start + 1:name_end].decode(errors="replace"), fields[0].decode(),
+                             int(fields[11]) + int(fields[12]), int(fields[21]) * page_size, io)
+    return table
+
+def read_psutil_process_table(with_io=False):
+    """The psutil version of read_process_table, for systems without /proc."""
+    psutil = load_driver("psutil")
+    if not psutil:
+        return None
+    ticks = 100
+    attrs = ["pid", "name", "status", "cpu_times", "memory_info"] + (["io_counters"] if with_io else [])
+    table = {}
+    for process in psutil.process_iter(attrs):
+        info = process.info
+        cpu = info["cpu_times"]
+        memory = info["memory_info"]
+        counters = info.get("io_counters")
+        io = counters.read_bytes + counters.write_bytes if counters else None
+        table[info["pid"]] = (info["name"] or "?", (info["status"] or "?")[:1].upper(),
+                              round((cpu.user + cpu.system) * ticks) if cpu else 0,
+                              memory.rss if memory else 0, io)
+    return table
+
+def process_table_ticks():
+    """Returns how many CPU ticks per second the process table counts."""
+    if os.path.isdir("/proc/self"):
+        return os.sysconf("SC_CLK_TCK")
+    return 100
+
+def compute_process_rates(previous, current, elapsed, ticks):
+    """
+    Returns [(pid, name, state, CPU %, resident bytes, IO bytes per second or None, CPU seconds)]
+    from two process tables taken 'elapsed' seconds apart.
+    """
+    rows = []
+    for pid, (name, state, cpu, rss, io) in current.items():
+        before = previous.get(pid)
+        if before is not None and before[0] == name:
+            cpu_percent = 100.0 * (cpu - before[2]) / ticks / elapsed
+            io_rate = (io - before[4]) / elapsed if io is not None and before[4] is not None else None
+        else:
+            # Started since the last sample
+            cpu_percent = 0.0
+            io_rate = None
+        rows.append((pid, name, state, cpu_percent, rss, io_rate, cpu / ticks))
+    return rows
+
+def format_cpu_time(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+def render_process_table(rows, sort_key, limit, elapsed, own_cpu):
+    """Returns the 'top' screen for the rows of compute_process_rates."""
+    import heapq
+    column = {"cpu": 3, "rss": 4, "io": 5}[sort_key]
+    # Only the rows that are shown get sorted
+    top = heapq.nlargest(limit, rows, key=lambda row: (row[column] or 0, row[3]))
+    running = sum(1 for row in rows if row[2] == "R")
+    lines = []
+    header = f"=== top: {len(rows)} processes, {running} running"
+    if hasattr(os, "getloadavg"):
+        header += ", load average " + " ".join(f"{load:.2f}" for load in os.getloadavg())
+    lines.append(header + " ===")
+    memory = read_proc_memory()
+    if memory:
+        lines.append(f"Memory: {format_size(memory[1])} used of {format_size(memory[0])}")
+    lines.append(f"Sorted by {sort_key}, refreshed every {elapsed:.1f}s (top itself used {own_cpu:.1f}% CPU)")
+    lines.append("")
+    lines.append(f"{'PID':>7} S {'CPU%':>6} {'RSS':>10} {'IO/s':>10} {'TIME':>9}  COMMAND")
+    for pid, name, state, cpu_percent, rss, io_rate, cpu_seconds in top:
+        io_text = format_size(io_rate) if io_rate is not None else "-"
+        lines.append(f"{pid:>7} {state} {cpu_percent:>6.1f} {format_size(rss):>10} {io_text:>10} "
+                     f"{format_cpu_time(cpu_seconds):>9}  {name}")
+    return "\n".join(lines)
+
+def top_command(arg=None):
+    """Shows the processes using the most CPU, memory or IO, refreshed until Ctrl+C."""
+    import shutil
+    parser = command_parser("top", "List all processes, sorted by CPU, memory (rss) or IO use.")
+    parser.add_argument("-s", "--sort", choices=TOP_SORT_KEYS, default="cpu", help="what to sort by (default cpu)")
+    parser.add_argument("-n", "--lines", type=int, metavar="N", help="how many processes to show (default: fill the screen)")
+    parser.add_argument("--interval", type=float, default=TOP_INTERVAL, metavar="SECONDS",
+                        help=f"time between refreshes (default {TOP_INTERVAL:g})")
+    parser.add_argument("--count", type=int, metavar="N", help="stop after N refreshes (default 1 in batch mode)")
+    parser.add_argument("--io", action="store_true", help="also read IO counters (always on with --sort io)")
+    options = parse_command_args(parser, arg)
+    if options.interval <= 0:
+        raise UsageError("top: the interval must be more than 0 seconds")
+    count = options.count if options.count is not None else (1 if batch_mode else None)
+    with_io = options.io or options.sort == "io"
+    limit = options.lines or max(shutil.get_terminal_size().lines - 7, 5)
+
+    previous = read_process_table(with_io)
+    if previous is None:
+        print("Process information is not available here. Please install 'psutil'.")
+        return 1
+    ticks = process_table_ticks()
+    last_time = time.monotonic()
+    last_cpu = time.process_time()
+    refreshes = 0
+    try:
+        while count is None or refreshes < count:
+            time.sleep(options.interval)
+            current = read_process_table(with_io)
+            now = time.monotonic()
+            own_cpu = 100.0 * (time.process_time() - last_cpu) / (now - last_time)
+            rows = compute_process_rates(previous, current, now - last_time, ticks)
+            clear_screen()
+            print(render_process_table(rows, options.sort, limit, now - last_time, own_cpu))
+            previous, last_time, last_cpu = current, now, time.process_time()
+            refreshes += 1
+    except KeyboardInterrupt:
+        print("\ntop stopped.")
+
+# A metrics recording is a header (magic, record size) followed by one fixed-width record per sample,
+# oldest first: time, CPU %, used RAM and MiniOS RSS in bytes, and used % of the disk with minios_data.
+# Missing values are stored as NaN.
+METRICS_FILE_MAGIC = b"MINIOSM1"
+METRICS_HEADER_FORMAT = "<8sI"
+METRICS_RECORD_FORMAT = "<dffff"
+METRICS_RECORD_FIELDS = ["cpu", "ram", "rss", "disk"]
+
+# The recording 'record' and 'replay' use when no file is given
+METRICS_RECORD_FILE = "metrics.rec"
+
+class MetricsRecorder:
+    """Appends every sample of the metrics sampler to a recording file."""
+    def __init__(self, path, sampler):
+        import struct
+        self.path = path
+        self.sampler = sampler
+        self.record = struct.Struct(METRICS_RECORD_FORMAT)
+        header = struct.Struct(METRICS_HEADER_FORMAT)
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if os.fstat(self.fd).st_size == 0:
+            os.write(self.fd, header.pack(METRICS_FILE_MAGIC, self.record.size))
+        self.written = 0
+        # Record the disk that holds minios_data, which is the longest mount point containing it
+        data_root = get_data_root()
+        mount_points = [mount for device, mount in sampler.partitions
+                        if data_root == mount or data_root.startswith(mount.rstrip(os.sep) + os.sep)]
+        self.disk_key = f"disk:{max(mount_points, key=len)}" if mount_points else None
+
+    def __call__(self, values):
+        nan = float("nan")
+        row = [values.get(name, nan) for name in ["cpu", "ram", "rss"]]
+        row.append(values.get(self.disk_key, nan))
+        # One write per record, so a reader never sees half of one
+        os.write(self.fd, self.record.pack(values["time"], *row))
+        self.written += 1
+
+    def close(self):
+        # Once removed under the sampler's lock no sample can be writing, so the file can be closed
+        with self.sampler.lock:
+            if self in self.sampler.listeners:
+                self.sampler.listeners.remove(self)
+        os.close(self.fd)
+
+    def active(self):
+        return self.sampler.running() and self in self.sampler.listeners
+
+# The running 'record', or None
+metrics_recorder = None
+
+class MetricsRecording:
+    """
+    A recording file opened with mmap. Records are read in place, and because their times only grow,
+    the records of a time window are found with a binary search.
+    """
+    def __init__(self, path):
+        import mmap
+        import struct
+        header = struct.Struct(METRICS_HEADER_FORMAT)
+        self.record = struct.Struct(METRICS_RECORD_FORMAT)
+        with open(path, "rb") as f:
+            magic, record_size = header.unpack(f.read(header.size).ljust(header.size, b"\0"))
+            if magic != METRICS_FILE_MAGIC or record_size != self.record.size:
+                raise ValueError(f"'{path}' is not a MiniOS metrics recording.")
+            size = os.fstat(f.fileno()).st_size
+            self.offset = header.size
+            # A record still being written at the end is left out
+            self.count = (size - self.offset) // self.record.size
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.count else b""
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        """Returns the time of a record, which is all bisect needs."""
+        return self.record.unpack_from(self.map, self.offset + index * self.record.size)[0]
+
+    def find(self, start=None, end=None):
+        """Returns the (first, last + 1) record indexes with start <= time < end."""
+        import bisect
+        first = bisect.bisect_left(self, start) if start is not None else 0
+        last = bisect.bisect_left(self, end) if end is not None else self.count
+        return first, max(first, last)
+
+    def rows(self, first, last):
+        """Yields the records first..last-1 as tuples."""
+        view = memoryview(self.map)[self.offset + first * self.record.size:self.offset + last * self.record.size]
+        try:
+            yield from self.record.iter_unpack(view)
+        finally:
+            view.release()
+
+    def close(self):
+        if self.count:
+            self.map.close()
+
+def parse_duration(text):
+    """Turns '90', '90s', '15m', '2h' or '3d' into seconds."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    number, unit = (text[:-1], text[-1]) if text and text[-1] in units else (text, "s")
+    try:
+        seconds = float(number) * units[unit]
+    except ValueError:
+        raise UsageError(f"'{text}' is not a duration. Use e.g. 30s, 15m, 2h or 1d.") from None
+    if seconds <= 0:
+        raise UsageError(f"'{text}' is not a duration. It must be more than 0.")
+    return seconds
+
+def parse_replay_time(text):
+    """Turns 'YYYY-MM-DD[ HH:MM[:SS]]' or a time ago like '-2h' into a timestamp."""
+    import datetime
+    if text.startswith("-"):
+        return time.time() - parse_duration(text[1:])
+    try:
+        return datetime.datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise UsageError(f"'{text}' is not a time. Use 'YYYY-MM-DD HH:MM' or a time ago like -2h.") from None
+
+def aggregate_metrics(rows):
+    """
+    Returns (number of samples, first time, last time, {field: (min, average, max) or None}) of records.
+    NaN values, i.e. metrics missing from a sample, are skipped.
+    """
+    count = 0
+    first = last = None
+    totals = [[float("inf"), 0.0, float("-inf"), 0] for _ in METRICS_RECORD_FIELDS]
+    for row in rows:
+        if first is None:
+            first = row[0]
+        last = row[0]
+        count += 1
+        for total, value in zip(totals, row[1:]):
+            if value == value:
+                if value < total[0]:
+                    total[0] = value
+                if value > total[2]:
+                    total[2] = value
+                total[1] += value
+                total[3] += 1
+    stats = {name: (low, total / n, high) if n else None
+             for name, (low, total, high, n) in zip(METRICS_RECORD_FIELDS, totals)}
+    return count, first, last, stats
+
+def format_metric_stats(name, stats):
+    """Returns 'min/avg/max' of one recorded metric in its unit."""
+    if stats is None:
+        return "-"
+    formatter = format_size if name in ("ram", "rss") else (lambda value: f"{value:.1f}%")
+    return "/".join(formatter(value) for value in stats)
+
+def iter_replay_windows(recording, first, last, origin, step):
+    """
+    Splits the records first..last-1 into windows of 'step' seconds counted from origin and yields
+    (window start, first record, last record + 1) for every window that has records.
+    Windows are numbered with integers rather than added up, so rounding can't stall the walk.
+    """
+    window = 0
+    while first < last:
+        window_start = origin + window * step
+        window_end = min(recording.find(window_start, window_start + step)[1], last)
+        if first < window_end:
+            yield window_start, first, window_end
+            first = window_end
+            window += 1
+        else:
+            # Skip the empty windows of a gap in the recording in one go
+            next_time = recording[first]
+            target = int((next_time - origin) // step)
+            while origin + (target + 1) * step <= next_time:
+                target += 1
+            while target > 0 and origin + target * step > next_time:
+                target -= 1
+            window = max(window + 1, target)
+
+def record_command(arg=None):
+    """Starts, stops or shows the recording of the pcinfo metrics to a file."""
+    global metrics_recorder
+    parser = command_parser("record", "Record the pcinfo metrics (CPU, RAM, disk) to a compact binary file.")
+    parser.add_argument("action", nargs="?", choices=["start", "stop", "status"], default="status")
+    parser.add_argument("file", nargs="?", help=f"recording to append to (default .minios/{METRICS_RECORD_FILE})")
+    parser.add_argument("--interval", type=float, metavar="SECONDS",
+                        help=f"how often to take a sample (default {METRICS_INTERVAL:g})")
+    options = parse_command_args(parser, arg)
+    if options.interval is not None and options.interval <= 0:
+        raise UsageError("record: the interval must be more than 0 seconds")
+    recording = metrics_recorder is not None and metrics_recorder.active()
+
+    if options.action == "start":
+        if recording:
+            print(f"Already recording to '{metrics_recorder.path}'. Use 'record stop' first.")
+            return 1
+        if metrics_recorder is not None:
+            metrics_recorder.close()
+        path = os.path.abspath(options.file) if options.file else state_path(METRICS_RECORD_FILE)
+        if os.path.exists(path) and os.path.getsize(path):
+            try:
+                MetricsRecording(path).close()
+            except ValueError as e:
+                print(f"Error: {e}")
+                return 1
+        sampler = get_metrics_sampler(options.interval)
+        metrics_recorder = MetricsRecorder(path, sampler)
+        sampler.listeners.append(metrics_recorder)
+        print(f"Recording every {sampler.interval:g}s to '{path}'.")
+    elif options.action == "stop":
+        if metrics_recorder is None:
+            print("Nothing is being recorded.")
+            return
+        metrics_recorder.close()
+        print(f"Recording stopped: {metrics_recorder.written} samples added to '{metrics_recorder.path}'.")
+        metrics_recorder = None
+    elif recording:
+        size = os.path.getsize(metrics_recorder.path)
+        print(f"Recording every {metrics_recorder.sampler.interval:g}s to '{metrics_recorder.path}': "
+              f"{metrics_recorder.written} samples this time, {format_size(size)} in total.")
+    else:
+        print("Nothing is being recorded. Start with 'record start [FILE]'.")
+
+def replay_command(arg=None):
+    """Summarises a metrics recording over a time window, optionally in steps."""
+    import datetime
+    parser = command_parser("replay", "Show the metrics of a recording for any time window.")
+    parser.add_argument("file", nargs="?", help=f"recording to read (default .minios/{METRICS_RECORD_FILE})")
+    parser.add_argument("--from", dest="start", metavar="TIME", help="start of the window: 'YYYY-MM-DD HH:MM' or e.g. -2h")
+    parser.add_argument("--to", dest="end", metavar="TIME", help="end of the window (default: the end of the recording)")
+    parser.add_argument("--last", metavar="DURATION", help="the window is the last DURATION, e.g. 30m or 1d")
+    parser.add_argument("--every", metavar="DURATION", help="show one line per DURATION, e.g. 5m or 1h")
+    options = parse_command_args(parser, arg)
+    start = parse_replay_time(options.start) if options.start else None
+    end = parse_replay_time(options.end) if options.end else None
+    if options.last:
+        start = (end or time.time()) - parse_duration(options.last)
+    step = parse_duration(options.every) if options.every else None
+
+    path = os.path.abspath(options.file) if options.file else state_path(METRICS_RECORD_FILE)
+    if not os.path.exists(path):
+        print(f"Error: the recording '{path}' does not exist. Start one with 'record start'.")
+        return 1
+    try:
+        recording = MetricsRecording(path)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    when = lambda t: datetime.datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        first, last = recording.find(start, end)
+        if first == last:
+            print(f"No samples in that window ({len(recording)} samples in the recording).")
+            return
+        count, first_time, last_time, stats = aggregate_metrics(recording.rows(first, last))
+        print(f"=== {count} samples from {when(first_time)} to {when(last_time)} ===")
+        for name in METRICS_RECORD_FIELDS:
+            print(f"  {name.upper():<5} min/avg/max {format_metric_stats(name, stats[name])}")
+        if step:
+            print(f"\n{'FROM':<19}  {'SAMPLES':>7}  {'CPU avg/max':>13}  {'RAM avg':>10}  {'DISK':>6}")
+            origin = start if start is not None else first_time
+            for window_start, window_first, window_end in iter_replay_windows(recording, first, last, origin, step):
+                count, _, _, stats = aggregate_metrics(recording.rows(window_first, window_end))
+                cpu = f"{stats['cpu'][1]:.1f}/{stats['cpu'][2]:.1f}%" if stats["cpu"] else "-"
+                ram = format_size(stats["ram"][1]) if stats["ram"] else "-"
+                disk = f"{stats['disk'][1]:.1f}%" if stats["disk"] else "-"
+                print(f"{when(window_start):<19}  {count:>7}  {cpu:>13}  {ram:>10}  {disk:>6}")
+    finally:
+        recording.close()
+
+def show_time():
+    """Displays the current date and time."""
+    import datetime
+    now = datetime.datetime.now()
+    print(f"\n{now.strftime('%A, %B %d, %Y')}")
+    print(f"{now.strftime('%H:%M:%S')}\n")
+
+def show_uptime():
+    """Calculates and displays the system uptime."""
+    global program_start_time
+    # Calculate the elapsed time in seconds
+    elapsed_time_seconds = time.time() - program_start_time
+    
+    # Convert seconds to a readable format (days, hours, minutes)
+    days = int(elapsed_time_seconds // (24 * 3600))
+    hours = int((elapsed_time_seconds % (24 * 3600)) // 3600)
+    minutes = int((elapsed_time_seconds % 3600) // 60)
+    
+    # Construct the output string
+    uptime_string = ""
+    if days > 0:
+        uptime_string += f"{days} day{'s' if days > 1 else ''}, "
+    if hours > 0:
+        uptime_string += f"{hours} hour{'s' if hours > 1 else ''}, "
+    
+    uptime_string += f"{minutes} minute{'s' if minutes > 1 else ''}"
+    
+    print(f"\nUptime: {uptime_string}\n")
+
+
+def folder_command():
+    """Allows the user to view or create a folder and interact with it."""
+    folder_name = input("Enter folder name: ").strip()
+    if not folder_name:
+        print("No folder name entered.")
+        return
+
+    folder_path = os.path.join(os.getcwd(), folder_name)
+    
+    if not os.path.exists(folder_path):
+        os.makedirs(folder_path)
+        print(f"Folder '{folder_name}' created.")
+    
+    while True:
+        try:
+            entries = list_directory(folder_path)
+        except FileNotFoundError:
+            print(f"Error: Folder '{folder_name}' does not exist.")
+            break
+        
+        print(f"\nContents of '{folder_name}':")
+        if not entries:
+            print("[Empty folder]")
+        else:
+            for name, is_dir in entries:
+                print(f"[DIR] {name}" if is_dir else f"[FILE] {name}")
+        print("Options: read <filename>, exit")
+        command = input(f"{folder_name}> ").strip().split()
+        if not command:
+            continue
+        cmd = command[0].lower()
+        if cmd == "exit":
+            break
+        elif cmd == "read":
+            if len(command) > 1:
+                file_path = os.path.join(folder_path, command[1])
+                if os.path.isfile(file_path):
+                    try:
+                        view_file(file_path)
+                    except Exception as e:
+                        print("Error reading file:", e)
+                else:
+                    print("File does not exist.")
+            else:
+                print("Specify a filename to read.")
         else:
             print("Unknown command.")
 
@@ -804,15 +3661,16 @@ def html_to_markdown():
     Converts the raw HTML from the last web fetch into a more readable Markdown format.
     This is a simplified converter for educational purposes.
     """
+    import re
     try:
         with open("last_web_content.txt", "r", encoding="utf-8") as f:
             html_content = f.read()
     except FileNotFoundError:
         print("Error: No web content has been fetched yet. Please use the 'fetch' command first.")
-        return
+        return 1
     except Exception as e:
         print(f"Error reading file: {e}")
-        return
+        return 1
 
     # A simple approach to converting HTML tags to Markdown
     # This will not handle all cases but works for a basic demonstration.
@@ -853,14 +3711,15 @@ def image_to_ascii(filepath):
     # Character list for converting brightness to ASCII characters
     ASCII_CHARS = '@%#*+=-:. '
     
-    if not PILLOW_INSTALLED:
+    Image = load_driver("PIL.Image")
+    if not Image:
         print("Image display requires the 'Pillow' library.")
         print("Please run 'pip install Pillow' to use this feature.")
         return
     
     if not os.path.exists(filepath):
         print(f"Error: The file '{filepath}' was not found.")
-        return
+        return 1
 
     try:
         # Open the image without converting to grayscale
@@ -932,21 +3791,20 @@ def games_command():
     
     while True:
         try:
-            files = os.listdir(games_folder_path)
+            entries = list_directory(games_folder_path)
         except FileNotFoundError:
             print(f"Error: Games folder does not exist.")
             break
         
         print(f"\nContents of '{games_folder_name}':")
-        if not files:
+        if not entries:
             print("[Empty games folder. Add your .py games here!]")
         else:
-            for f in files:
-                full_path = os.path.join(games_folder_path, f)
-                if os.path.isdir(full_path):
-                    print(f"[DIR] {f}")
+            for name, is_dir in entries:
+                if is_dir:
+                    print(f"[DIR] {name}")
                 else:
-                    print(f"[FILE] {f}")
+                    print(f"[FILE] {name}")
         
         print("\nOptions: run <filename.py>, exit")
         command = input(f"{games_folder_name}> ").strip().split()
@@ -967,11 +3825,11 @@ def games_command():
                 if os.path.exists(file_path):
                     try:
                         print(f"\n--- Running '{filename}' ---")
-                        subprocess.run([sys.executable, file_path], check=True)
-                        print(f"--- Finished running '{filename}' ---")
-                    except subprocess.CalledProcessError as e:
-                        print(f"\nError while running '{filename}':")
-                        print(e.stderr)
+                        result = run_python_script(file_path, profile="games", cwd=games_folder_path)
+                        if result["status"] == 0:
+                            print(f"--- Finished running '{filename}' ---")
+                        else:
+                            print(f"\nError while running '{filename}' (exit status {result['status']}).")
                     except Exception as e:
                         print(f"An unexpected error occurred: {e}")
                 else:
@@ -983,52 +3841,53 @@ def games_command():
 
 def run_internet_server():
     """
-    Runs the internet server script in a non-blocking process.
+    Runs the internet server script as a background job.
     """
-    global server_process
     server_file = "minios_web_server.py" # Use the new web server file
     if not os.path.exists(server_file):
         print(f"Error: '{server_file}' not found. Please create it first.")
-        return
+        return 1
     
-    if server_process and server_process.poll() is None:
+    if find_server_job():
         print("Server is already running.")
         return
 
     print("Starting web server in the background...")
     try:
-        # Use Popen to run the process non-blocking
-        server_process = subprocess.Popen([sys.executable, server_file])
-        print("Server started. You can continue using MiniOS.")
+        job = start_job(SERVER_COMMAND)
+        print(f"Server started as job [{job.job_id}]. You can continue using MiniOS.")
         print("Go to http://localhost:8000 to view the chat application.")
-        print("Use 'kill_server' to stop the server when you are done.")
+        print("Use 'kill_server' to stop the server when you are done ('fg' shows its output).")
     except Exception as e:
         print(f"An unexpected error occurred while starting the server: {e}")
 
+def find_server_job():
+    """Returns the running job of the internet server, or None."""
+    for job in job_table.values():
+        if job.command == SERVER_COMMAND and job.state == "running":
+            return job
+    return None
+
 def kill_internet_server():
     """
-    Terminates the running internet server process.
+    Stops the internet server job.
     """
-    global server_process
-    if server_process and server_process.poll() is None:
+    job = find_server_job()
+    if job:
         print("Stopping server...")
         try:
-            # Terminate the process
-            server_process.terminate()
-            server_process.wait(timeout=5)  # Wait for a few seconds for it to close
-            if server_process.poll() is None:
-                # If it's still running, try to kill it more forcefully
-                server_process.kill()
+            kill_job(job)
+            job.thread.join(timeout=5)  # Wait for a few seconds for it to close
             print("Server stopped.")
         except Exception as e:
             print(f"An error occurred while stopping the server: {e}")
-        finally:
-            server_process = None
     else:
         print("No server is currently running.")
-        
+
 def ping_google():
     """Pings google.com to test internet connectivity."""
+    import platform
+    import subprocess
     print("Pinging google.com to check connectivity...")
     # Determine the correct ping command based on the OS
     if platform.system() == "Windows":
@@ -1045,89 +3904,2120 @@ def ping_google():
         print("Error: Could not reach google.com.")
         print("Check your internet connection.")
         print(e.stderr)
+        return 1
     except FileNotFoundError:
         print("Error: The 'ping' command was not found on your system.")
+        return 1
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+        return 1
+
+def walk_entries(root):
+    """
+    Yields an os.DirEntry for every file under root, walking the tree with os.scandir.
+    Folders that can't be read and MiniOS's own state folders are skipped.
+    """
+    pending = [root]
+    while pending:
+        folder = pending.pop()
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in WALK_SKIP_NAMES:
+                                pending.append(entry.path)
+                        elif entry.is_file():
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+def walk_tree(root, errors=None):
+    """
+    Yields an os.DirEntry for every entry under root: each folder comes before what is in it, then files,
+    symlinks (a symlinked folder is yielded but not followed) and other special files.
+    Unlike walk_entries() no names are skipped, so copies and archives keep the whole tree.
+    Folders that can't be read are added to errors as (path, error).
+    """
+    pending = [root]
+    while pending:
+        folder = pending.pop()
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    yield entry
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                    except OSError as e:
+                        if errors is not None:
+                            errors.append((entry.path, e))
+        except OSError as e:
+            if errors is not None:
+                errors.append((folder, e))
+
+def walk_files(root):
+    """Yields the path of every file under root, see walk_entries()."""
+    for entry in walk_entries(root):
+        yield entry.path
+
+def count_newlines(data, start, end):
+    """Counts the newlines in data[start:end] a megabyte at a time, so big gaps don't copy much."""
+    count = 0
+    while start < end:
+        chunk_end = min(start + 1024 * 1024, end)
+        count += data[start:chunk_end].count(b"\n")
+        start = chunk_end
+    return count
+
+def grep_file(path, pattern, stop, results, line_numbers):
+    """
+    Searches one file through a memory map and puts (path, line number, line) results on the queue.
+    Files that look binary only report that they match.
+    """
+    import mmap
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                binary = b"\0" in data[:8192]
+                position = 0
+                line_number = 1
+                counted_to = 0
+                while not stop.is_set():
+                    match = pattern.search(data, position)
+                    if not match:
+                        break
+                    if binary:
+                        results.put((path, None, "Binary file matches"))
+                        break
+                    line_start = data.rfind(b"\n", 0, match.start()) + 1
+                    line_end = data.find(b"\n", match.end())
+                    if line_end == -1:
+                        line_end = len(data)
+                    if line_numbers:
+                        line_number += count_newlines(data, counted_to, line_start)
+                        counted_to = line_start
+                    line = data[line_start:min(line_end, line_start + 300)]
+                    results.put((path, line_number if line_numbers else None,
+                                 line.decode("utf-8", errors="replace").rstrip("\r")))
+                    # One result per line, like grep
+                    position = line_end + 1
+    except (OSError, ValueError):
+        # Unreadable files are skipped
+        pass
+
+def grep_command(arg=None):
+    """
+    Searches the contents of files for a regular expression.
+    Files are found with os.scandir and searched through mmap by a pool of threads,
+    and matches are printed as soon as they are found.
+    """
+    import queue
+    import re
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    parser = command_parser("grep", "Search file contents under a folder for a regular expression.")
+    parser.add_argument("pattern", help="regular expression to search for")
+    parser.add_argument("paths", nargs="*", default=["."], help="files or folders to search (default: current folder)")
+    parser.add_argument("-i", "--ignore-case", action="store_true", help="ignore upper/lower case")
+    parser.add_argument("-F", "--fixed", action="store_true", help="search for the pattern as plain text")
+    parser.add_argument("-n", "--line-numbers", action="store_true", help="show line numbers")
+    parser.add_argument("-m", "--max", type=int, default=1000, metavar="N", help="stop after N matches (default: 1000)")
+    parser.add_argument("-j", "--jobs", type=int, default=min(8, (os.cpu_count() or 1) * 2), metavar="N",
+                        help="number of search threads")
+    options = parse_command_args(parser, arg)
+    if options.max < 1:
+        raise UsageError("grep: -m must be at least 1")
+
+    text = re.escape(options.pattern) if options.fixed else options.pattern
+    try:
+        # MULTILINE makes ^ and $ match at every line, like grep
+        flags = re.MULTILINE | (re.IGNORECASE if options.ignore_case else 0)
+        pattern = re.compile(text.encode("utf-8"), flags)
+    except re.error as e:
+        raise UsageError(f"grep: invalid pattern: {e}")
+
+    def files_to_search():
+        for path in options.paths:
+            if os.path.isdir(path):
+                yield from walk_files(path)
+            elif os.path.isfile(path):
+                yield path
+            else:
+                print(f"grep: {path}: no such file or folder")
+
+    results = queue.Queue()
+    stop = threading.Event()
+    start_time = time.perf_counter()
+    searched = 0
+    matches = 0
+    matched_files = set()
+
+    def search_all():
+        nonlocal searched
+        # At most a few files per thread are queued at once, so huge trees don't pile up in memory
+        with ThreadPoolExecutor(max_workers=max(options.jobs, 1)) as pool:
+            slots = threading.Semaphore(max(options.jobs, 1) * 4)
+            for path in files_to_search():
+                if stop.is_set():
+                    break
+                slots.acquire()
+                searched += 1
+                future = pool.submit(grep_file, path, pattern, stop, results, options.line_numbers)
+                future.add_done_callback(lambda _: slots.release())
+        results.put(None)
+
+    searcher = threading.Thread(target=search_all, daemon=True)
+    searcher.start()
+    try:
+        while True:
+            result = results.get()
+            if result is None:
+                break
+            path, line_number, line = result
+            matched_files.add(path)
+            matches += 1
+            location = os.path.relpath(path) if line_number is None else f"{os.path.relpath(path)}:{line_number}"
+            print(f"{location}: {line}")
+            if matches >= options.max:
+                print(f"-- Stopped after {options.max} matches (use -m to change) --")
+                break
+    except KeyboardInterrupt:
+        print("\nSearch cancelled.")
+    finally:
+        stop.set()
+        searcher.join()
+
+    elapsed = time.perf_counter() - start_time
+    print(f"{matches} match{'es' if matches != 1 else ''} in {len(matched_files)} of {searched} files searched ({elapsed:.2f}s)")
+
+def get_data_root():
+    """Returns the 'minios_data' folder, or the current folder if MiniOS was not started through main()."""
+    return data_root or os.getcwd()
+
+def state_path(name):
+    """Returns the path of a file in MiniOS's own state folder (minios_data/.minios), creating the folder."""
+    folder = os.path.join(get_data_root(), STATE_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, name)
+
+def open_search_index():
+    """Opens (and if needed creates) the full-text index database."""
+    import sqlite3
+    db = sqlite3.connect(state_path("search.db"))
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime_ns INTEGER, size INTEGER)")
+    # One row per (token, document), clustered by token so a query term is a single range scan
+    db.execute("CREATE TABLE IF NOT EXISTS postings (token TEXT, doc_id INTEGER, count INTEGER, "
+               "PRIMARY KEY (token, doc_id)) WITHOUT ROWID")
+    db.execute("CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id)")
+    return db
+
+def tokenize_file(path):
+    """
+    Counts the words in a text file, reading it line by line.
+    Returns None for binary files and files that are too big to index.
+    """
+    import collections
+    import re
+    word = re.compile(r"\w{2,64}")
+    counts = collections.Counter()
+    with open(path, "rb") as f:
+        if b"\0" in f.read(8192):
+            return None
+        f.seek(0)
+        for line in f:
+            counts.update(word.findall(line.decode("utf-8", errors="replace").lower()))
+    return counts
+
+def update_search_index(db):
+    """
+    Brings the index up to date with the files under minios_data.
+    Only files whose size or modification time changed are read again.
+    Returns the number of files (re)indexed and removed.
+    """
+    root = get_data_root()
+    known = {path: (doc_id, mtime_ns, size) for doc_id, path, mtime_ns, size
+             in db.execute("SELECT id, path, mtime_ns, size FROM docs")}
+    indexed = 0
+    with db:
+        for entry in walk_entries(root):
+            try:
+                info = entry.stat()
+            except OSError:
+                continue
+            path = os.path.relpath(entry.path, root)
+            old = known.get(path)
+            if old and old[1] == info.st_mtime_ns and old[2] == info.st_size:
+                del known[path]
+                continue
+            if info.st_size > SEARCH_MAX_FILE_SIZE:
+                counts = None
+            else:
+                try:
+                    counts = tokenize_file(entry.path)
+                except OSError:
+                    # Left in known, so its stale postings are removed below and it is read again next time
+                    continue
+            known.pop(path, None)
+
+            if old:
+                doc_id = old[0]
+                db.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+                db.execute("UPDATE docs SET mtime_ns = ?, size = ? WHERE id = ?",
+                           (info.st_mtime_ns, info.st_size, doc_id))
+            else:
+                doc_id = db.execute("INSERT INTO docs (path, mtime_ns, size) VALUES (?, ?, ?)",
+                                    (path, info.st_mtime_ns, info.st_size)).lastrowid
+            # Binary and oversized files are remembered without postings, so they are not read again
+            if counts:
+                db.executemany("INSERT INTO postings (token, doc_id, count) VALUES (?, ?, ?)",
+                               ((token, doc_id, count) for token, count in counts.items()))
+            indexed += 1
+
+        # Whatever was not seen on disk has been deleted
+        for doc_id, _, _ in known.values():
+            db.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+            db.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+    return indexed, len(known)
+
+def search_command(arg=None):
+    """Searches the files under minios_data for words using the persistent full-text index."""
+    import re
+    parser = command_parser("search", "Find files under minios_data that contain all the given words. "
+                                      "Every search first checks the size and modification time of every file "
+                                      "to keep the index current; use --no-update to skip that on big trees.")
+    parser.add_argument("words", nargs="*", help="words that must all appear in the file")
+    parser.add_argument("-n", "--limit", type=int, default=20, metavar="N", help="show at most N files (default: 20)")
+    parser.add_argument("--no-update", action="store_true",
+                        help="search the index as it is, without checking every file for changes (fast)")
+    parser.add_argument("--rebuild", action="store_true", help="throw the index away and index everything again")
+    options = parse_command_args(parser, arg)
+
+    words = sorted({w for text in options.words for w in re.findall(r"\w{2,64}", text.lower())})
+    if not words and not options.rebuild:
+        raise UsageError("search: give at least one word of two or more letters")
+
+    db = open_search_index()
+    try:
+        if options.rebuild:
+            with db:
+                db.execute("DELETE FROM postings")
+                db.execute("DELETE FROM docs")
+        if not options.no_update:
+            start = time.perf_counter()
+            indexed, removed = update_search_index(db)
+            elapsed = (time.perf_counter() - start) * 1000
+            if indexed or removed:
+                print(f"Index updated: {indexed} file{'s' if indexed != 1 else ''} indexed, {removed} removed ({elapsed:.0f} ms).")
+        if not words:
+            return
+
+        start = time.perf_counter()
+        placeholders = ", ".join("?" * len(words))
+        rows = db.execute(
+            f"SELECT d.path, SUM(p.count) AS score FROM postings p JOIN docs d ON d.id = p.doc_id "
+            f"WHERE p.token IN ({placeholders}) GROUP BY p.doc_id HAVING COUNT(*) = ? "
+            f"ORDER BY score DESC LIMIT ?",
+            (*words, len(words), options.limit)).fetchall()
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        db.close()
+
+    if not rows:
+        print(f"No files contain: {' '.join(words)}")
+    for path, score in rows:
+        print(f"{str(score).rjust(6)}  {path}")
+    print(f"({len(rows)} result{'s' if len(rows) != 1 else ''} in {elapsed:.1f} ms)")
+
+class DirNode:
+    """One folder seen by scan_tree(), with the sizes of everything below it."""
+    __slots__ = ("path", "parent", "depth", "size", "files", "pending", "children")
+
+    def __init__(self, path, parent, depth):
+        self.path = path
+        self.parent = parent
+        self.depth = depth
+        self.size = 0
+        self.files = 0
+        # Subfolders that are not finished yet
+        self.pending = 0
+        self.children = []
+
+def scan_folder(path):
+    """Reads one folder for scan_tree(). Returns (size of its files, number of files, subfolder paths)."""
+    size = 0
+    files = 0
+    subfolders = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in WALK_SKIP_NAMES:
+                            subfolders.append(entry.path)
+                    else:
+                        size += entry.stat(follow_symlinks=False).st_size
+                        files += 1
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return size, files, subfolders
+
+def scan_tree(root, jobs, top_n=0, keep_depth=0):
+    """
+    Adds up file sizes under root with a pool of threads, each reading one folder at a time.
+    A folder's total is final once all its subfolders are done, and it is then added to its parent.
+    Returns the root DirNode and the top_n heaviest folders as a sorted list of (size, path).
+    Child nodes are only kept (for 'tree') down to keep_depth.
+    """
+    import heapq
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    root_node = DirNode(root, None, 0)
+    heaviest = []
+    folders_done = 0
+    bytes_seen = 0
+    # Progress lines would only clutter the output of scripts
+    show_progress = not batch_mode
+    last_report = time.perf_counter()
+
+    def finish(node):
+        # Push finished totals up the tree for as long as parents become complete
+        while node is not None:
+            if top_n:
+                heapq.heappush(heaviest, (node.size, node.path))
+                if len(heaviest) > top_n:
+                    heapq.heappop(heaviest)
+            parent = node.parent
+            if parent is None:
+                return
+            parent.size += node.size
+            parent.files += node.files
+            parent.pending -= 1
+            if parent.pending > 0:
+                return
+            node = parent
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        running = {pool.submit(scan_folder, root): root_node}
+        try:
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    size, files, subfolders = future.result()
+                    node.size += size
+                    node.files += files
+                    node.pending = len(subfolders)
+                    folders_done += 1
+                    bytes_seen += size
+                    for subfolder in subfolders:
+                        child = DirNode(subfolder, node, node.depth + 1)
+                        if node.depth < keep_depth:
+                            node.children.append(child)
+                        running[pool.submit(scan_folder, subfolder)] = child
+                    if not subfolders:
+                        finish(node)
+
+                now = time.perf_counter()
+                if show_progress and now - last_report > 0.25:
+                    last_report = now
+                    print(f"\rScanning... {folders_done} folders, {format_size(bytes_seen)} so far", end="", flush=True)
+        except KeyboardInterrupt:
+            for future in running:
+                future.cancel()
+            print()
+            raise
+    if show_progress:
+        print("\r" + " " * 60 + "\r", end="")
+    return root_node, sorted(heaviest, reverse=True)
+
+def du_command(arg=None):
+    """Shows the heaviest folders under a path, found with a parallel scan."""
+    parser = command_parser("du", "Show which folders use the most space.")
+    parser.add_argument("path", nargs="?", default=".", help="folder to scan (default: current folder)")
+    parser.add_argument("-n", "--top", type=int, default=15, metavar="N", help="show the N heaviest folders (default: 15)")
+    parser.add_argument("-j", "--jobs", type=int, default=min(16, (os.cpu_count() or 1) * 4), metavar="N",
+                        help="number of scanning threads")
+    options = parse_command_args(parser, arg)
+    if not os.path.isdir(options.path):
+        print(f"du: '{options.path}' is not a folder.")
+        return 1
+
+    start = time.perf_counter()
+    try:
+        root_node, heaviest = scan_tree(options.path, options.jobs, top_n=max(options.top, 1))
+    except KeyboardInterrupt:
+        print("Scan cancelled.")
+        return 1
+    for size, path in heaviest:
+        print(f"{format_size(size).rjust(10)}  {path}")
+    print(f"Total: {format_size(root_node.size)} in {root_node.files} files ({time.perf_counter() - start:.2f}s)")
+
+def tree_command(arg=None):
+    """Shows the folder tree under a path with the size of every folder, heaviest first."""
+    parser = command_parser("tree", "Show the folder tree with sizes, heaviest folders first.")
+    parser.add_argument("path", nargs="?", default=".", help="folder to scan (default: current folder)")
+    parser.add_argument("-d", "--depth", type=int, default=2, metavar="N", help="how many levels to show (default: 2)")
+    parser.add_argument("-n", "--top", type=int, default=10, metavar="N", help="subfolders shown per folder (default: 10)")
+    parser.add_argument("-j", "--jobs", type=int, default=min(16, (os.cpu_count() or 1) * 4), metavar="N",
+                        help="number of scanning threads")
+    options = parse_command_args(parser, arg)
+    if not os.path.isdir(options.path):
+        print(f"tree: '{options.path}' is not a folder.")
+        return 1
+
+    try:
+        root_node, _ = scan_tree(options.path, options.jobs, keep_depth=max(options.depth, 0))
+    except KeyboardInterrupt:
+        print("Scan cancelled.")
+        return 1
+
+    def show(node, prefix):
+        children = sorted(node.children, key=lambda child: child.size, reverse=True)
+        shown = children[:options.top]
+        for i, child in enumerate(shown):
+            last = i == len(shown) - 1 and len(children) <= options.top
+            print(f"{prefix}{'└── ' if last else '├── '}{os.path.basename(child.path)}  ({format_size(child.size)})")
+            show(child, prefix + ("    " if last else "│   "))
+        if len(children) > options.top:
+            rest = sum(child.size for child in children[options.top:])
+            print(f"{prefix}└── ... {len(children) - options.top} more ({format_size(rest)})")
+
+    print(f"{options.path}  ({format_size(root_node.size)}, {root_node.files} files)")
+    show(root_node, "")
+
+class TransferProgress:
+    """Counts bytes copied by many threads and prints a live throughput and ETA line."""
+
+    def __init__(self, total_bytes, total_files):
+        import threading
+        self.lock = threading.Lock()
+        self.total_bytes = total_bytes
+        self.total_files = total_files
+        self.bytes_done = 0
+        self.files_done = 0
+        self.start = time.perf_counter()
+        self.last_print = 0
+
+    def add(self, num_bytes, files=0):
+        with self.lock:
+            self.bytes_done += num_bytes
+            self.files_done += files
+
+    def show(self, final=False):
+        now = time.perf_counter()
+        if batch_mode or (not final and now - self.last_print < 0.2):
+            return
+        self.last_print = now
+        elapsed = max(now - self.start, 1e-6)
+        rate = self.bytes_done / elapsed
+        remaining = self.total_bytes - self.bytes_done
+        eta = f"{remaining / rate:.0f}s" if rate > 0 else "?"
+        percent = (self.bytes_done / self.total_bytes) * 100 if self.total_bytes else 100
+        line = (f"\r{format_size(self.bytes_done)} / {format_size(self.total_bytes)} ({percent:.0f}%), "
+                f"{self.files_done}/{self.total_files} files, {format_size(rate)}/s, ETA {eta}")
+        print(line.ljust(79), end="\n" if final else "", flush=True)
+
+def copy_file_data(src, dst, progress):
+    """
+    Copies one file's bytes, letting the kernel move the data where it can:
+    os.copy_file_range first, then os.sendfile, then a plain read/write loop.
+    """
+    chunk = 8 * 1024 * 1024
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        if hasattr(os, "copy_file_range"):
+            try:
+                while True:
+                    copied = os.copy_file_range(src_fd, dst_fd, chunk)
+                    if copied == 0:
+                        return
+                    progress.add(copied)
+            except OSError:
+                # Not supported between these filesystems, carry on from the same offset
+                pass
+        if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+            offset = os.lseek(src_fd, 0, os.SEEK_CUR)
+            try:
+                while True:
+                    sent = os.sendfile(dst_fd, src_fd, offset, chunk)
+                    if sent == 0:
+                        return
+                    offset += sent
+                    progress.add(sent)
+            except OSError:
+                # sendfile leaves the source position alone, so move it to where copying stopped
+                os.lseek(src_fd, offset, os.SEEK_SET)
+        buffer = bytearray(1024 * 1024)
+        view = memoryview(buffer)
+        while True:
+            n = fsrc.readinto(buffer)
+            if not n:
+                return
+            fdst.write(view[:n])
+            progress.add(n)
+
+def copy_one_file(src, dst, progress):
+    """Copies a file (or recreates a symlink) with its permissions and times."""
+    import shutil
+    import stat
+    mode = os.lstat(src).st_mode
+    if stat.S_ISLNK(mode):
+        if os.path.lexists(dst):
+            os.remove(dst)
+        os.symlink(os.readlink(src), dst)
+    elif stat.S_ISREG(mode):
+        copy_file_data(src, dst, progress)
+        shutil.copystat(src, dst)
+    else:
+        # Reading a pipe or device could block forever or never end
+        raise OSError(f"'{src}' is not a regular file, so it can't be copied")
+    progress.add(0, files=1)
+
+def expand_sources(patterns):
+    """Expands glob patterns into existing paths, keeping plain names as they are."""
+    import glob
+    sources = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"No files match '{pattern}'.")
+        sources.extend(matches)
+    return sources
+
+def plan_transfer(sources, destination):
+    """
+    Pairs every source with its target path.
+    With several sources, or an existing destination folder, sources go inside the destination.
+    """
+    into = len(sources) > 1 or os.path.isdir(destination)
+    if len(sources) > 1 and not os.path.isdir(destination):
+        raise UsageError(f"'{destination}' must be an existing folder when copying several items.")
+    pairs = []
+    for src in sources:
+        if not os.path.lexists(src):
+            print(f"'{src}' does not exist, skipping.")
+            continue
+        target = os.path.join(destination, os.path.basename(os.path.normpath(src))) if into else destination
+        if os.path.abspath(target) == os.path.abspath(src):
+            print(f"'{src}' is already there, skipping.")
+            continue
+        if os.path.isdir(src) and os.path.abspath(target).startswith(os.path.abspath(src) + os.sep):
+            print(f"Can't copy '{src}' into itself, skipping.")
+            continue
+        pairs.append((src, target))
+    return pairs
+
+def iter_copy_jobs(pairs, force, skipped, errors, folders=None):
+    """
+    Yields (source, target) for every file and symlink to copy, creating the target folders
+    (empty ones too) on the way and adding the source folders to folders.
+    Existing targets are left alone unless force is set; their paths are added to skipped.
+    Folders that can't be read are added to errors.
+    """
+    for src, target in pairs:
+        if os.path.isdir(src) and not os.path.islink(src):
+            os.makedirs(target, exist_ok=True)
+            if folders is not None:
+                folders.append(src)
+            for entry in walk_tree(src, errors):
+                target_file = os.path.join(target, os.path.relpath(entry.path, src))
+                try:
+                    is_folder = entry.is_dir(follow_symlinks=False)
+                except OSError as e:
+                    errors.append((entry.path, e))
+                    continue
+                if is_folder:
+                    try:
+                        os.makedirs(target_file, exist_ok=True)
+                    except OSError as e:
+                        errors.append((entry.path, e))
+                        continue
+                    if folders is not None:
+                        folders.append(entry.path)
+                    continue
+                if os.path.lexists(target_file) and not force:
+                    skipped.append(target_file)
+                    continue
+                yield entry.path, target_file
+        else:
+            if os.path.lexists(target) and not force:
+                skipped.append(target)
+                continue
+            yield src, target
+
+def count_transfer(pairs):
+    """Returns the number of files and bytes under the given sources."""
+    files = 0
+    total = 0
+    for src, _ in pairs:
+        if os.path.isdir(src) and not os.path.islink(src):
+            for entry in walk_tree(src):
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        continue
+                    files += 1
+                    total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+        else:
+            files += 1
+            total += os.lstat(src).st_size
+    return files, total
+
+def copy_items(pairs, force, jobs, copied=None, folders=None):
+    """
+    Copies files and folder trees with a pool of threads, so many small files overlap.
+    The sources that were copied are added to copied and the source folders to folders.
+    Returns the number of files and folders that failed.
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    files, total = count_transfer(pairs)
+    progress = TransferProgress(total, files)
+    failures = []
+    skipped = []
+    slot_count = max(jobs, 1) * 4
+    slots = threading.Semaphore(slot_count)
+
+    def run(src, dst):
+        try:
+            copy_one_file(src, dst, progress)
+            if copied is not None:
+                copied.append(src)
+        except OSError as e:
+            failures.append((src, e))
+        finally:
+            slots.release()
+
+    def wait_for_slot():
+        # Refresh the progress line while waiting
+        while not slots.acquire(timeout=0.2):
+            progress.show()
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        # Only a few files per thread are queued at once, so huge trees don't pile up in memory
+        for src, dst in iter_copy_jobs(pairs, force, skipped, failures, folders):
+            wait_for_slot()
+            pool.submit(run, src, dst)
+            progress.show()
+        # Holding every slot means every copy has finished
+        for _ in range(slot_count):
+            wait_for_slot()
+    progress.show(final=True)
+    if skipped:
+        print(f"Skipped {len(skipped)} existing file{'s' if len(skipped) != 1 else ''}, "
+              f"e.g. '{skipped[0]}' (use -f to overwrite).")
+    for src, error in failures:
+        print(f"Error copying '{src}': {error}")
+    return len(failures)
+
+def transfer_parser(prog, description):
+    """Creates the option parser shared by 'copy' and 'move'."""
+    parser = command_parser(prog, description)
+    parser.add_argument("sources", nargs="+", metavar="source", help="files or folders, glob patterns allowed")
+    parser.add_argument("destination", help="target file or folder")
+    parser.add_argument("-f", "--force", action="store_true", help="overwrite existing files")
+    parser.add_argument("-j", "--jobs", type=int, default=min(8, (os.cpu_count() or 1) * 2), metavar="N",
+                        help="number of copying threads")
+    return parser
+
+def copy_command(arg=None):
+    """Copies files and folders, using the kernel's zero-copy calls where possible."""
+    options = parse_command_args(transfer_parser("copy", "Copy files and folders."), arg)
+    pairs = plan_transfer(expand_sources(options.sources), options.destination)
+    if not pairs:
+        return
+    failed = copy_items(pairs, options.force, options.jobs)
+    print("Copy finished." if not failed else f"Copy finished with {failed} error{'s' if failed != 1 else ''}.")
+    if failed:
+        return 1
+
+def move_command(arg=None):
+    """
+    Moves files and folders. On the same drive this is a rename and takes no time;
+    across drives the items are copied and then removed.
+    """
+    import errno
+    options = parse_command_args(transfer_parser("move", "Move files and folders."), arg)
+    pairs = plan_transfer(expand_sources(options.sources), options.destination)
+
+    to_copy = []
+    for src, target in pairs:
+        if os.path.lexists(target) and not options.force:
+            print(f"'{target}' exists, skipping (use -f to overwrite).")
+            continue
+        try:
+            os.replace(src, target) if options.force else os.rename(src, target)
+            print(f"Moved '{src}' to '{target}'.")
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                print(f"Error moving '{src}': {e}")
+                continue
+            to_copy.append((src, target))
+
+    if to_copy:
+        print("Some items are on another drive, copying them...")
+        copied = []
+        folders = []
+        if copy_items(to_copy, options.force, options.jobs, copied, folders):
+            print("Some files could not be copied, so the originals were kept.")
+            return 1
+        # Only what was copied is removed; a folder goes once it is empty, deepest first
+        for path in copied:
+            os.remove(path)
+        left = 0
+        for folder in sorted(folders, key=lambda path: path.count(os.sep), reverse=True):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                left += 1
+        if left:
+            print(f"{left} folder{'s' if left != 1 else ''} still had files that were not moved and were kept.")
+        print("Move finished.")
+
+def hash_file(path):
+    """Returns the BLAKE2b digest of a file, read through a memory map a megabyte at a time."""
+    import hashlib
+    import mmap
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                view = memoryview(data)
+                try:
+                    # hashlib releases the GIL for big updates, so several threads hash at once
+                    for start in range(0, len(data), 1024 * 1024):
+                        digest.update(view[start:start + 1024 * 1024])
+                finally:
+                    view.release()
+    return digest.hexdigest()
+
+def open_hash_cache():
+    """Opens the cache of file digests, keyed by path and checked against size and modification time."""
+    import sqlite3
+    db = sqlite3.connect(state_path("hashes.db"))
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("CREATE TABLE IF NOT EXISTS hashes (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT)")
+    return db
+
+def find_duplicates(root, jobs):
+    """
+    Finds files with identical contents under root.
+    Files are grouped by size first, and only sizes shared by several files are hashed.
+    Digests are cached, so unchanged files are never hashed twice.
+    Returns a list of (size, [paths]) for every set of duplicates, and a dict from path to
+    the (size, mtime_ns, inode) its digest belongs to, so callers can tell if a file changed since.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    by_size = {}
+    for entry in walk_entries(root):
+        try:
+            info = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        if info.st_size == 0:
+            continue
+        by_size.setdefault(info.st_size, {})
+        # Files that are already hard links of each other count once
+        by_size[info.st_size].setdefault((info.st_dev, info.st_ino), (os.path.abspath(entry.path), info.st_mtime_ns, info.st_ino))
+    candidates = [(size, list(files.values())) for size, files in by_size.items() if len(files) > 1]
+    by_size = None
+
+    signatures = {path: (size, mtime_ns, ino) for size, files in candidates for path, mtime_ns, ino in files}
+    db = open_hash_cache()
+    try:
+        digests = {}
+        to_hash = []
+        for size, files in candidates:
+            for path, mtime_ns, _ in files:
+                row = db.execute("SELECT size, mtime_ns, digest FROM hashes WHERE path = ?", (path,)).fetchone()
+                if row and row[0] == size and row[1] == mtime_ns:
+                    digests[path] = row[2]
+                else:
+                    to_hash.append((path, size, mtime_ns))
+
+        if to_hash:
+            total = sum(size for _, size, _ in to_hash)
+            print(f"Hashing {len(to_hash)} file{'s' if len(to_hash) != 1 else ''} ({format_size(total)}), "
+                  f"{len(digests)} cached...")
+
+            def work(item):
+                path, size, mtime_ns = item
+                try:
+                    digest = hash_file(path)
+                    info = os.lstat(path)
+                except (OSError, ValueError):
+                    return item, None
+                # A file written to while it was hashed has no trustworthy digest
+                if (info.st_size, info.st_mtime_ns, info.st_ino) != signatures[path]:
+                    return item, None
+                return item, digest
+
+            with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool, db:
+                for (path, size, mtime_ns), digest in pool.map(work, to_hash):
+                    if digest:
+                        digests[path] = digest
+                        db.execute("INSERT OR REPLACE INTO hashes (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                                   (path, size, mtime_ns, digest))
+    finally:
+        db.close()
+
+    duplicates = []
+    for size, files in candidates:
+        by_digest = {}
+        for path, _, _ in files:
+            if path in digests:
+                by_digest.setdefault(digests[path], []).append(path)
+        for paths in by_digest.values():
+            if len(paths) > 1:
+                duplicates.append((size, sorted(paths)))
+    # Biggest waste first
+    duplicates.sort(key=lambda item: item[0] * (len(item[1]) - 1), reverse=True)
+    return duplicates, signatures
+
+def replace_with_hardlink(original, duplicate, signatures):
+    """
+    Replaces duplicate with a hard link to original, in one atomic rename.
+    Both files are checked against their (size, mtime_ns, inode) from when they were hashed
+    right before the rename; if either changed, nothing is replaced and False is returned.
+    """
+    temp_path = duplicate + ".minios-link"
+    os.link(original, temp_path)
+    try:
+        for path in (original, duplicate):
+            info = os.lstat(path)
+            if (info.st_size, info.st_mtime_ns, info.st_ino) != signatures[path]:
+                os.remove(temp_path)
+                return False
+        os.replace(temp_path, duplicate)
+    except OSError:
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        raise
+    return True
+
+def dedupe_command(arg=None):
+    """Finds duplicate files and can replace the copies with hard links."""
+    parser = command_parser("dedupe", "Find files with identical contents.")
+    parser.add_argument("path", nargs="?", default=".", help="folder to check (default: current folder)")
+    parser.add_argument("--link", action="store_true", help="replace duplicates with hard links to the first file")
+    parser.add_argument("-n", "--top", type=int, default=20, metavar="N", help="show the N biggest sets (default: 20)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, metavar="N", help="number of hashing threads")
+    options = parse_command_args(parser, arg)
+    if not os.path.isdir(options.path):
+        print(f"dedupe: '{options.path}' is not a folder.")
+        return 1
+
+    start = time.perf_counter()
+    duplicates, signatures = find_duplicates(options.path, options.jobs)
+    elapsed = time.perf_counter() - start
+    if not duplicates:
+        print(f"No duplicate files found ({elapsed:.2f}s).")
+        return
+
+    wasted = sum(size * (len(paths) - 1) for size, paths in duplicates)
+    for size, paths in duplicates[:options.top]:
+        print(f"\n{len(paths)} copies of {format_size(size)}:")
+        for path in paths:
+            print(f"  {os.path.relpath(path)}")
+    if len(duplicates) > options.top:
+        print(f"\n... and {len(duplicates) - options.top} more sets (use -n to show more)")
+    print(f"\n{len(duplicates)} duplicate set{'s' if len(duplicates) != 1 else ''}, "
+          f"{format_size(wasted)} could be saved ({elapsed:.2f}s).")
+
+    if not options.link:
+        return
+    confirm = input("Replace the duplicates with hard links to the first file of each set? (yes/no): ").strip().lower()
+    if confirm != 'yes':
+        print("Nothing changed.")
+        return
+    linked = 0
+    failed = 0
+    for size, paths in duplicates:
+        original = paths[0]
+        for duplicate in paths[1:]:
+            try:
+                if replace_with_hardlink(original, duplicate, signatures):
+                    linked += 1
+                else:
+                    print(f"Skipping '{os.path.relpath(duplicate)}': it or '{os.path.relpath(original)}' changed since it was hashed.")
+                    failed += 1
+            except OSError as e:
+                print(f"Could not link '{duplicate}': {e}")
+                failed += 1
+    print(f"Replaced {linked} file{'s' if linked != 1 else ''} with hard links.")
+    if failed:
+        return 1
+
+def archive_format(path):
+    """Returns 'zip', 'gz', 'xz' or 'tar' from an archive file name, or None if it is not an archive."""
+    name = path.lower()
+    if name.endswith(".zip"):
+        return "zip"
+    if name.endswith((".tar.gz", ".tgz")):
+        return "gz"
+    if name.endswith((".tar.xz", ".txz")):
+        return "xz"
+    if name.endswith(".tar"):
+        return "tar"
+    return None
+
+def compress_chunk(data, kind, level):
+    """
+    Compresses one chunk of a tar stream into a complete gzip member or xz stream.
+    Runs in a worker process for 'pack --parallel'. Concatenated members form a valid archive.
+    """
+    if kind == "gz":
+        import gzip
+        return gzip.compress(data, compresslevel=level)
+    import lzma
+    return lzma.compress(data, preset=level)
+
+class ParallelCompressor:
+    """
+    A write-only file object that cuts what is written into fixed-size chunks
+    and compresses them in a process pool, writing the results in order.
+    At most a few chunks per process are in flight, so memory use stays bounded.
+    """
+    CHUNK_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, output, kind, level, jobs):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        methods = multiprocessing.get_all_start_methods()
+        # Forking a process that runs threads is unsafe, so use a clean start method
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.pool = ProcessPoolExecutor(max_workers=jobs, mp_context=context)
+        self.output = output
+        self.kind = kind
+        self.level = level
+        self.max_in_flight = jobs * 2
+        self.in_flight = []
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.CHUNK_SIZE:
+            self.submit(bytes(self.buffer[:self.CHUNK_SIZE]))
+            del self.buffer[:self.CHUNK_SIZE]
+        return len(data)
+
+    def submit(self, chunk):
+        if len(self.in_flight) >= self.max_in_flight:
+            self.output.write(self.in_flight.pop(0).result())
+        self.in_flight.append(self.pool.submit(compress_chunk, chunk, self.kind, self.level))
+
+    def close(self):
+        if self.buffer:
+            self.submit(bytes(self.buffer))
+            self.buffer = bytearray()
+        for future in self.in_flight:
+            self.output.write(future.result())
+        self.in_flight = []
+        self.pool.shutdown()
+
+def pack_command(arg=None):
+    """Packs a file or folder into a .zip, .tar.gz, .tar.xz or .tar archive."""
+    import tarfile
+    import zipfile
+    parser = command_parser("pack", "Pack a file or folder into an archive (.zip, .tar.gz, .tar.xz, .tar).")
+    parser.add_argument("source", help="file or folder to pack")
+    parser.add_argument("archive", help="archive to create; the format comes from its extension")
+    parser.add_argument("-l", "--level", type=int, default=6, choices=range(0, 10), metavar="0-9",
+                        help="compression level, 0 is fastest, 9 is smallest (default: 6)")
+    parser.add_argument("--parallel", action="store_true",
+                        help="compress with several processes (.tar.gz and .tar.xz only)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, metavar="N",
+                        help="number of processes for --parallel")
+    options = parse_command_args(parser, arg)
+
+    kind = archive_format(options.archive)
+    if kind is None:
+        raise UsageError("pack: the archive name must end with .zip, .tar.gz, .tgz, .tar.xz, .txz or .tar")
+    if not os.path.exists(options.source):
+        print(f"pack: '{options.source}' does not exist.")
+        return 1
+    if os.path.exists(options.archive):
+        print(f"pack: '{options.archive}' already exists.")
+        return 1
+    if os.path.isdir(options.source) and os.path.abspath(options.archive).startswith(os.path.abspath(options.source) + os.sep):
+        print("pack: the archive can't be inside the folder being packed.")
+        return 1
+
+    base = os.path.basename(os.path.normpath(options.source))
+    paths = [options.source]
+    if os.path.isdir(options.source) and not os.path.islink(options.source):
+        # Every entry, like tarfile.add packs: empty folders, symlinks and .minios too
+        paths.extend(entry.path for entry in walk_tree(options.source))
+    start = time.perf_counter()
+    files = 0
+    original_size = 0
+
+    try:
+        if kind == "zip":
+            if options.parallel:
+                print("Parallel packing is only available for .tar.gz and .tar.xz, packing one file at a time.")
+            with zipfile.ZipFile(options.archive, "w", zipfile.ZIP_DEFLATED if options.level else zipfile.ZIP_STORED,
+                                 compresslevel=options.level or None) as archive:
+                for path in paths:
+                    arcname = os.path.join(base, os.path.relpath(path, options.source)) if path != options.source else base
+                    if os.path.islink(path):
+                        # Stored as a link, with the Unix file type in the high bits, as tar does
+                        link_stat = os.lstat(path)
+                        info = zipfile.ZipInfo(arcname, time.localtime(max(link_stat.st_mtime, 315532800))[:6])
+                        info.external_attr = link_stat.st_mode << 16
+                        archive.writestr(info, os.readlink(path))
+                        continue
+                    # ZipFile.write streams the file in chunks
+                    archive.write(path, arcname)
+                    if os.path.isfile(path):
+                        files += 1
+                        original_size += os.path.getsize(path)
+        else:
+            with open(options.archive, "wb") as output:
+                if options.parallel and kind in ("gz", "xz"):
+                    # Write a plain tar stream and let the worker processes compress it
+                    sink = ParallelCompressor(output, kind, options.level, max(options.jobs, 1))
+                    archive = tarfile.open(fileobj=sink, mode="w|")
+                else:
+                    if options.parallel:
+                        print("Parallel packing is only available for .tar.gz and .tar.xz, packing in one process.")
+                    sink = None
+                    if kind == "gz":
+                        archive = tarfile.open(fileobj=output, mode="w:gz", compresslevel=options.level)
+                    elif kind == "xz":
+                        archive = tarfile.open(fileobj=output, mode="w:xz", preset=options.level)
+                    else:
+                        archive = tarfile.open(fileobj=output, mode="w")
+                try:
+                    with archive:
+                        # tarfile.add streams each file through a fixed-size buffer
+                        archive.add(options.source, arcname=base)
+                finally:
+                    if sink is not None:
+                        sink.close()
+            for path in paths:
+                if os.path.isfile(path) and not os.path.islink(path):
+                    files += 1
+                    original_size += os.path.getsize(path)
+    except BaseException as e:
+        # Never leave a half-written archive behind, whatever stopped the packing
+        if os.path.exists(options.archive):
+            os.remove(options.archive)
+        if isinstance(e, KeyboardInterrupt):
+            print("\nPacking cancelled.")
+        elif isinstance(e, Exception):
+            print(f"pack: could not pack '{options.source}': {e}")
+        else:
+            raise
+        return 1
+
+    packed_size = os.path.getsize(options.archive)
+    ratio = (packed_size / original_size) * 100 if original_size else 100
+    print(f"Packed {files} file{'s' if files != 1 else ''}: {format_size(original_size)} -> "
+          f"{format_size(packed_size)} ({ratio:.0f}%) in {time.perf_counter() - start:.2f}s.")
+
+def unpack_command(arg=None):
+    """Unpacks a .zip, .tar.gz, .tar.xz or .tar archive into a folder."""
+    import tarfile
+    import zipfile
+    parser = command_parser("unpack", "Unpack an archive (.zip, .tar.gz, .tar.xz, .tar).")
+    parser.add_argument("archive", help="archive to unpack")
+    parser.add_argument("destination", nargs="?", default=".", help="folder to unpack into (default: current folder)")
+    options = parse_command_args(parser, arg)
+
+    kind = archive_format(options.archive)
+    if not os.path.isfile(options.archive):
+        print(f"unpack: '{options.archive}' does not exist.")
+        return 1
+    if kind is None:
+        raise UsageError("unpack: only .zip, .tar.gz, .tgz, .tar.xz, .txz and .tar archives are supported")
+
+    start = time.perf_counter()
+    os.makedirs(options.destination, exist_ok=True)
+    try:
+        if kind == "zip":
+            with zipfile.ZipFile(options.archive) as archive:
+                # zipfile strips absolute paths and '..' from member names
+                archive.extractall(options.destination)
+                count = len(archive.infolist())
+        else:
+            # Members are extracted one by one while reading front to back.
+            # Stream mode ('r|*') can't be used: it stops after the first of several gzip members
+            # or xz streams, which is how 'pack --parallel' writes archives.
+            with tarfile.open(options.archive, "r:*") as archive:
+                count = 0
+                destination = os.path.abspath(options.destination)
+                for member in archive:
+                    if hasattr(tarfile, "data_filter"):
+                        # The 'data' filter refuses absolute paths, '..', device files and links leaving the folder
+                        try:
+                            archive.extract(member, destination, filter="data")
+                        except tarfile.FilterError as e:
+                            print(f"Skipping '{member.name}': {e}")
+                            continue
+                    else:
+                        target = os.path.abspath(os.path.join(destination, member.name))
+                        if not target.startswith(destination + os.sep) or member.issym() or member.islnk() or member.isdev():
+                            print(f"Skipping '{member.name}': not safe to unpack.")
+                            continue
+                        archive.extract(member, destination)
+                    count += 1
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError) as e:
+        print(f"unpack: '{options.archive}' is damaged or not an archive: {e}")
+        return 1
+    print(f"Unpacked {count} item{'s' if count != 1 else ''} into '{options.destination}' in {time.perf_counter() - start:.2f}s.")
+
+def percentile(sorted_values, fraction):
+    """Returns the nearest-rank percentile of an already sorted list, e.g. fraction=0.95 for p95."""
+    import math
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def load_bench_history():
+    """Returns the saved benchmark results: script path -> list of results, oldest first."""
+    import json
+    try:
+        with open(state_path(BENCH_HISTORY_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_bench_history(history):
+    """Saves the benchmark results, replacing the file in one step so it is never half written."""
+    import json
+    path = state_path(BENCH_HISTORY_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(history, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+def summarize_bench_runs(results):
+    """Turns the results of the timed runs into the statistics that are shown and saved."""
+    import statistics
+    walls = sorted(result["wall"] for result in results)
+    summary = {
+        "min": walls[0],
+        "median": statistics.median(walls),
+        "p95": percentile(walls, 0.95),
+        "stdev": statistics.stdev(walls) if len(walls) > 1 else 0.0,
+        "runs": len(walls),
+    }
+    if all(result.get("user") is not None for result in results):
+        summary["user"] = statistics.median(result["user"] for result in results)
+        summary["sys"] = statistics.median(result["sys"] for result in results)
+    if all(result.get("maxrss") is not None for result in results):
+        summary["maxrss"] = max(result["maxrss"] for result in results)
+    return summary
+
+def find_bench_regressions(previous, current):
+    """
+    Compares a benchmark with the previous one of the same script.
+    Wall time only counts as slower when the median grew by more than BENCH_REGRESSION_THRESHOLD
+    and the fastest new run is slower than the old median, so ordinary noise is not reported.
+    Returns a list of messages, empty if nothing got worse.
+    """
+    regressions = []
+    change = current["median"] / previous["median"] - 1 if previous["median"] else 0
+    if change > BENCH_REGRESSION_THRESHOLD and current["min"] > previous["median"]:
+        regressions.append(f"median wall time is {change * 100:.0f}% slower")
+    if current.get("maxrss") and previous.get("maxrss"):
+        memory_change = current["maxrss"] / previous["maxrss"] - 1
+        if memory_change > BENCH_REGRESSION_THRESHOLD:
+            regressions.append(f"peak RSS is {memory_change * 100:.0f}% higher")
+    return regressions
+
+def bench_command(arg=None):
+    """Runs a Python script many times and reports how long it takes and how much memory it uses."""
+    import datetime
+    parser = command_parser("bench", "Time a Python script over repeated runs.")
+    parser.add_argument("file", help="the .py file to benchmark")
+    parser.add_argument("-n", "--runs", type=int, default=10, metavar="N", help="number of timed runs (default: 10)")
+    parser.add_argument("--warmup", type=int, default=1, metavar="K",
+                        help="untimed runs before timing starts (default: 1)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                        help="run N copies at the same time (default: 1, one after another)")
+    options = parse_command_args(parser, arg)
+    if options.runs < 1 or options.warmup < 0 or options.jobs < 1:
+        raise UsageError("bench: -n and -j must be at least 1, --warmup at least 0")
+    if not options.file.endswith(".py"):
+        raise UsageError("bench: can only benchmark Python (.py) files")
+    if not os.path.isfile(options.file):
+        print(f"bench: '{options.file}' does not exist.")
+        return 1
+    path = os.path.abspath(options.file)
+    jobs = min(options.jobs, options.runs)
+
+    def timed_run(_):
+        result, _, errors = stream_python_script(path, echo=False)
+        if result["status"] != 0:
+            raise RuntimeError(f"'{options.file}' failed (exit status {result['status']}): {errors.last_line()}")
+        return result
+
+    print(f"Benchmarking '{options.file}': {options.runs} runs after {options.warmup} warmup, "
+          f"{jobs} at a time...")
+    for i in range(options.warmup):
+        timed_run(i)
+    if jobs > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(timed_run, range(options.runs)))
+    else:
+        results = []
+        for i in range(options.runs):
+            if not batch_mode:
+                print(f"\r  run {i + 1}/{options.runs}", end="", flush=True)
+            results.append(timed_run(i))
+        if not batch_mode:
+            print("\r" + " " * 20 + "\r", end="")
+
+    summary = summarize_bench_runs(results)
+    summary["jobs"] = jobs
+    summary["date"] = datetime.datetime.now().isoformat(timespec="seconds")
+    print(f"  wall    min {summary['min'] * 1000:.2f} ms | median {summary['median'] * 1000:.2f} ms | "
+          f"p95 {summary['p95'] * 1000:.2f} ms | stdev {summary['stdev'] * 1000:.2f} ms")
+    if "user" in summary:
+        print(f"  CPU     median user {summary['user'] * 1000:.2f} ms | sys {summary['sys'] * 1000:.2f} ms")
+    if "maxrss" in summary:
+        print(f"  memory  peak RSS {format_size(summary['maxrss'])}")
+    if jobs > 1:
+        print(f"  ({jobs} copies ran at once, so times include waiting for the CPU)")
+
+    history = load_bench_history()
+    runs = history.setdefault(path, [])
+    # Only results taken the same way can be compared
+    previous = next((old for old in reversed(runs) if old.get("jobs", 1) == jobs), None)
+    if previous is not None:
+        change = summary["median"] / previous["median"] - 1 if previous["median"] else 0
+        print(f"\nPrevious run ({previous['date']}): median {previous['median'] * 1000:.2f} ms ({change * 100:+.1f}%)")
+        regressions = find_bench_regressions(previous, summary)
+        for message in regressions:
+            print(f"REGRESSION: {message} than the previous run.")
+        if not regressions:
+            print("No regression.")
+    runs.append(summary)
+    del runs[:-BENCH_HISTORY_LIMIT]
+    save_bench_history(history)
+
+class ThreadRouter:
+    """
+    Stands in for sys.stdout, sys.stderr or sys.stdin and gives each thread its own stream.
+    Threads without a route of their own (like the prompt) keep using the original stream,
+    so input() still gets line editing on a terminal.
+    """
+    def __init__(self, default):
+        self.default = default
+        self.routes = {}
+
+    def target(self):
+        """Returns the stream of the calling thread."""
+        return self.routes.get(_thread.get_ident(), self.default)
+
+    def routed(self):
+        """Returns True if the calling thread has a stream of its own (a job or a pipeline stage)."""
+        return _thread.get_ident() in self.routes
+
+    def write(self, text):
+        return self.target().write(text)
+
+    def flush(self):
+        return self.target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.target(), name)
+
+def install_thread_routers():
+    """Puts ThreadRouters in place of sys.stdin, sys.stdout and sys.stderr (once)."""
+    for name in ["stdin", "stdout", "stderr"]:
+        if not isinstance(getattr(sys, name), ThreadRouter):
+            setattr(sys, name, ThreadRouter(getattr(sys, name)))
 
-def main():
+class JobOutput:
+    """
+    The stdout and stderr of a background job.
+    The last JOB_OUTPUT_TAIL bytes are kept in a ring buffer; while the job is in the foreground
+    the output also goes to the screen.
+    """
+    encoding = "utf-8"
+
+    def __init__(self):
+        self.tail = OutputTail(JOB_OUTPUT_TAIL)
+        self.lock = _thread.allocate_lock()
+        self.screen = None
+        self.cancelled = False
+
+    def write(self, text):
+        if self.cancelled:
+            # See kill_job(): the job stops the next time it prints
+            raise KeyboardInterrupt
+        with self.lock:
+            self.tail.write(text.encode(errors="replace"))
+            if self.screen is not None:
+                self.screen.write(text)
+        return len(text)
+
+    def flush(self):
+        with self.lock:
+            if self.screen is not None:
+                self.screen.flush()
+
+    def isatty(self):
+        return False
+
+    def show(self, screen):
+        """Prints the kept output to screen and sends all further output there as well."""
+        with self.lock:
+            screen.write(self.tail.getvalue().decode(errors="replace"))
+            screen.flush()
+            self.screen = screen
+
+    def hide(self):
+        """Stops showing the output on the screen."""
+        with self.lock:
+            self.screen = None
+
+class Job:
+    """A command line running in a background thread, with the scripts it started."""
+    def __init__(self, job_id, command):
+        self.job_id = job_id
+        self.command = command
+        self.output = JobOutput()
+        self.scripts = []
+        self.state = "running"
+        self.status = None
+        self.started = time.time()
+        self.finished = None
+        self.thread = None
+        self.native_id = None
+        self.thread_cpu = None
+
+def current_job():
+    """Returns the job the calling thread is running, or None for the prompt."""
+    return job_threads.get(_thread.get_ident())
+
+def run_job(job):
+    """The body of a job thread: runs the command line with its input and output routed to the job."""
+    import io
+    import threading
+    ident = _thread.get_ident()
+    job.native_id = threading.get_native_id()
+    job_threads[ident] = job
+    sys.stdout.routes[ident] = job.output
+    sys.stderr.routes[ident] = job.output
+    # Commands that ask for input see the end of input instead of competing with the prompt
+    sys.stdin.routes[ident] = io.StringIO()
+    try:
+        job.status = run_command(job.command)
+    except KeyboardInterrupt:
+        job.state = "killed"
+    except SystemExit:
+        job.status = 0
+    finally:
+        job.thread_cpu = time.thread_time()
+        for router in [sys.stdout, sys.stderr, sys.stdin]:
+            router.routes.pop(ident, None)
+        del job_threads[ident]
+        job.finished = time.time()
+        if job.state == "running":
+            job.state = "done"
+
+def start_job(command_line):
+    """Runs a command line as a background job and returns the Job."""
+    import threading
+    install_thread_routers()
+    job_id = max(job_table, default=0) + 1
+    job = Job(job_id, command_line)
+    job_table[job_id] = job
+    job.thread = threading.Thread(target=run_job, args=(job,), name=f"job-{job_id}", daemon=True)
+    job.thread.start()
+    return job
+
+def read_proc_usage(folder):
+    """
+    Returns (CPU seconds, resident memory in bytes) of a process or thread from its /proc folder,
+    e.g. '/proc/123' or '/proc/self/task/456'. Returns None where /proc is not available.
+    """
+    try:
+        with open(os.path.join(folder, "stat"), "rb") as f:
+            fields = f.read().rsplit(b")", 1)[1].split()
+        with open(os.path.join(folder, "statm"), "rb") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    # Fields after the command name: state is 0, utime is 11 and stime is 12
+    return (int(fields[11]) + int(fields[12])) / ticks, resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+def job_usage(job):
+    """Returns (CPU seconds, peak or current memory in bytes or None) of a job and the scripts it started."""
+    if job.thread_cpu is not None:
+        cpu = job.thread_cpu
+    else:
+        usage = read_proc_usage(f"/proc/self/task/{job.native_id}")
+        cpu = usage[0] if usage else 0.0
+    memory = None
+    for script in job.scripts:
+        result = script.poll()
+        if result is not None:
+            cpu += (result.get("user") or 0) + (result.get("sys") or 0)
+            rss = result.get("maxrss")
+        else:
+            usage = read_proc_usage(f"/proc/{script.pid}")
+            if usage is None:
+                continue
+            cpu += usage[0]
+            rss = usage[1]
+        if rss is not None:
+            memory = max(memory or 0, rss)
+    return cpu, memory
+
+def stop_job_scripts(job):
+    """Sends SIGTERM to the running scripts of a job (and everything they started). Returns True if there were any."""
+    import signal
+    stopped = False
+    for script in job.scripts:
+        if script.poll() is None:
+            try:
+                if hasattr(os, "killpg"):
+                    os.killpg(script.pid, signal.SIGTERM)
+                else:
+                    os.kill(script.pid, signal.SIGTERM)
+                stopped = True
+            except OSError:
+                pass
+    return stopped
+
+def kill_job(job):
+    """
+    Stops a job. Scripts it started get SIGTERM. A job that is running MiniOS code instead
+    gets KeyboardInterrupt the next time it prints (or starts a script); threads cannot be
+    stopped safely at an arbitrary point, so pure-Python work that never prints can't be
+    killed and runs until it finishes on its own.
+    """
+    job.state = "killed"
+    if not stop_job_scripts(job):
+        job.output.cancelled = True
+
+def describe_job_end(job):
+    """Returns how a finished job ended, e.g. 'done', 'failed (status 1)' or 'killed'."""
+    if job.state == "killed":
+        return "killed"
+    return "done" if job.status == 0 else f"failed (status {job.status})"
+
+def report_finished_jobs():
+    """Tells about background jobs that ended since the last prompt and removes them from the table."""
+    for job_id, job in list(job_table.items()):
+        if not job.thread.is_alive():
+            print(f"[{job_id}] {describe_job_end(job)}  {job.command}")
+            del job_table[job_id]
+
+def find_job(arg):
+    """Returns the job given as 'N' or '%N', or the newest job if arg is empty."""
+    if not job_table:
+        raise UsageError("No background jobs.")
+    if not arg:
+        return job_table[max(job_table)]
+    try:
+        return job_table[int(arg.strip().lstrip("%"))]
+    except (ValueError, KeyError):
+        raise UsageError(f"No job '{arg.strip()}'. Type 'jobs' to see them.")
+
+def jobs_command(arg=None):
+    """Shows the background jobs with their running time, CPU time and memory."""
+    if not job_table:
+        print("No background jobs.")
+        return
+    now = time.time()
+    print(f"{'JOB':<6}{'STATE':<18}{'TIME':>9}{'CPU':>10}{'MEMORY':>11}  COMMAND")
+    for job_id, job in sorted(job_table.items()):
+        alive = job.thread.is_alive()
+        state = ("killing" if job.state == "killed" else "running") if alive else describe_job_end(job)
+        elapsed = (now if alive else job.finished) - job.started
+        cpu, memory = job_usage(job)
+        memory_text = format_size(memory) if memory is not None else "-"
+        print(f"{'[' + str(job_id) + ']':<6}{state:<18}{elapsed:8.1f}s{cpu:9.2f}s{memory_text:>11}  {job.command}")
+        if not alive:
+            del job_table[job_id]
+
+def fg_command(arg=None):
+    """Shows a background job's output so far and waits for it; Ctrl+C stops it."""
+    job = find_job(arg)
+    print(f"[{job.job_id}] {job.command}")
+    screen = sys.stdout.target()
+    job.output.show(screen)
+    try:
+        while job.thread.is_alive():
+            try:
+                job.thread.join()
+            except KeyboardInterrupt:
+                kill_job(job)
+    finally:
+        job.output.hide()
+    print(f"[{job.job_id}] {describe_job_end(job)}")
+    del job_table[job.job_id]
+
+def kill_command(arg=None):
+    """Stops a background job."""
+    if not arg:
+        raise UsageError("Usage: kill <job number>")
+    job = find_job(arg)
+    if not job.thread.is_alive():
+        print(f"[{job.job_id}] has already ended.")
+        return
+    kill_job(job)
+    print(f"[{job.job_id}] stopping: {job.command}")
+
+class PipeProducer:
+    """
+    Runs the first command of a pipeline in a thread and turns what it prints into lines.
+    Lines travel in small batches through a bounded queue: a command that prints faster than the
+    rest of the pipeline reads simply waits, so memory stays the same however long the output is.
+    Once the pipeline is closed, the command's next print raises BrokenPipeError and it stops.
+    """
+    encoding = "utf-8"
+
+    def __init__(self, command_line):
+        import io
+        import queue
+        import threading
+        install_thread_routers()
+        self.queue = queue.Queue(maxsize=PIPE_QUEUE_BATCHES)
+        self.partial = ""
+        self.batch = []
+        self.last_send = time.perf_counter()
+        self.closed = False
+        self.status = None
+        # The command reports errors where the caller would. Like a job it sees the end of input,
+        # so commands with prompts or pagers (like 'list') don't wait for keys nobody sees.
+        self.thread = threading.Thread(target=self.run, name="pipe",
+                                       args=(command_line, io.StringIO(), sys.stderr.target(), current_job()),
+                                       daemon=True)
+        self.thread.start()
+
+    def put(self, item):
+        """Puts a batch into the queue, waiting while it is full, unless the pipeline gets closed."""
+        import queue
+        while True:
+            if self.closed:
+                raise BrokenPipeError("the rest of the pipeline has finished")
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def write(self, text):
+        if self.closed:
+            raise BrokenPipeError("the rest of the pipeline has finished")
+        if "\n" not in text:
+            self.partial += text
+            return len(text)
+        lines = (self.partial + text).split("\n")
+        self.partial = lines.pop()
+        self.batch.extend(lines)
+        # Send full batches, and anything waiting for a while so slow commands still show up live
+        if len(self.batch) >= PIPE_BATCH_LINES or time.perf_counter() - self.last_send > 0.05:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.batch:
+            batch, self.batch = self.batch, []
+            self.put(batch)
+            self.last_send = time.perf_counter()
+
+    def isatty(self):
+        return False
+
+    def run(self, command_line, stdin, stderr, job):
+        """The body of the producer thread."""
+        ident = _thread.get_ident()
+        sys.stdout.routes[ident] = self
+        sys.stderr.routes[ident] = stderr
+        sys.stdin.routes[ident] = stdin
+        if job is not None:
+            job_threads[ident] = job
+        try:
+            self.status = run_command(command_line)
+            if self.partial:
+                self.batch.append(self.partial)
+            self.flush()
+        except (BrokenPipeError, KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            for router in [sys.stdout, sys.stderr, sys.stdin]:
+                router.routes.pop(ident, None)
+            job_threads.pop(ident, None)
+            try:
+                self.put(None)
+            except BrokenPipeError:
+                pass
+
+    def lines(self):
+        """Yields the lines the command prints, as it prints them."""
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                return
+            yield from batch
+
+    def close(self):
+        """Stops the command at its next print and frees it if it is waiting for room in the queue."""
+        import queue
+        self.closed = True
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+def split_pipeline(command_line):
+    """Splits a command line at every '|' that is not inside quotes."""
+    stages = []
+    current = []
+    quote = None
+    for char in command_line:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "|":
+            stages.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    stages.append("".join(current).strip())
+    return stages
+
+def parse_line_count(name, arg):
+    """Parses the 'N' or '-n N' of head and tail."""
+    parser = command_parser(name, f"Keep the {'first' if name == 'head' else 'last'} lines (in a pipeline).")
+    parser.add_argument("count", nargs="?", type=int, help="number of lines (default: 10)")
+    parser.add_argument("-n", "--lines", type=int, metavar="N", help="number of lines")
+    options = parse_command_args(parser, arg)
+    count = options.lines if options.lines is not None else options.count
+    return 10 if count is None else max(count, 0)
+
+def parse_sort_options(arg):
+    """Parses the options of sort and returns (key function or None, reverse)."""
+    import re
+    parser = command_parser("sort", "Sort the lines (in a pipeline).")
+    parser.add_argument("-r", "--reverse", action="store_true", help="largest first")
+    parser.add_argument("-n", "--numeric", action="store_true", help="compare the number at the start of each line")
+    options = parse_command_args(parser, arg)
+    key = None
+    if options.numeric:
+        number = re.compile(r"\s*([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)")
+
+        def key(line):
+            # Lines without a number go first, like in the Unix sort
+            match = number.match(line)
+            return float(match.group(1)) if match else float("-inf")
+    return key, options.reverse
+
+def pipe_grep(lines, arg):
+    """Keeps the lines that match a pattern."""
+    import re
+    parser = command_parser("grep", "Keep the lines that match a pattern (in a pipeline).")
+    parser.add_argument("pattern", help="regular expression to look for")
+    parser.add_argument("-i", "--ignore-case", action="store_true", help="ignore upper/lower case")
+    parser.add_argument("-v", "--invert", action="store_true", help="keep the lines that do NOT match")
+    parser.add_argument("-F", "--fixed", action="store_true", help="treat the pattern as plain text")
+    options = parse_command_args(parser, arg)
+    pattern = re.escape(options.pattern) if options.fixed else options.pattern
+    try:
+        search = re.compile(pattern, re.IGNORECASE if options.ignore_case else 0).search
+    except re.error as e:
+        raise UsageError(f"grep: invalid pattern: {e}")
+    if options.invert:
+        return (line for line in lines if not search(line))
+    return (line for line in lines if search(line))
+
+def pipe_sort(lines, arg):
+    """Sorts the lines. Sorting has to see every line first, so this is the one filter that keeps them all."""
+    key, reverse = parse_sort_options(arg)
+    return iter(sorted(lines, key=key, reverse=reverse))
+
+def pipe_sorted_head(lines, sort_arg, head_arg):
+    """'sort | head N' in one step: keeps only N lines in a heap instead of sorting everything."""
+    import heapq
+    key, reverse = parse_sort_options(sort_arg)
+    count = parse_line_count("head", head_arg)
+    select = heapq.nlargest if reverse else heapq.nsmallest
+
+    def sorted_head():
+        # Run lazily, so nothing is read before the pipeline starts pulling lines
+        yield from select(count, lines, key=key)
+    return sorted_head()
+
+def pipe_head(lines, arg):
+    """Keeps the first N lines, then stops reading (which also stops the command before it)."""
+    import itertools
+    return itertools.islice(lines, parse_line_count("head", arg))
+
+def pipe_tail(lines, arg):
+    """Keeps the last N lines."""
+    import collections
+    count = parse_line_count("tail", arg)
+
+    def tail():
+        yield from collections.deque(lines, maxlen=count)
+    return tail()
+
+def pipe_uniq(lines, arg):
+    """Drops repeated neighbouring lines, like the Unix uniq."""
+    import itertools
+    parser = command_parser("uniq", "Drop repeated neighbouring lines (in a pipeline).")
+    parser.add_argument("-c", "--count", action="store_true", help="show how often each line was repeated")
+    options = parse_command_args(parser, arg)
+    if options.count:
+        return (f"{sum(1 for _ in group):7} {line}" for line, group in itertools.groupby(lines))
+    return (line for line, _ in itertools.groupby(lines))
+
+def pipe_wc(lines, arg):
+    """Counts lines, words and characters."""
+    parser = command_parser("wc", "Count lines, words and characters (in a pipeline).")
+    parser.add_argument("-l", "--lines", action="store_true", help="count lines only")
+    options = parse_command_args(parser, arg)
+
+    def count():
+        line_count = word_count = char_count = 0
+        for line in lines:
+            line_count += 1
+            word_count += len(line.split())
+            char_count += len(line) + 1
+        yield str(line_count) if options.lines else f"{line_count:7} {word_count:7} {char_count:7}"
+    return count()
+
+# Commands that can read lines after a '|'
+PIPE_FILTERS = {
+    "grep": pipe_grep,
+    "sort": pipe_sort,
+    "head": pipe_head,
+    "tail": pipe_tail,
+    "uniq": pipe_uniq,
+    "wc": pipe_wc,
+}
+
+def build_pipeline(lines, stages):
+    """Chains the filters of a pipeline onto a stream of lines. 'sort | head N' is done in one step."""
+    parsed = []
+    for stage in stages:
+        name, _, arg = stage.partition(" ")
+        if name not in PIPE_FILTERS:
+            raise UsageError(f"'{name}' cannot be used after '|'. Filters: {', '.join(PIPE_FILTERS)}")
+        parsed.append((name, arg.strip() or None))
+
+    i = 0
+    while i < len(parsed):
+        name, arg = parsed[i]
+        if name == "sort" and i + 1 < len(parsed) and parsed[i + 1][0] == "head":
+            lines = pipe_sorted_head(lines, arg, parsed[i + 1][1])
+            i += 2
+            continue
+        lines = PIPE_FILTERS[name](lines, arg)
+        i += 1
+    return lines
+
+def run_pipeline(stages):
+    """
+    Runs 'command | filter | filter ...'. The command runs in a thread and the filters are generators
+    pulling its lines one by one, so only the current lines are in memory (except for 'sort').
+    Returns the exit status of the command.
+    """
+    producer = None
+    try:
+        # Check the filters before starting anything
+        build_pipeline(iter(()), stages[1:])
+        producer = PipeProducer(stages[0])
+        for line in build_pipeline(producer.lines(), stages[1:]):
+            print(line)
+    finally:
+        if producer is not None:
+            producer.close()
+    return producer.status or 0
+
+# A dictionary to map commands to functions
+apps = {
+    "desktop": show_gui_desktop,
+    "list": list_files_and_folders,
+    "clear": clear_screen,
+    "help": show_help,
+    "calc": calculator,
+    "code": code_editor,
+    "paint": text_paint,
+    "create": create_file,
+    "read": read_file,
+    "edit": edit_file,
+    "run": run_file,
+    "delete": delete_file,
+    "rename": rename_item,
+    "delfolder": delete_folder,
+    "todo": manage_todo,
+    "pcinfo": show_pc_info,
+    "top": top_command,
+    "record": record_command,
+    "replay": replay_command,
+    "time": show_time,
+    "uptime": show_uptime,
+    "folder": folder_command,
+    "ai": ai_chat,
+    "internet": run_internet_server,
+    "kill_server": kill_internet_server,
+    "convert": html_to_markdown,
+    "image": image_to_ascii,
+    "cd": change_directory,
+    "background": set_background,
+    "drivers": display_important_pips,
+    "games": games_command,
+    "terry_davis": terry_davis_story,
+    "special_thanks": special_thanks_command,
+    "ping": ping_google,
+    "grep": grep_command,
+    "search": search_command,
+    "du": du_command,
+    "tree": tree_command,
+    "trash": trash_command,
+    "copy": copy_command,
+    "move": move_command,
+    "dedupe": dedupe_command,
+    "pack": pack_command,
+    "unpack": unpack_command,
+    "bench": bench_command,
+    "jobs": jobs_command,
+    "fg": fg_command,
+    "kill": kill_command,
+    "exit": sys.exit,
+}
+
+# Commands that need an argument, e.g. 'cd games'
+ARG_COMMANDS = ["image", "cd", "background"]
+
+# Commands that take optional options, e.g. 'list *.py --sort size'
+OPTION_COMMANDS = ["list", "grep", "search", "du", "tree", "trash", "copy", "move", "dedupe", "pack", "unpack", "bench", "run", "calc",
+                   "jobs", "fg", "kill", "pcinfo", "top", "record", "replay"]
+
+# Commands that ask for their input themselves, so they are called without args
+PROMPT_COMMANDS = ["create", "read", "edit", "delete", "rename", "delfolder"]
+
+def run_command(command_line):
+    """
+    Runs a single command line through the apps table. A line ending in '&' starts a background job,
+    and 'command | filter ...' runs a pipeline (see run_pipeline).
+    Returns an exit status: 0 on success, 1 on error, 2 on bad usage and 127 for unknown commands.
+    """
+    command_line = command_line.strip()
+    background = command_line.endswith("&") and not command_line.endswith("&&")
+    if background:
+        command_line = command_line[:-1].strip()
+    stages = split_pipeline(command_line) if "|" in command_line else [command_line]
+    command_input = stages[0].split(' ', 1)
+    command = command_input[0]
+    arg = command_input[1].strip() if len(command_input) > 1 else None
+
+    if command == "":
+        return 0
+    # Look up the command in the apps dictionary
+    if command not in apps:
+        print("Unknown command. Type 'help'.")
+        return 127
+    if background:
+        job = start_job(command_line)
+        print(f"[{job.job_id}] started: {command_line}")
+        return 0
+
+    try:
+        if len(stages) > 1:
+            return run_pipeline(stages)
+        if command in ARG_COMMANDS:
+            if not arg:
+                print(f"Please provide a filename for '{command}'. Example: {command} myimage.jpg")
+                return 2
+            status = apps[command](arg)
+        elif command in OPTION_COMMANDS:
+            status = apps[command](arg)
+        else:
+            status = apps[command]()
+    except UsageError as e:
+        if str(e):
+            print(e)
+        return 2
+    except EOFError:
+        print(f"'{command}' ran out of input.")
+        return 1
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return 1
+    # Commands return a non-zero status when they fail and nothing when they succeed
+    return status if isinstance(status, int) else 0
+
+def set_prompt_input(stream):
+    """Makes input() at the prompt read from stream, leaving the inputs of running jobs alone."""
+    if isinstance(sys.stdin, ThreadRouter):
+        sys.stdin.default = stream
+    else:
+        sys.stdin = stream
+
+def run_batch(script):
+    """
+    Runs commands from a file object one after another without the boot screen.
+    Prompts inside commands (like 'create') read their answers from the following lines.
+    A status line with the exit status and timing of every command is written to stderr.
+    Returns the process exit code: 0 if every command succeeded, 1 otherwise.
+    """
+    # Commands read their own prompts with input(), so they have to read from the script too.
+    # Once jobs have put a ThreadRouter in place only its default changes, so their routes stay.
+    previous_stdin = sys.stdin.default if isinstance(sys.stdin, ThreadRouter) else sys.stdin
+    set_prompt_input(script)
+    count = 0
+    failed = 0
+    batch_start = time.perf_counter()
+
+    try:
+        while True:
+            line = script.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            report_finished_jobs()
+
+            count += 1
+            start = time.perf_counter()
+            try:
+                status = run_command(line)
+            except SystemExit:
+                # 'exit' ends the script early
+                print(f"[{count}] status=0 time={(time.perf_counter() - start) * 1000:.3f}ms {line}", file=sys.stderr)
+                break
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if status != 0:
+                failed += 1
+            sys.stdout.flush()
+            print(f"[{count}] status={status} time={elapsed_ms:.3f}ms {line}", file=sys.stderr)
+    finally:
+        set_prompt_input(previous_stdin)
+
+    total = time.perf_counter() - batch_start
+    rate = count / total if total > 0 else 0
+    print(f"Batch finished: {count} commands, {failed} failed, {total:.3f}s ({rate:.0f} commands/s)", file=sys.stderr)
+    return 1 if failed else 0
+
+# Option values used when MiniOS is started without any command line options
+DEFAULT_OPTIONS = {
+    "batch": None,
+    "startup_report": False,
+    "boot_time": 1.0,
+    "zygote": None,
+}
+
+def parse_arguments(argv):
+    """Parses the MiniOS command line options."""
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        # Skip importing argparse (and everything it pulls in) for a plain start
+        import types
+        return types.SimpleNamespace(**DEFAULT_OPTIONS)
+
+    import argparse
+    parser = argparse.ArgumentParser(description="MiniOS - a tiny operating system written in Python.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run commands from FILE ('-' for stdin) without the boot screen, then exit")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="show how long each startup phase took before the first prompt")
+    parser.add_argument("--boot-time", type=float, metavar="SECONDS",
+                        help="show the boot screen for at least SECONDS (default: 1.0)")
+    # Used internally to start a warm interpreter for 'run' and 'games'
+    parser.add_argument("--zygote", metavar="PROFILE", help=argparse.SUPPRESS)
+    parser.set_defaults(**DEFAULT_OPTIONS)
+    return parser.parse_args(argv)
+
+def show_startup_report():
+    """Prints how long each startup phase took, from the first import to the first prompt."""
+    total = sum(seconds for _, seconds in startup_phases)
+    print("=== MiniOS Startup Report ===")
+    for name, seconds in startup_phases:
+        percent = (seconds / total) * 100 if total > 0 else 0
+        print(f"  {name.ljust(20)} {seconds * 1000:9.2f} ms  {percent:5.1f}%")
+    print(f"  {'total'.ljust(20)} {total * 1000:9.2f} ms")
+
+    if driver_load_times:
+        print("\nDrivers loaded so far:")
+        for name, seconds in driver_load_times.items():
+            status = "ok" if drivers.get(name) else "not installed"
+            print(f"  {name.ljust(20)} {seconds * 1000:9.2f} ms  ({status})")
+    print("\nTime before the interpreter reached MiniOS is not included;")
+    print("run 'python -X importtime minios.py' to see it.\n")
+
+def main(argv=None):
     """The main loop of the MiniOS program."""
-    global program_start_time
+    global program_start_time, batch_mode, data_root
+    options = parse_arguments(argv)
+    if options.zygote:
+        zygote_main(options.zygote)
+        return
+    batch_mode = options.batch is not None
+    mark_startup_phase("argument parsing")
     clear_screen()
     
     # Check for a 'minios_data' folder and create it if it doesn't exist
     if not os.path.exists('minios_data'):
         os.makedirs('minios_data')
+
+    if batch_mode:
+        # Open the script before changing into 'minios_data' so relative paths still work
+        script = sys.stdin if options.batch == '-' else open(options.batch, "r")
+        os.chdir('minios_data')
+        data_root = os.getcwd()
+        resume_trash_worker()
+        try:
+            exit_code = run_batch(script)
+        finally:
+            if script is not sys.stdin:
+                script.close()
+        # The trash worker dies with the process, so finish its deleting before exiting
+        if trash_worker_thread is not None:
+            purge_trash()
+        sys.exit(exit_code)
+
     os.chdir('minios_data')
+    data_root = os.getcwd()
+    resume_trash_worker()
+    mark_startup_phase("data folder")
     
-    show_boot_screen()
+    show_boot_screen(options.boot_time)
+    mark_startup_phase("boot screen")
     show_gui_desktop()
+    mark_startup_phase("desktop")
 
-    # NEW: A dictionary to map commands to functions
-    apps = {
-        "desktop": show_gui_desktop,
-        "list": list_files_and_folders,
-        "clear": clear_screen,
-        "help": show_help,
-        "calc": calculator,
-        "code": code_editor,
-        "paint": text_paint,
-        "create": create_file,
-        "read": read_file,
-        "edit": edit_file,
-        "run": run_file,
-        "delete": delete_file,
-        "rename": rename_item,
-        "delfolder": delete_folder,
-        "todo": manage_todo,
-        "pcinfo": show_pc_info,
-        "time": show_time,
-        "uptime": show_uptime,
-        "folder": folder_command,
-        "ai": ai_chat,
-        "internet": run_internet_server,
-        "kill_server": kill_internet_server,
-        "convert": html_to_markdown,
-        "image": image_to_ascii,
-        "code": code_editor,
-        "paint": text_paint,
-        "cd": change_directory,
-        "background": set_background,
-        "drivers": display_important_pips,
-        "games": games_command,
-        "terry_davis": terry_davis_story,
-        "special_thanks": special_thanks_command,
-        "ping": ping_google,
-        "exit": sys.exit,
-    }
+    if options.startup_report:
+        show_startup_report()
 
     while True:
+        report_finished_jobs()
+        current_dir = os.getcwd()
         try:
-            current_dir = os.getcwd()
-            command_input = input(f"MiniOS [{current_dir}]> ").strip().split(' ', 1)
-            command = command_input[0]
-            arg = command_input[1] if len(command_input) > 1 else None
-
-            # Look up the command in the apps dictionary
-            if command in apps:
-                # The 'image', 'cd', and 'background' commands need an argument
-                if command in ["image", "cd", "background"] and arg:
-                    apps[command](arg)
-                # The 'create' and 'read' commands are handled slightly differently
-                # to get user input within their functions, so we call them without args here.
-                elif command in ["create", "read", "edit", "run", "delete", "rename", "delfolder"]:
-                    apps[command]()
-                # All other apps can be called directly
-                elif command not in ["image", "cd", "background", "create", "read", "edit", "run", "delete", "rename", "delfolder"]:
-                    apps[command]()
-                else:
-                    print(f"Please provide a filename for '{command}'. Example: {command} myimage.jpg")
-            elif command == "":
-                continue
-            else:
-                print("Unknown command. Type 'help'.")
-        except Exception as e:
-            print(f"An error occurred: {e}")
+            command_line = input(f"MiniOS [{current_dir}]> ")
+        except EOFError:
+            # Ctrl+D (or the end of piped input) closes MiniOS like 'exit'
+            print()
+            break
+        run_command(command_line)
 
 if __name__ == "__main__":
     # This line is crucial! It tells Python to run the main() function
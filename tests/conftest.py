@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# minios.py is a script rather than an installed package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MiniOS"))
+
+import minios
+
+
+@pytest.fixture(autouse=True)
+def data_folder(tmp_path, monkeypatch):
+    """Runs every test in its own empty minios_data folder, as a script would (no paging prompts)."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(minios, "batch_mode", True)
+    # Jobs and pipelines put ThreadRouters in place of the standard streams; undo that afterwards
+    for name in ["stdin", "stdout", "stderr"]:
+        monkeypatch.setattr(sys, name, getattr(sys, name))
+    return tmp_path
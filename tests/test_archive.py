@@ -0,0 +1,56 @@
+import os
+import zipfile
+
+import pytest
+
+import minios
+
+
+def make_tree(root):
+    (root / "src" / "sub").mkdir(parents=True)
+    (root / "src" / "empty").mkdir()
+    (root / "src" / "a.txt").write_text("a" * 1000)
+    (root / "src" / "sub" / "b.txt").write_text("b")
+    os.symlink("a.txt", root / "src" / "link")
+
+
+@pytest.mark.parametrize("archive", ["out.zip", "out.tar.gz", "out.tar.xz", "out.tar"])
+def test_pack_and_unpack_keep_the_whole_tree(data_folder, archive, capsys):
+    make_tree(data_folder)
+    assert minios.run_command(f"pack src {archive}") == 0
+    assert minios.run_command(f"unpack {archive} restored") == 0
+    root = data_folder / "restored" / "src"
+    assert (root / "a.txt").read_text() == "a" * 1000
+    assert (root / "sub" / "b.txt").read_text() == "b"
+    assert (root / "empty").is_dir()
+
+
+def test_zip_stores_symlinks_as_links(data_folder, capsys):
+    make_tree(data_folder)
+    assert minios.run_command("pack src out.zip") == 0
+    with zipfile.ZipFile(data_folder / "out.zip") as archive:
+        info = archive.getinfo("src/link")
+        assert (info.external_attr >> 16) & 0o170000 == 0o120000
+        assert archive.read(info) == b"a.txt"
+
+
+def test_parallel_pack_unpacks_like_a_normal_one(data_folder, capsys):
+    make_tree(data_folder)
+    assert minios.run_command("pack src out.tar.gz --parallel -j 2") == 0
+    assert minios.run_command("unpack out.tar.gz restored") == 0
+    assert (data_folder / "restored" / "src" / "a.txt").read_text() == "a" * 1000
+
+
+def test_failed_pack_removes_the_partial_archive(data_folder, monkeypatch, capsys):
+    make_tree(data_folder)
+
+    def disk_full(*args, **kwargs):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(zipfile.ZipFile, "write", disk_full)
+    assert minios.run_command("pack src out.zip") == 1
+    assert not (data_folder / "out.zip").exists()
+
+
+def test_unpack_rejects_damaged_archives(data_folder, capsys):
+    (data_folder / "bad.zip").write_bytes(b"not a zip")
+    assert minios.run_command("unpack bad.zip") == 1
@@ -0,0 +1,25 @@
+import io
+
+import minios
+
+
+def test_run_command_statuses(capsys):
+    assert minios.run_command("") == 0
+    assert minios.run_command("time") == 0
+    assert minios.run_command("no-such-command") == 127
+    assert minios.run_command("cd") == 2
+    assert minios.run_command("cd no-such-folder") == 1
+
+
+def test_batch_prompts_read_the_following_lines(data_folder, capsys):
+    script = io.StringIO("create\nnotes.txt\nhello\ntime\n")
+    assert minios.run_batch(script) == 0
+    assert (data_folder / "notes.txt").read_text() == "hello"
+    assert "[2] status=0" in capsys.readouterr().err
+
+
+def test_batch_fails_if_any_command_fails(capsys):
+    assert minios.run_batch(io.StringIO("cd no-such-folder\ntime\n")) == 1
+    err = capsys.readouterr().err
+    assert "[1] status=1" in err
+    assert "1 failed" in err
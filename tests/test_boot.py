@@ -0,0 +1,29 @@
+import threading
+import time
+
+import minios
+
+
+def test_boot_screen_waits_for_the_warmup(monkeypatch, capsys):
+    done = []
+    monkeypatch.setattr(minios, "BOOT_WARMUP_TASKS", [lambda: done.append(1)] * 3)
+    minios.show_boot_screen(min_seconds=0)
+    assert done == [1, 1, 1]
+
+
+def test_boot_screen_does_not_wait_for_slow_tasks(monkeypatch, capsys):
+    release = threading.Event()
+    monkeypatch.setattr(minios, "BOOT_WARMUP_TASKS", [release.wait])
+    monkeypatch.setattr(minios, "BOOT_MAX_SECONDS", 0.2)
+    start = time.perf_counter()
+    minios.show_boot_screen(min_seconds=0)
+    assert time.perf_counter() - start < 2
+    release.set()
+
+
+def test_failing_warmup_task_is_ignored(monkeypatch, capsys):
+    def broken():
+        raise RuntimeError("no drivers")
+    monkeypatch.setattr(minios, "BOOT_WARMUP_TASKS", [broken])
+    minios.show_boot_screen(min_seconds=0)
+    assert "Starting up" in capsys.readouterr().out
@@ -0,0 +1,83 @@
+import math
+
+import pytest
+
+import minios
+
+
+def calc(text, variables=None):
+    return minios.calc_line(text, {} if variables is None else variables)
+
+
+def test_expressions():
+    assert calc("2 + 3 * 4") == 14
+    assert calc("2 ** 10 // 3 % 7") == 341 % 7
+    assert calc("sqrt(16) + max(1, 5, 3)") == 9.0
+    assert calc("-pi") == -math.pi
+    assert calc("factorial(5)") == 120
+
+
+def test_variables_and_ans():
+    variables = {}
+    assert calc("x = 5", variables) == 5
+    assert calc("x * 2", variables) == 10
+    assert calc("ans + 1", variables) == 11
+    with pytest.raises(minios.CalcError, match="cannot be changed"):
+        calc("pi = 3", variables)
+    with pytest.raises(minios.CalcError, match="'y' is not defined"):
+        calc("y + 1", variables)
+
+
+@pytest.mark.parametrize("text", [
+    "__import__('os')",
+    "(1).__class__",
+    "open('x')",
+    "[1, 2]",
+    "'text'",
+    "x if 1 else 2",
+    "lambda: 1",
+    "abs(*[1])",
+    "round(1.5, ndigits=1)",
+    "1 < 2",
+])
+def test_anything_else_is_refused(text):
+    with pytest.raises(minios.CalcError):
+        calc(text)
+
+
+def test_math_errors_become_calc_errors():
+    with pytest.raises(minios.CalcError, match="division by zero"):
+        calc("1 / 0")
+    with pytest.raises(minios.CalcError, match="math error"):
+        calc("sqrt(-1)")
+    with pytest.raises(minios.CalcError, match="too big"):
+        calc("exp(1000)")
+
+
+def test_power_limits():
+    assert minios.calc_power(2, 100) == 2 ** 100
+    assert minios.calc_power(1, 10 ** 12) == 1
+    assert minios.calc_power(-1, 10 ** 12 + 1) == -1
+    assert minios.calc_power(2.0, 0.5) == 2 ** 0.5
+    with pytest.raises(minios.CalcError):
+        minios.calc_power(2, minios.CALC_MAX_BITS + 1)
+    # A big base reaches the limit with a small exponent
+    with pytest.raises(minios.CalcError):
+        minios.calc_power(10 ** 1000, 400)
+    with pytest.raises(minios.CalcError):
+        calc("9 ** 9 ** 9")
+
+
+def test_repeated_squaring_is_limited():
+    variables = {"x": 2 ** 600000}
+    with pytest.raises(minios.CalcError):
+        calc("x * x", variables)
+
+
+def test_factorial_limit():
+    with pytest.raises(minios.CalcError):
+        calc(f"factorial({minios.CALC_MAX_FACTORIAL + 1})")
+
+
+def test_huge_results_are_described():
+    assert minios.format_calc_value(10 ** 5000).startswith("(an integer with about")
@@ -0,0 +1,44 @@
+import builtins
+import os
+
+import minios
+
+
+def make_copies(folder):
+    for name in ["a.txt", "b.txt", "c.txt"]:
+        (folder / name).write_text("same contents")
+    (folder / "other.txt").write_text("different ones")
+
+
+def test_find_duplicates_groups_identical_files(data_folder, capsys):
+    make_copies(data_folder)
+    duplicates, signatures = minios.find_duplicates(str(data_folder), 2)
+    assert duplicates == [(13, [str(data_folder / name) for name in ["a.txt", "b.txt", "c.txt"]])]
+    info = os.lstat(data_folder / "a.txt")
+    assert signatures[str(data_folder / "a.txt")] == (info.st_size, info.st_mtime_ns, info.st_ino)
+    assert "Hashing 3 files" in capsys.readouterr().out
+    # The second run takes every digest from the cache
+    assert minios.find_duplicates(str(data_folder), 2)[0] == duplicates
+    assert "Hashing" not in capsys.readouterr().out
+
+
+def test_link_replaces_copies_with_hard_links(data_folder, monkeypatch, capsys):
+    make_copies(data_folder)
+    monkeypatch.setattr(builtins, "input", lambda prompt="": "yes")
+    assert minios.run_command("dedupe --link") == 0
+    inodes = {os.stat(data_folder / name).st_ino for name in ["a.txt", "b.txt", "c.txt"]}
+    assert len(inodes) == 1
+    assert (data_folder / "c.txt").read_text() == "same contents"
+
+
+def test_link_skips_files_changed_since_hashing(data_folder, monkeypatch, capsys):
+    make_copies(data_folder)
+    duplicates, signatures = minios.find_duplicates(str(data_folder), 2)
+    (data_folder / "c.txt").write_text("edited meanwhile")
+    monkeypatch.setattr(minios, "find_duplicates", lambda root, jobs: (duplicates, signatures))
+    monkeypatch.setattr(builtins, "input", lambda prompt="": "yes")
+    assert minios.run_command("dedupe --link") == 1
+    assert "Skipping 'c.txt'" in capsys.readouterr().out
+    assert (data_folder / "c.txt").read_text() == "edited meanwhile"
+    assert os.stat(data_folder / "b.txt").st_ino == os.stat(data_folder / "a.txt").st_ino
+    assert not list(data_folder.glob("*.minios-link"))
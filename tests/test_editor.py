@@ -0,0 +1,105 @@
+import io
+import os
+
+import pytest
+
+import minios
+
+
+@pytest.fixture
+def table(data_folder):
+    (data_folder / "f.txt").write_text("one\ntwo\nthree\n")
+    table = minios.PieceTable(str(data_folder / "f.txt"))
+    yield table
+    table.close()
+
+
+def text(table):
+    return table.read(0, len(table)).decode()
+
+
+def test_insert_delete_and_lines(table):
+    table.insert(table.line_start(1), "inserted\n")
+    assert table.line_count() == 4
+    assert table.get_line(1) == "inserted"
+    table.delete(table.line_start(0), table.line_start(1))
+    assert text(table) == "inserted\ntwo\nthree\n"
+    assert table.modified
+
+
+def test_undo_and_redo(table):
+    table.insert(0, "zero\n")
+    table.replace(table.line_start(2), 3, "TWO")
+    assert text(table) == "zero\none\nTWO\nthree\n"
+    assert table.undo(table.undo_stack, table.redo_stack)
+    assert text(table) == "zero\none\ntwo\nthree\n"
+    assert table.undo(table.undo_stack, table.redo_stack)
+    assert text(table) == "one\ntwo\nthree\n"
+    assert not table.undo(table.undo_stack, table.redo_stack)
+    assert table.undo(table.redo_stack, table.undo_stack)
+    assert text(table) == "zero\none\ntwo\nthree\n"
+
+
+def test_many_lines_across_blocks(data_folder):
+    lines = [f"line {number}" for number in range(5000)]
+    (data_folder / "big.txt").write_text("\n".join(lines))
+    table = minios.PieceTable(str(data_folder / "big.txt"))
+    try:
+        assert table.line_count() == 5000
+        assert table.get_line(4321) == "line 4321"
+        table.insert(table.line_start(2500), "new\n")
+        assert table.get_line(2500) == "new"
+        assert table.get_line(4999) == "line 4998"
+    finally:
+        table.close()
+
+
+def test_save_writes_and_starts_over(table, data_folder):
+    table.insert(0, "zero\n")
+    table.save(str(data_folder / "f.txt"))
+    assert (data_folder / "f.txt").read_text() == "zero\none\ntwo\nthree\n"
+    assert not table.modified
+    assert table.undo_stack == []
+    assert text(table) == "zero\none\ntwo\nthree\n"
+
+
+def test_failed_save_keeps_the_text_and_the_file(table, data_folder, monkeypatch):
+    table.insert(0, "zero\n")
+    replace = os.replace
+
+    def replace_fails(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, "replace", replace_fails)
+    with pytest.raises(OSError):
+        table.save(str(data_folder / "f.txt"))
+    monkeypatch.setattr(os, "replace", replace)
+    assert text(table) == "zero\none\ntwo\nthree\n"
+    assert table.modified
+    assert (data_folder / "f.txt").read_text() == "one\ntwo\nthree\n"
+    assert sorted(os.listdir(data_folder)) == ["f.txt"]
+
+
+def test_editor_stays_open_when_saving_fails(data_folder, monkeypatch, capsys):
+    (data_folder / "f.txt").write_text("one\n")
+    replace = os.replace
+    calls = []
+
+    def fail_once(src, dst):
+        calls.append(dst)
+        if len(calls) == 1:
+            raise OSError("disk full")
+        replace(src, dst)
+    monkeypatch.setattr(os, "replace", fail_once)
+    script = io.StringIO("edit\nf.txt\na\ntwo\n.\nw\nw\nq\n")
+    assert minios.run_batch(script) == 0
+    assert "Could not save" in capsys.readouterr().out
+    assert (data_folder / "f.txt").read_text() == "one\ntwo\n"
+
+
+def test_edit_reports_failure(data_folder, monkeypatch, capsys):
+    (data_folder / "f.txt").write_text("one\n")
+
+    def broken_editor(path):
+        raise RuntimeError("terminal went away")
+    monkeypatch.setattr(minios, "text_editor", broken_editor)
+    assert minios.run_batch(io.StringIO("edit\nf.txt\n")) == 1
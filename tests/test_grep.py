@@ -0,0 +1,33 @@
+import pytest
+
+import minios
+
+
+def test_grep_finds_lines_with_numbers(data_folder, capsys):
+    (data_folder / "a.txt").write_text("one\ntwo apples\nthree\nmore apples\n")
+    (data_folder / "sub").mkdir()
+    (data_folder / "sub" / "b.txt").write_text("no match here\n")
+    assert minios.run_command("grep apples -n") == 0
+    out = capsys.readouterr().out
+    assert "a.txt:2: two apples" in out
+    assert "a.txt:4: more apples" in out
+    assert "2 matches in 1 of 2 files searched" in out
+
+
+def test_grep_reports_binary_files_once(data_folder, capsys):
+    (data_folder / "blob.bin").write_bytes(b"\0key key key")
+    assert minios.run_command("grep key") == 0
+    assert capsys.readouterr().out.count("Binary file matches") == 1
+
+
+def test_grep_stops_after_max_matches(data_folder, capsys):
+    (data_folder / "a.txt").write_text("hit\n" * 10)
+    assert minios.run_command("grep hit -m 3") == 0
+    assert "3 matches" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("count", ["0", "-2"])
+def test_grep_rejects_max_below_one(data_folder, count, capsys):
+    (data_folder / "a.txt").write_text("hit\n")
+    assert minios.run_command(f"grep hit -m {count}") == 2
+    assert capsys.readouterr().out == "grep: -m must be at least 1\n"
@@ -0,0 +1,69 @@
+import io
+import sys
+import threading
+import time
+
+import minios
+
+
+def wait_for(job):
+    job.thread.join(5)
+    assert not job.thread.is_alive()
+
+
+def test_job_output_is_kept_for_fg(monkeypatch, capsys):
+    monkeypatch.setitem(minios.apps, "hello", lambda: print("hello from the job"))
+    job = minios.start_job("hello")
+    wait_for(job)
+    assert job.status == 0
+    assert job.state == "done"
+    assert job.output.tail.getvalue() == b"hello from the job\n"
+    assert capsys.readouterr().out == ""
+
+
+def test_jobs_see_the_end_of_input():
+    job = minios.start_job("create")
+    wait_for(job)
+    assert job.status == 1
+    assert "ran out of input" in job.output.tail.getvalue().decode()
+
+
+def test_cd_is_refused_while_a_job_runs(data_folder, monkeypatch, capsys):
+    (data_folder / "sub").mkdir()
+    release = threading.Event()
+    monkeypatch.setitem(minios.apps, "wait", release.wait)
+    job = minios.start_job("wait")
+    try:
+        assert minios.run_command("cd sub") == 1
+        assert "background jobs are running" in capsys.readouterr().out
+    finally:
+        release.set()
+        wait_for(job)
+    assert minios.run_command("cd sub") == 0
+
+
+def test_kill_stops_a_job_at_its_next_print(monkeypatch):
+    def chatty():
+        while True:
+            print("still here")
+            time.sleep(0.01)
+    monkeypatch.setitem(minios.apps, "chatty", chatty)
+    job = minios.start_job("chatty")
+    minios.kill_job(job)
+    wait_for(job)
+    assert minios.describe_job_end(job) == "killed"
+
+
+def test_batch_keeps_the_routes_of_running_jobs(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setitem(minios.apps, "wait", release.wait)
+    job = minios.start_job("wait")
+    try:
+        prompt_input = sys.stdin.default
+        assert minios.run_batch(io.StringIO("time\n")) == 0
+        assert isinstance(sys.stdin, minios.ThreadRouter)
+        assert sys.stdin.default is prompt_input
+        assert job.thread.ident in sys.stdin.routes
+    finally:
+        release.set()
+        wait_for(job)
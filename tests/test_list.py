@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+import minios
+
+
+def make_files(folder, sizes):
+    for name, size in sizes.items():
+        (folder / name).write_bytes(b"x" * size)
+
+
+def test_iter_sorted_page_walks_every_entry_once():
+    keyed = [((size, name), name, False) for name, size in [("a", 5), ("b", 1), ("c", 3), ("d", 1), ("e", 9)]]
+    names = []
+    last_key = None
+    while True:
+        page = minios.iter_sorted_page(keyed, 2, last_key)
+        if not page:
+            break
+        names.extend(name for _, name, _ in page)
+        last_key = page[-1][0]
+    assert names == ["b", "d", "c", "a", "e"]
+
+
+def test_iter_sorted_page_reverse():
+    keyed = [((size, name), name, False) for name, size in [("a", 5), ("b", 1), ("c", 3)]]
+    first = minios.iter_sorted_page(keyed, 2, reverse=True)
+    assert [name for _, name, _ in first] == ["a", "c"]
+    rest = minios.iter_sorted_page(keyed, 2, first[-1][0], reverse=True)
+    assert [name for _, name, _ in rest] == ["b"]
+
+
+def test_key_entries_stats_each_entry_once(data_folder, monkeypatch):
+    make_files(data_folder, {"a": 1, "b": 2})
+    calls = []
+    real_stat = os.stat
+    monkeypatch.setattr(os, "stat", lambda path, *args, **kwargs: calls.append(path) or real_stat(path, *args, **kwargs))
+    keyed = minios.key_entries([("a", False), ("b", False)], str(data_folder), "size")
+    assert [key for key, _, _ in keyed] == [(1, "a"), (2, "b")]
+    assert len(calls) == 2
+
+
+def test_list_sorts_by_size(data_folder, capsys):
+    make_files(data_folder, {"big": 30, "small": 10, "medium": 20})
+    assert minios.run_command("list --sort size --reverse") == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[1] for line in lines] == ["big", "medium", "small"]
+
+
+def test_list_top_and_pattern(data_folder, capsys):
+    make_files(data_folder, {"a.py": 1, "b.py": 3, "c.txt": 2})
+    assert minios.run_command("list *.py --sort size --top 1 --reverse") == 0
+    assert capsys.readouterr().out.split()[1] == "b.py"
+
+
+@pytest.mark.parametrize("option", ["--top 0", "--page-size 0", "--page-size -3"])
+def test_list_rejects_counts_below_one(option, capsys):
+    assert minios.run_command(f"list {option}") == 2
+    assert "must be at least 1" in capsys.readouterr().out
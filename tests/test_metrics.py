@@ -0,0 +1,101 @@
+import datetime
+import itertools
+import struct
+import time
+
+import pytest
+
+import minios
+
+START = 1700000000.0
+
+
+def write_recording(path, times):
+    with open(path, "wb") as f:
+        record = struct.Struct(minios.METRICS_RECORD_FORMAT)
+        f.write(struct.pack(minios.METRICS_HEADER_FORMAT, minios.METRICS_FILE_MAGIC, record.size))
+        for number, t in enumerate(times):
+            f.write(record.pack(t, number % 100, 1024.0, 512.0, float("nan")))
+
+
+@pytest.fixture
+def gap_times():
+    # Three seconds of samples, a long gap, then a few more
+    return [START + i * 0.1 for i in range(30)] + [START + 1000 + i * 0.1 for i in range(5)]
+
+
+def test_parse_duration():
+    assert minios.parse_duration("90") == 90
+    assert minios.parse_duration("1.5m") == 90
+    assert minios.parse_duration("2h") == 7200
+    assert minios.parse_duration("1d") == 86400
+    for text in ["", "abc", "0", "-5m", "m"]:
+        with pytest.raises(minios.UsageError):
+            minios.parse_duration(text)
+
+
+def test_parse_replay_time():
+    assert minios.parse_replay_time("2024-01-02 03:04") == datetime.datetime(2024, 1, 2, 3, 4).timestamp()
+    assert abs(minios.parse_replay_time("-1h") - (time.time() - 3600)) < 5
+    with pytest.raises(minios.UsageError):
+        minios.parse_replay_time("yesterday")
+
+
+def test_find(data_folder, gap_times):
+    write_recording(data_folder / "m.rec", gap_times)
+    recording = minios.MetricsRecording(str(data_folder / "m.rec"))
+    try:
+        assert len(recording) == 35
+        assert recording.find() == (0, 35)
+        assert recording.find(START + 1, START + 2) == (10, 20)
+        assert recording.find(START + 500) == (30, 35)
+        assert recording.find(None, START) == (0, 0)
+        assert recording.find(START + 2000, START + 1000) == (35, 35)
+    finally:
+        recording.close()
+
+
+def test_partial_last_record_is_ignored(data_folder):
+    write_recording(data_folder / "m.rec", [START, START + 1])
+    with open(data_folder / "m.rec", "ab") as f:
+        f.write(b"\1\2\3")
+    recording = minios.MetricsRecording(str(data_folder / "m.rec"))
+    assert len(recording) == 2
+    recording.close()
+
+
+def test_other_files_are_not_recordings(data_folder):
+    (data_folder / "m.rec").write_bytes(b"hello world")
+    with pytest.raises(ValueError):
+        minios.MetricsRecording(str(data_folder / "m.rec"))
+
+
+@pytest.mark.parametrize("step", [0.3, 1.1, 7.0])
+def test_replay_windows_cross_gaps(data_folder, gap_times, step):
+    write_recording(data_folder / "m.rec", gap_times)
+    recording = minios.MetricsRecording(str(data_folder / "m.rec"))
+    try:
+        windows = list(itertools.islice(
+            minios.iter_replay_windows(recording, 0, len(recording), START, step), 1000))
+        assert len(windows) < 1000
+        covered = []
+        for window_start, first, end in windows:
+            assert first < end
+            covered.extend(range(first, end))
+            for index in range(first, end):
+                assert window_start <= recording[index] < window_start + step
+        assert covered == list(range(len(recording)))
+        starts = [window_start for window_start, _, _ in windows]
+        assert starts == sorted(set(starts))
+    finally:
+        recording.close()
+
+
+def test_replay_every_stays_inside_to(data_folder, capsys):
+    write_recording(data_folder / "m.rec", [START + i for i in range(100)])
+    end = datetime.datetime.fromtimestamp(START + 50).strftime("%Y-%m-%d %H:%M:%S")
+    assert minios.run_command(f"replay m.rec --to '{end}' --every 20s") == 0
+    out = capsys.readouterr().out
+    assert "=== 50 samples" in out
+    counts = [int(line.split()[2]) for line in out.splitlines() if line[:2].isdigit()]
+    assert counts == [20, 20, 10]
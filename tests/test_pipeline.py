@@ -0,0 +1,71 @@
+import sys
+
+import pytest
+
+import minios
+
+
+def run_filters(lines, *stages):
+    return list(minios.build_pipeline(iter(lines), list(stages)))
+
+
+def test_split_pipeline_ignores_quoted_bars():
+    assert minios.split_pipeline("grep 'a|b' x | sort -r") == ["grep 'a|b' x", "sort -r"]
+
+
+def test_filters():
+    lines = ["pear", "apple", "apple", "Banana", "cherry"]
+    assert run_filters(lines, "grep -i an") == ["Banana"]
+    assert run_filters(lines, "grep -v a") == ["cherry"]
+    assert run_filters(lines, "sort") == ["Banana", "apple", "apple", "cherry", "pear"]
+    assert run_filters(lines, "uniq") == ["pear", "apple", "Banana", "cherry"]
+    assert run_filters(lines, "uniq -c") == ["      1 pear", "      2 apple", "      1 Banana", "      1 cherry"]
+    assert run_filters(lines, "head 2") == ["pear", "apple"]
+    assert run_filters(lines, "tail -n 2") == ["Banana", "cherry"]
+    assert run_filters(lines, "wc") == ["      5       5      31"]
+    assert run_filters(lines, "wc -l") == ["5"]
+
+
+def test_sort_head_keeps_only_the_head():
+    lines = ["10 b", "9 a", "100 c", "x", "-1 d"]
+    assert run_filters(lines, "sort -n", "head 3") == ["x", "-1 d", "9 a"]
+    assert run_filters(lines, "sort -n -r", "head 2") == ["100 c", "10 b"]
+
+
+def test_head_stops_reading():
+    def endless():
+        number = 0
+        while True:
+            number += 1
+            yield str(number)
+    assert list(minios.build_pipeline(endless(), ["head 3"])) == ["1", "2", "3"]
+
+
+def test_unknown_filter_is_a_usage_error():
+    with pytest.raises(minios.UsageError):
+        run_filters([], "list")
+
+
+def test_pipeline_runs_a_command(data_folder, capsys):
+    for name in ["b.py", "a.py", "c.txt"]:
+        (data_folder / name).write_text("")
+    assert minios.run_command("list | grep .py | sort") == 0
+    assert capsys.readouterr().out == "[FILE] a.py\n[FILE] b.py\n"
+
+
+class Terminal:
+    """A stdin that looks like a terminal nobody types into."""
+    def isatty(self):
+        return True
+
+    def readline(self, *args):
+        raise AssertionError("a pipeline stage asked for input")
+
+
+def test_list_in_a_pipeline_does_not_page(data_folder, monkeypatch, capsys):
+    for number in range(30):
+        (data_folder / f"file{number}").write_text("")
+    monkeypatch.setattr(minios, "batch_mode", False)
+    monkeypatch.setattr(sys, "stdin", Terminal())
+    assert minios.run_command("list --page-size 5 | wc -l") == 0
+    assert capsys.readouterr().out == "30\n"
@@ -0,0 +1,29 @@
+import pytest
+
+import minios
+
+
+def test_plot_draws_a_chart(capsys):
+    minios.plot_line("x * x from -2 to 2 -n 500", {})
+    out = capsys.readouterr().out
+    assert out.startswith("y = x * x, x from -2 to 2")
+    assert "samples" in out
+
+
+def test_plot_skips_points_that_are_not_defined(capsys):
+    minios.plot_line("sqrt(x) from -1 to 1", {})
+    assert "x from -1 to 1" in capsys.readouterr().out
+    with pytest.raises(minios.CalcError, match="not defined anywhere"):
+        minios.plot_line("sqrt(x) from -2 to -1", {})
+
+
+@pytest.mark.parametrize("text, message", [
+    ("x from 0 to 10 ** 400", "fit in a float"),
+    ("x from -inf to 1", "finite"),
+    ("x from 2 to 1", "below its end"),
+    ("x + y", "'y' is not defined"),
+    (f"x -n {minios.PLOT_MAX_SAMPLES + 1}", "at most"),
+])
+def test_bad_plots_are_refused(text, message):
+    with pytest.raises(minios.CalcError, match=message):
+        minios.plot_line(text, {})
@@ -0,0 +1,51 @@
+import os
+
+import minios
+
+
+def search_rows(db, path):
+    return db.execute("SELECT COUNT(*) FROM postings p JOIN docs d ON d.id = p.doc_id WHERE d.path = ?",
+                      (path,)).fetchone()[0]
+
+
+def test_search_finds_files_with_all_words(data_folder, capsys):
+    (data_folder / "a.txt").write_text("red apples and green pears")
+    (data_folder / "b.txt").write_text("red cars")
+    assert minios.run_command("search red apples") == 0
+    out = capsys.readouterr().out
+    assert "a.txt" in out
+    assert "b.txt" not in out
+
+
+def test_index_only_reads_changed_files(data_folder):
+    (data_folder / "a.txt").write_text("hello world")
+    db = minios.open_search_index()
+    try:
+        assert minios.update_search_index(db) == (1, 0)
+        assert minios.update_search_index(db) == (0, 0)
+        os.remove(data_folder / "a.txt")
+        assert minios.update_search_index(db) == (0, 1)
+    finally:
+        db.close()
+
+
+def test_unreadable_file_loses_its_stale_postings(data_folder, monkeypatch):
+    (data_folder / "a.txt").write_text("hello world")
+    db = minios.open_search_index()
+    try:
+        minios.update_search_index(db)
+        os.utime(data_folder / "a.txt", ns=(10**9, 10**9))
+
+        tokenize_file = minios.tokenize_file
+
+        def unreadable(path):
+            raise OSError("permission denied")
+        monkeypatch.setattr(minios, "tokenize_file", unreadable)
+        assert minios.update_search_index(db) == (0, 1)
+        assert search_rows(db, "a.txt") == 0
+
+        monkeypatch.setattr(minios, "tokenize_file", tokenize_file)
+        assert minios.update_search_index(db) == (1, 0)
+        assert search_rows(db, "a.txt") == 2
+    finally:
+        db.close()
@@ -0,0 +1,31 @@
+import datetime
+
+import minios
+
+
+def test_parse_task_text():
+    today = datetime.date.today()
+    text, priority, due, tags = minios.parse_task_text("buy milk !3 due:+2 #Home #shop #home")
+    assert text == "buy milk"
+    assert priority == 3
+    assert due == (today + datetime.timedelta(days=2)).isoformat()
+    assert tags == ["home", "shop"]
+
+
+def test_old_todo_txt_is_imported_once(data_folder, capsys):
+    (data_folder / "todo.txt").write_text("buy milk #shop\n\ncall mum due:friday\n!2 pay rent\n")
+    db = minios.open_todo_store()
+    try:
+        rows = db.execute("SELECT text, priority FROM tasks ORDER BY id").fetchall()
+        # 'due:friday' does not parse as a date, so that task keeps its text as it was
+        assert rows == [("buy milk", 0), ("call mum due:friday", 0), ("pay rent", 2)]
+        assert db.execute("SELECT tag FROM task_tags").fetchall() == [("shop",)]
+    finally:
+        db.close()
+    assert "Imported 3 tasks" in capsys.readouterr().out
+
+    db = minios.open_todo_store()
+    try:
+        assert db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 3
+    finally:
+        db.close()
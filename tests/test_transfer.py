@@ -0,0 +1,63 @@
+import errno
+import os
+
+import minios
+
+
+def make_tree(root):
+    (root / "src" / "sub").mkdir(parents=True)
+    (root / "src" / "empty").mkdir()
+    (root / "src" / "a.txt").write_text("a")
+    (root / "src" / "sub" / "b.txt").write_text("b" * 100000)
+    os.symlink("a.txt", root / "src" / "link")
+
+
+def assert_same_tree(root):
+    assert (root / "a.txt").read_text() == "a"
+    assert (root / "sub" / "b.txt").read_text() == "b" * 100000
+    assert (root / "empty").is_dir()
+    assert os.readlink(root / "link") == "a.txt"
+
+
+def test_copy_keeps_empty_folders_and_symlinks(data_folder, capsys):
+    make_tree(data_folder)
+    assert minios.run_command("copy src dst") == 0
+    assert_same_tree(data_folder / "dst")
+    assert_same_tree(data_folder / "src")
+
+
+def test_copy_does_not_overwrite_without_force(data_folder, capsys):
+    (data_folder / "a.txt").write_text("new")
+    (data_folder / "b.txt").write_text("old")
+    minios.run_command("copy a.txt b.txt")
+    assert (data_folder / "b.txt").read_text() == "old"
+    assert minios.run_command("copy a.txt b.txt -f") == 0
+    assert (data_folder / "b.txt").read_text() == "new"
+
+
+def test_move_across_drives_copies_then_removes(data_folder, monkeypatch, capsys):
+    make_tree(data_folder)
+
+    def other_drive(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    monkeypatch.setattr(os, "rename", other_drive)
+    assert minios.run_command("move src dst") == 0
+    assert_same_tree(data_folder / "dst")
+    assert not (data_folder / "src").exists()
+
+
+def test_move_keeps_the_originals_if_a_copy_fails(data_folder, monkeypatch, capsys):
+    make_tree(data_folder)
+
+    def other_drive(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    copy_one_file = minios.copy_one_file
+
+    def failing_copy(src, dst, progress):
+        if src.endswith("b.txt"):
+            raise OSError(errno.ENOSPC, "No space left on device")
+        copy_one_file(src, dst, progress)
+    monkeypatch.setattr(os, "rename", other_drive)
+    monkeypatch.setattr(minios, "copy_one_file", failing_copy)
+    assert minios.run_command("move src dst") == 1
+    assert_same_tree(data_folder / "src")
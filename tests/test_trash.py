@@ -0,0 +1,74 @@
+import io
+import threading
+
+import pytest
+
+import minios
+
+
+@pytest.fixture(autouse=True)
+def no_trash_worker(monkeypatch):
+    # The worker thread outlives a test, so tests drive the trash themselves
+    monkeypatch.setattr(minios, "start_trash_worker", lambda: None)
+
+
+def test_delete_moves_to_trash_and_restore_brings_it_back(data_folder, capsys):
+    (data_folder / "notes.txt").write_text("keep me")
+    assert minios.run_batch(io.StringIO("delete\nnotes.txt\n")) == 0
+    assert not (data_folder / "notes.txt").exists()
+    [(item_id, info)] = minios.list_trash()
+    assert info["original"] == str(data_folder / "notes.txt")
+    assert minios.run_command(f"trash restore {item_id}") == 0
+    assert (data_folder / "notes.txt").read_text() == "keep me"
+    assert minios.run_command(f"trash restore {item_id}") == 1
+
+
+def test_empty_trash_purges_everything(data_folder, monkeypatch, capsys):
+    (data_folder / "a").mkdir()
+    (data_folder / "a" / "b.txt").write_text("x")
+    minios.move_to_trash("a")
+    monkeypatch.setattr(minios, "trash_wakeup", threading.Event())
+    assert minios.run_command("trash empty") == 0
+    minios.purge_trash()
+    assert minios.list_trash() == []
+    assert list((data_folder / minios.TRASH_FOLDER / "purge").iterdir()) == []
+
+
+@pytest.mark.parametrize("folder", [".", "..", minios.STATE_FOLDER, minios.TRASH_FOLDER])
+def test_delfolder_refuses_minios_folders(data_folder, folder, capsys):
+    (data_folder / minios.STATE_FOLDER).mkdir()
+    (data_folder / minios.TRASH_FOLDER).mkdir()
+    assert minios.run_batch(io.StringIO(f"delfolder\n{folder}\nyes\n")) == 1
+    assert "can't be deleted" in capsys.readouterr().out
+    assert (data_folder / minios.STATE_FOLDER).is_dir()
+
+
+class StopWorker(BaseException):
+    pass
+
+
+def test_wakeup_during_a_round_starts_another(monkeypatch):
+    rounds = []
+
+    def policy():
+        rounds.append(1)
+        if len(rounds) == 1:
+            # Like 'trash empty' while the worker is busy
+            minios.trash_wakeup.set()
+        else:
+            raise StopWorker
+    monkeypatch.setattr(minios, "apply_trash_policy", policy)
+    monkeypatch.setattr(minios, "purge_trash", lambda: None)
+    monkeypatch.setattr(minios, "trash_wakeup", threading.Event())
+    monkeypatch.setattr(minios, "TRASH_CHECK_INTERVAL", 30)
+
+    def run():
+        try:
+            minios.trash_worker()
+        except StopWorker:
+            pass
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    # Without the second round the worker would sleep for TRASH_CHECK_INTERVAL
+    worker.join(5)
+    assert not worker.is_alive()